@@ -3,11 +3,10 @@
 import os
 from flask import Flask
 from flask_socketio import SocketIO
-from google.cloud import firestore
+from .clients import LazyClient
 
-# Firestore 클라이언트를 초기화합니다.
-# 특별한 설정 없이 자동으로 인증됩니다.
-db = firestore.Client()
+# Firestore 클라이언트는 처음 쓸 때 만듭니다. (import할 때 SDK를 불러오지 않아 콜드 스타트가 빨라집니다.)
+db = LazyClient('firestore')
 
 socketio = SocketIO()
 
@@ -19,6 +18,13 @@ def create_app():
     from .main import main as main_blueprint
     app.register_blueprint(main_blueprint)
 
-    socketio.init_app(app, async_mode='gevent')
-    
+    # SOCKETIO_MESSAGE_QUEUE가 있으면 여러 워커 프로세스가 메시지 큐로 이벤트와 캐시 무효화를 나눕니다.
+    from .cluster import cluster
+    socketio.init_app(app, async_mode='gevent', **cluster.socketio_options())
+    cluster.start(spawn=socketio.start_background_task)
+
+    # SIGTERM을 받으면 세션을 다른 인스턴스로 넘기고 녹음과 대화록을 저장한 뒤 종료합니다.
+    from .main import drain, drain_sessions
+    drain.install(drain_sessions, app, spawn=socketio.start_background_task)
+
     return app
\ No newline at end of file
@@ -0,0 +1,235 @@
+# app/archive.py
+
+import os
+import time
+import shutil
+import logging
+import datetime
+import tempfile
+
+from .clients import clients
+from .metrics import metrics
+from .audio_codec import ArchiveIndex, CONTENT_TYPES, EXTENSIONS, encode_segment, resolve_archive_format
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SECONDS = metrics.histogram('gcs_upload_seconds', 'Duration of uploading one session recording and its index',
+                                   buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+
+# ❗️ 중요: Cloud Storage에서 음성 파일을 저장할 버킷의 이름입니다.
+# 이 이름으로 된 버킷이 프로젝트에 미리 생성되어 있어야 합니다.
+# (예: my-meeting-app-final-audio-uploads)
+GCS_BUCKET_NAME = f"{os.environ.get('GCP_PROJECT', 'my-meeting-app-final')}-audio-uploads"
+
+# 설정되어 있으면 GCS 대신 이 로컬 디렉토리에 녹음 파일을 저장합니다. (로컬 개발/테스트용)
+AUDIO_ARCHIVE_DIR = os.environ.get('AUDIO_ARCHIVE_DIR')
+
+# 스풀 파일을 만들 디렉토리입니다. 비어 있으면 시스템 임시 디렉토리를 사용합니다.
+AUDIO_SPOOL_DIR = os.environ.get('AUDIO_SPOOL_DIR') or None
+
+# 메모리에 모아 두는 파트의 크기이자 GCS 재개 가능 업로드의 청크 크기입니다.
+# GCS는 청크 크기가 256KB의 배수여야 합니다.
+ARCHIVE_PART_SIZE = int(os.environ.get('ARCHIVE_PART_SIZE', 1024 * 1024))
+_GCS_CHUNK_ALIGNMENT = 256 * 1024
+
+# 독립적으로 인코딩되는 구간의 길이(초)입니다. 인덱스의 탐색 단위이기도 합니다.
+ARCHIVE_SEGMENT_SECONDS = float(os.environ.get('ARCHIVE_SEGMENT_SECONDS', 10))
+
+
+class LocalBlob:
+    """로컬 파일 하나를 GCS Blob처럼 다루는 클래스"""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = None
+        self.content_type = None
+
+    @property
+    def path(self):
+        return os.path.join(self.bucket.root, self.name)
+
+    @property
+    def public_url(self):
+        return f"file://{os.path.abspath(self.path)}"
+
+    def upload_from_file(self, file_obj, content_type=None, size=None, rewind=False):
+        """파일 객체를 chunk_size 단위로 나누어 복사합니다."""
+        if rewind:
+            file_obj.seek(0)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.content_type = content_type
+        with open(self.path, 'wb') as out:
+            shutil.copyfileobj(file_obj, out, self.chunk_size or ARCHIVE_PART_SIZE)
+
+    def upload_from_string(self, data, content_type=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.content_type = content_type
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with open(self.path, 'wb') as out:
+            out.write(data)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def download_as_bytes(self, start=None, end=None):
+        """GCS처럼 start~end(포함) 범위만 읽을 수 있습니다."""
+        with open(self.path, 'rb') as f:
+            f.seek(start or 0)
+            return f.read() if end is None else f.read(end + 1 - (start or 0))
+
+
+class LocalBucket:
+    """GCS 버킷 대신 로컬 디렉토리를 사용하는 저장소 (로컬 개발/테스트용)"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def blob(self, name):
+        return LocalBlob(self, name)
+
+    def list_blobs(self, prefix=''):
+        blobs = []
+        for directory, _, files in os.walk(self.root):
+            for filename in files:
+                name = os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, '/')
+                if name.startswith(prefix):
+                    blobs.append(LocalBlob(self, name))
+        return sorted(blobs, key=lambda blob: blob.name)
+
+
+def get_archive_bucket():
+    """녹음 파일을 저장할 버킷을 반환합니다. (Storage 클라이언트는 프로세스 전체가 나눠 씁니다.)"""
+    if AUDIO_ARCHIVE_DIR:
+        return LocalBucket(AUDIO_ARCHIVE_DIR)
+    return clients.get('storage').bucket(GCS_BUCKET_NAME)
+
+
+class AudioArchiveWriter:
+    """세션 오디오를 메모리에 모두 들고 있지 않고 스풀 파일로 흘려보낸 뒤 업로드하는 클래스
+
+    PCM은 segment_seconds 길이의 구간으로 모아 FLAC(없으면 WAV)으로 인코딩하고,
+    인코딩된 구간은 최대 part_size 만큼 메모리에 모았다가 로컬 스풀 파일에
+    기록합니다. 세션이 끝나면 finalize()가 스풀 파일을 재개 가능(resumable)
+    업로드로 part_size 단위씩 버킷에 올리고, 사이드카 인덱스도 함께 저장합니다.
+    """
+
+    def __init__(self, meeting_id, sid, bucket=None, spool_dir=None, part_size=None,
+                 sample_rate=16000, archive_format=None, segment_seconds=None):
+        self.meeting_id = meeting_id
+        self.sid = sid
+        self.sample_rate = sample_rate
+        self.format = resolve_archive_format(archive_format)
+        segment_seconds = segment_seconds or ARCHIVE_SEGMENT_SECONDS
+        self.segment_size = max(2, int(segment_seconds * sample_rate) * 2)
+        self.index = ArchiveIndex(self.format, sample_rate)
+        self._bucket = bucket
+        self.spool_dir = spool_dir or AUDIO_SPOOL_DIR
+        part_size = part_size or ARCHIVE_PART_SIZE
+        # 청크 크기는 GCS 요구사항에 맞게 256KB 단위로 올림합니다.
+        self.part_size = -(-part_size // _GCS_CHUNK_ALIGNMENT) * _GCS_CHUNK_ALIGNMENT
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.bytes_written = 0
+        self.closed = False
+        self._segment = bytearray()
+        self._part = bytearray()
+        self._spool = None
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            self._bucket = get_archive_bucket()
+        return self._bucket
+
+    @property
+    def _blob_prefix(self):
+        timestamp = self.started_at.strftime("%Y%m%d-%H%M%S")
+        return f"{self.meeting_id}/{self.sid}_{timestamp}"
+
+    @property
+    def blob_name(self):
+        return f"{self._blob_prefix}.{EXTENSIONS[self.format]}"
+
+    @property
+    def index_blob_name(self):
+        return f"{self._blob_prefix}.index.json"
+
+    def write(self, chunk):
+        """오디오 청크를 현재 구간에 추가하고, 구간이 가득 차면 인코딩합니다."""
+        if self.closed or not chunk:
+            return
+        self._segment += chunk
+        self.bytes_written += len(chunk)
+        while len(self._segment) >= self.segment_size:
+            pcm = self._segment[:self.segment_size]
+            del self._segment[:self.segment_size]
+            self._encode_segment(pcm)
+
+    def _encode_segment(self, pcm):
+        encoded = encode_segment(pcm, self.sample_rate, self.format)
+        if not encoded:
+            return
+        self.index.add(len(pcm) - len(pcm) % 2, len(encoded))
+        self._part += encoded
+        if len(self._part) >= self.part_size:
+            self._flush_part()
+
+    def _flush_part(self):
+        if not self._part:
+            return
+        if self._spool is None:
+            self._spool = tempfile.NamedTemporaryFile(
+                mode='w+b', dir=self.spool_dir, prefix=f"{self.sid}_", suffix='.spool', delete=False
+            )
+        self._spool.write(self._part)
+        self._part = bytearray()
+
+    def close(self):
+        """더 이상 오디오를 받지 않고 남은 파트를 스풀 파일에 기록합니다."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._segment:
+            self._encode_segment(self._segment)
+            self._segment = bytearray()
+        self._flush_part()
+        if self._spool is not None:
+            self._spool.flush()
+
+    def finalize(self):
+        """스풀 파일을 버킷에 업로드하고 정리합니다. 백그라운드 작업에서 호출됩니다."""
+        self.close()
+        if self._spool is None:
+            return None
+        started = time.monotonic()
+        try:
+            blob = self.bucket.blob(self.blob_name)
+            blob.chunk_size = self.part_size
+            blob.upload_from_file(self._spool, content_type=CONTENT_TYPES[self.format],
+                                  size=self.index.size, rewind=True)
+            self.bucket.blob(self.index_blob_name).upload_from_string(
+                self.index.to_json(), content_type='application/json'
+            )
+        except Exception as e:
+            # 업로드에 실패하면 녹음이 사라지지 않도록 스풀 파일을 남겨 둡니다.
+            logger.error(f"Audio upload failed for SID {self.sid}, spool kept at {self._spool.name}: {e}", exc_info=True)
+            self._spool.close()
+            return None
+        UPLOAD_SECONDS.observe(time.monotonic() - started)
+        logger.info(f"Audio for SID {self.sid} uploaded to {self.blob_name}.")
+        self.discard()
+        return blob.public_url
+
+    def discard(self):
+        """스풀 파일을 삭제합니다."""
+        self.closed = True
+        self._segment = bytearray()
+        self._part = bytearray()
+        if self._spool is not None:
+            spool, self._spool = self._spool, None
+            spool.close()
+            try:
+                os.remove(spool.name)
+            except OSError:
+                pass
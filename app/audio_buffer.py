@@ -0,0 +1,133 @@
+# app/audio_buffer.py
+
+import threading
+from collections import deque
+
+
+class AudioRingBuffer:
+    """세션 오디오를 절대 바이트 위치(offset)로 보관하는 버퍼
+
+    여러 인식 스트림이 각자의 위치에서 읽을 수 있고(읽어도 지워지지 않음),
+    최종 인식 결과가 나온 앞부분은 release()로 버립니다. 스트림이 바뀌면
+    아직 확정되지 않은 꼬리 부분을 새 스트림에 다시 보낼 수 있습니다.
+    VAD가 걸러 낸 침묵은 저장하지 않고 위치만 앞으로 보내므로(advance)
+    보관된 오디오 사이에는 빈 구간이 있을 수 있습니다.
+    """
+
+    def __init__(self, max_bytes=None, start=0):
+        self.max_bytes = max_bytes
+        self._chunks = deque()  # (offset, bytes)
+        # start: 다른 인스턴스에서 넘겨받은 세션처럼 중간 위치에서 시작할 때의 첫 위치
+        self._start = start
+        self._end = start
+        self._data_end = start
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped_bytes = 0
+        # 지금 보관 중인 오디오 바이트 수 (빈 구간 제외)
+        self.stored_bytes = 0
+
+    @property
+    def start(self):
+        """아직 보관 중인 가장 오래된 오디오의 위치"""
+        return self._start
+
+    @property
+    def end(self):
+        """지금까지 들어온 오디오(걸러 낸 침묵 포함)의 총 바이트 수"""
+        return self._end
+
+    @property
+    def data_end(self):
+        """보관된 마지막 오디오 조각의 끝 위치"""
+        return self._data_end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, chunk):
+        self.append_at(self._end, chunk)
+
+    def append_at(self, offset, chunk):
+        """offset 위치에 오디오 조각을 추가합니다. 그 앞의 빈 구간은 침묵으로 간주합니다."""
+        if not chunk:
+            return
+        with self._cond:
+            if self.closed:
+                return
+            offset = max(offset, self._data_end)
+            self._chunks.append((offset, bytes(chunk)))
+            self.stored_bytes += len(chunk)
+            self._data_end = offset + len(chunk)
+            self._end = max(self._end, self._data_end)
+            if self.max_bytes is not None:
+                # 상한을 넘으면 가장 오래된 오디오부터 버립니다.
+                while len(self._chunks) > 1 and self._end - self._chunks[1][0] >= self.max_bytes:
+                    offset, old = self._chunks.popleft()
+                    self.dropped_bytes += len(old)
+                    self.stored_bytes -= len(old)
+                    self._start = self._chunks[0][0]
+            self._cond.notify_all()
+
+    def advance(self, offset):
+        """저장하지 않은 오디오(침묵)만큼 위치를 앞으로 보냅니다."""
+        with self._cond:
+            self._end = max(self._end, offset)
+
+    def read(self, offset, timeout=None):
+        """offset부터 이어지는 오디오 조각 하나를 (시작 위치, bytes)로 반환합니다.
+
+        데이터가 없으면 timeout 동안 기다렸다가 (offset, b'')를 반환하고,
+        버퍼가 닫혔고 더 읽을 것이 없으면 (offset, None)을 반환합니다.
+        이미 버려진 위치나 빈 구간을 요청하면 그다음에 있는 오디오부터 돌려줍니다.
+        """
+        with self._cond:
+            if offset >= self._data_end and not self.closed:
+                self._cond.wait(timeout)
+            if offset >= self._data_end:
+                return offset, (None if self.closed else b'')
+            offset = max(offset, self._start)
+            for chunk_offset, chunk in self._chunks:
+                if chunk_offset + len(chunk) > offset:
+                    if chunk_offset >= offset:
+                        return chunk_offset, chunk
+                    return offset, chunk[offset - chunk_offset:]
+            return offset, b''
+
+    def release(self, offset):
+        """offset 이전의 오디오는 더 이상 다시 보낼 필요가 없으므로 버립니다."""
+        with self._cond:
+            while self._chunks and self._chunks[0][0] + len(self._chunks[0][1]) <= offset:
+                self.stored_bytes -= len(self._chunks.popleft()[1])
+            self._start = max(self._start, min(offset, self._end))
+
+    def bytes_after(self, offset):
+        """offset 이후에 보관된 오디오 바이트 수 (아직 읽지 않은 양)"""
+        with self._cond:
+            pending = 0
+            for chunk_offset, chunk in reversed(self._chunks):
+                end = chunk_offset + len(chunk)
+                if end <= offset:
+                    break
+                pending += end - max(chunk_offset, offset)
+            return pending
+
+    def spans(self, offset=0):
+        """offset 이후에 보관된 오디오를 이어진 구간끼리 합쳐 [(위치, bytes), ...]로 반환합니다."""
+        with self._cond:
+            spans = []
+            for chunk_offset, chunk in self._chunks:
+                if chunk_offset + len(chunk) <= offset:
+                    continue
+                if chunk_offset < offset:
+                    chunk, chunk_offset = chunk[offset - chunk_offset:], offset
+                if spans and spans[-1][0] + len(spans[-1][1]) == chunk_offset:
+                    spans[-1][1].extend(chunk)
+                else:
+                    spans.append((chunk_offset, bytearray(chunk)))
+            return [(span_offset, bytes(data)) for span_offset, data in spans]
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
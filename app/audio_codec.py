@@ -0,0 +1,150 @@
+# app/audio_codec.py
+
+import io
+import os
+import json
+import wave
+import bisect
+
+try:
+    import soundfile
+except (ImportError, OSError):  # libsndfile이 없는 환경에서는 WAV로 대체합니다.
+    soundfile = None
+
+SAMPLE_WIDTH = 2  # LINEAR16
+CHANNELS = 1
+
+# 보관하는 오디오 객체의 확장자와 Content-Type
+# flac/wav 아카이브는 구간마다 독립된 FLAC/WAV 스트림을 이어 붙인 것이라, 일반 디코더(soundfile, ffmpeg,
+# 브라우저)는 첫 구간만 재생합니다. 그래서 audio/*로 표시하지 않고 이름에 .segments를 붙여, 사이드카
+# 인덱스(.index.json)로 구간을 잘라 읽어야 하는 객체임을 드러냅니다. raw는 이어 붙여도 하나의 PCM입니다.
+EXTENSIONS = {
+    'flac': 'segments.flac',
+    'wav': 'segments.wav',
+    'raw': 'raw',
+}
+CONTENT_TYPES = {
+    'flac': 'application/octet-stream',
+    'wav': 'application/octet-stream',
+    'raw': 'audio/l16',
+}
+# 구간 하나(인덱스의 offset/length로 잘라 낸 바이트)의 Content-Type
+SEGMENT_CONTENT_TYPES = {
+    'flac': 'audio/flac',
+    'wav': 'audio/wav',
+    'raw': 'audio/l16',
+}
+
+INDEX_VERSION = 1
+
+
+def resolve_archive_format(requested=None):
+    """요청된 보관 형식을 현재 환경에서 사용할 수 있는 형식으로 바꿉니다."""
+    fmt = (requested or os.environ.get('ARCHIVE_FORMAT') or 'flac').lower()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    if fmt == 'flac' and soundfile is None:
+        return 'wav'
+    return fmt
+
+
+def encode_segment(pcm, sample_rate, fmt):
+    """16비트 모노 PCM 한 구간을 독립적으로 디코딩 가능한 바이트로 인코딩합니다."""
+    if len(pcm) % SAMPLE_WIDTH:
+        pcm = pcm[:-(len(pcm) % SAMPLE_WIDTH)]
+    if fmt == 'raw':
+        return bytes(pcm)
+    out = io.BytesIO()
+    if fmt == 'flac':
+        with soundfile.SoundFile(out, 'w', samplerate=sample_rate, channels=CHANNELS,
+                                 subtype='PCM_16', format='FLAC') as f:
+            f.buffer_write(pcm, dtype='int16')
+    elif fmt == 'wav':
+        with wave.open(out, 'wb') as f:
+            f.setnchannels(CHANNELS)
+            f.setsampwidth(SAMPLE_WIDTH)
+            f.setframerate(sample_rate)
+            f.writeframes(pcm)
+    else:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    return out.getvalue()
+
+
+def decode_segment(data, fmt):
+    """encode_segment로 만든 구간을 16비트 PCM 바이트로 되돌립니다."""
+    if fmt == 'raw':
+        return bytes(data)
+    if fmt == 'flac':
+        with soundfile.SoundFile(io.BytesIO(data)) as f:
+            return bytes(f.buffer_read(dtype='int16'))
+    if fmt == 'wav':
+        with wave.open(io.BytesIO(data), 'rb') as f:
+            return f.readframes(f.getnframes())
+    raise ValueError(f"Unsupported archive format: {fmt}")
+
+
+class ArchiveIndex:
+    """경과 시간을 아카이브 안의 바이트 위치로 연결하는 사이드카 인덱스
+
+    아카이브는 일정 길이의 구간을 각각 독립적으로 인코딩해 이어 붙인 형태입니다. (layout: segments)
+    객체 전체는 하나의 오디오 파일이 아니므로, 재생/재전사 도구는 인덱스로 원하는 구간의
+    (offset, length)를 찾아 그 범위만 내려받고 구간마다 segment_content_type으로 디코딩합니다.
+    """
+
+    def __init__(self, fmt, sample_rate, segments=None):
+        self.format = fmt
+        self.sample_rate = sample_rate
+        self.segments = segments or []
+
+    @property
+    def duration(self):
+        if not self.segments:
+            return 0.0
+        last = self.segments[-1]
+        return last['start'] + last['duration']
+
+    @property
+    def size(self):
+        if not self.segments:
+            return 0
+        last = self.segments[-1]
+        return last['offset'] + last['length']
+
+    def add(self, pcm_bytes, encoded_length):
+        """인코딩된 구간 하나를 인덱스 끝에 추가합니다."""
+        self.segments.append({
+            'start': round(self.duration, 6),
+            'duration': round(pcm_bytes / (SAMPLE_WIDTH * CHANNELS) / self.sample_rate, 6),
+            'offset': self.size,
+            'length': encoded_length,
+        })
+
+    def locate(self, seconds):
+        """주어진 경과 시간이 들어 있는 구간을 반환합니다."""
+        if not self.segments:
+            return None
+        starts = [s['start'] for s in self.segments]
+        i = max(0, bisect.bisect_right(starts, seconds) - 1)
+        return self.segments[i]
+
+    def to_dict(self):
+        return {
+            'version': INDEX_VERSION,
+            'layout': 'segments',
+            'format': self.format,
+            'content_type': CONTENT_TYPES[self.format],
+            'segment_content_type': SEGMENT_CONTENT_TYPES[self.format],
+            'sample_rate': self.sample_rate,
+            'channels': CHANNELS,
+            'sample_width': SAMPLE_WIDTH,
+            'duration': round(self.duration, 6),
+            'segments': self.segments,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, data):
+        d = json.loads(data)
+        return cls(d['format'], d['sample_rate'], d['segments'])
@@ -0,0 +1,179 @@
+# app/audio_frames.py
+
+import os
+import struct
+
+# 인식기로 넘기는 요청 하나의 길이(ms). 이 크기로 모아서 워커와 아카이브에 넘깁니다.
+AUDIO_REQUEST_MS = int(os.environ.get('AUDIO_REQUEST_MS', 100))
+# 순서가 바뀐 프레임을 이 개수까지 잡아 두고 기다립니다. 넘으면 빠진 프레임으로 봅니다.
+AUDIO_REORDER_WINDOW = int(os.environ.get('AUDIO_REORDER_WINDOW', 4))
+# 빠진 구간을 침묵으로 채우는 최대 길이(ms). 시간 위치가 어긋나지 않게 합니다.
+AUDIO_GAP_FILL_MS = int(os.environ.get('AUDIO_GAP_FILL_MS', 1000))
+
+FRAME_VERSION = 1
+# 버전(u8), 플래그(u8), 예약(u16), 순번(u32), 세션 시작 기준 시각 ms(u32). 리틀 엔디언.
+FRAME_HEADER = struct.Struct('<BBHII')
+
+
+def parse_frame(data, sample_width=2):
+    """audio_stream 프레임을 (순번, 시각 ms, 오디오 memoryview)로 나눕니다. 형식이 틀리면 ValueError."""
+    view = memoryview(data)
+    if len(view) < FRAME_HEADER.size:
+        raise ValueError(f"Audio frame too short ({len(view)} bytes)")
+    version, _flags, _reserved, seq, timestamp_ms = FRAME_HEADER.unpack_from(view)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version {version}")
+    payload = view[FRAME_HEADER.size:]
+    if len(payload) % sample_width:
+        raise ValueError(f"Audio frame payload is not a whole number of {sample_width}-byte samples")
+    return seq, timestamp_ms, payload
+
+
+def build_frame(seq, timestamp_ms, pcm, flags=0):
+    """parse_frame의 반대입니다. (테스트와 벤치마크에서 클라이언트 대신 사용)"""
+    return FRAME_HEADER.pack(FRAME_VERSION, flags, 0, seq & 0xFFFFFFFF, int(timestamp_ms) & 0xFFFFFFFF) + bytes(pcm)
+
+
+class FrameAssembler:
+    """클라이언트가 보낸 오디오를 고정 크기의 인식 요청으로 다시 묶습니다.
+
+    미리 할당한 bytearray에 memoryview로 복사하므로 조각마다 객체를 만들지 않고,
+    요청 하나가 찰 때마다 bytes 하나만 만듭니다. push()는 순번이 붙은 프레임을 받아
+    순서가 바뀐 프레임은 reorder_window 개수까지 기다렸다가 정렬하고, 빠진 프레임은
+    시각 차이만큼 침묵으로 채우며, 늦게 온(이미 지나간) 프레임이나 중복은 버립니다.
+    push_raw()는 헤더 없는 예전 형식의 PCM을 그대로 받고, feed()는 framed 여부에 따라
+    둘 중 하나를 부릅니다.
+    """
+
+    def __init__(self, sample_rate=16000, framed=True, sample_width=2, request_ms=None, reorder_window=None,
+                 gap_fill_ms=None):
+        self.framed = framed
+        self.sample_width = sample_width
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+        request_ms = request_ms or AUDIO_REQUEST_MS
+        self.request_bytes = self._whole_samples(request_ms * self.bytes_per_ms) or sample_width
+        self.reorder_window = AUDIO_REORDER_WINDOW if reorder_window is None else reorder_window
+        gap_fill_ms = AUDIO_GAP_FILL_MS if gap_fill_ms is None else gap_fill_ms
+        self.max_gap_fill_bytes = self._whole_samples(gap_fill_ms * self.bytes_per_ms)
+        self._buf = bytearray(self.request_bytes)
+        self._view = memoryview(self._buf)
+        self._silence = memoryview(bytes(self.request_bytes))
+        self._fill = 0
+        self._held = {}  # seq -> (timestamp_ms, payload)
+        self.expected_seq = None
+        self._next_timestamp = None
+        self.frames = 0
+        self.bytes_in = 0
+        self.requests = 0
+        self.gaps = 0
+        self.missing_frames = 0
+        self.filled_bytes = 0
+        self.reordered = 0
+        self.late = 0
+
+    def _whole_samples(self, size):
+        return int(size) // self.sample_width * self.sample_width
+
+    def feed(self, data):
+        return self.push(data) if self.framed else self.push_raw(data)
+
+    def push(self, data):
+        """프레임 하나를 받아 완성된 인식 요청(bytes) 목록을 반환합니다."""
+        seq, timestamp_ms, payload = parse_frame(data, self.sample_width)
+        self.frames += 1
+        self.bytes_in += len(payload)
+        if self.expected_seq is None:
+            self.expected_seq = seq
+        if seq < self.expected_seq or seq in self._held:
+            self.late += 1
+            return []
+
+        out = []
+        if seq == self.expected_seq:
+            self._accept(seq, timestamp_ms, payload, out)
+        else:
+            # 아직 앞 프레임이 오지 않았습니다. 복사해 두고 잠시 기다립니다.
+            self._held[seq] = (timestamp_ms, bytes(payload))
+            if len(self._held) > self.reorder_window:
+                self._skip_to(min(self._held), out)
+        self._drain_held(out)
+        return out
+
+    def push_raw(self, data):
+        """헤더 없는 PCM 조각을 받아 완성된 인식 요청 목록을 반환합니다."""
+        payload = memoryview(data)
+        self.frames += 1
+        self.bytes_in += len(payload)
+        out = []
+        self._write(payload, out)
+        return out
+
+    def flush(self):
+        """기다리던 프레임과 덜 찬 마지막 요청까지 모두 내보냅니다. (세션 종료 시)"""
+        out = []
+        while self._held:
+            self._skip_to(min(self._held), out)
+            self._drain_held(out)
+        if self._fill:
+            out.append(bytes(self._view[:self._fill]))
+            self._fill = 0
+            self.requests += 1
+        return out
+
+    def _accept(self, seq, timestamp_ms, payload, out):
+        if self._next_timestamp is not None and self.expected_seq != seq:
+            self._fill_gap(timestamp_ms, out)
+        self._write(payload, out)
+        self.expected_seq = seq + 1
+        self._next_timestamp = timestamp_ms + len(payload) / self.bytes_per_ms
+
+    def _drain_held(self, out):
+        while self.expected_seq in self._held:
+            seq = self.expected_seq
+            timestamp_ms, payload = self._held.pop(seq)
+            self.reordered += 1
+            self._accept(seq, timestamp_ms, memoryview(payload), out)
+
+    def _skip_to(self, seq, out):
+        """expected_seq부터 seq 앞까지의 프레임은 오지 않은 것으로 봅니다."""
+        self.gaps += 1
+        self.missing_frames += seq - self.expected_seq
+        timestamp_ms, payload = self._held.pop(seq)
+        self._fill_gap(timestamp_ms, out)
+        self.expected_seq = seq
+        self._accept(seq, timestamp_ms, memoryview(payload), out)
+
+    def _fill_gap(self, timestamp_ms, out):
+        if self._next_timestamp is None:
+            return
+        gap = self._whole_samples((timestamp_ms - self._next_timestamp) * self.bytes_per_ms)
+        gap = min(max(gap, 0), self.max_gap_fill_bytes)
+        self.filled_bytes += gap
+        while gap > 0:
+            take = min(gap, self.request_bytes)
+            self._write(self._silence[:take], out)
+            gap -= take
+
+    def _write(self, payload, out):
+        pos, size = 0, len(payload)
+        while pos < size:
+            take = min(self.request_bytes - self._fill, size - pos)
+            self._view[self._fill:self._fill + take] = payload[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.request_bytes:
+                out.append(bytes(self._buf))
+                self._fill = 0
+                self.requests += 1
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'requests': self.requests,
+            'bytes_in': self.bytes_in,
+            'gaps': self.gaps,
+            'missing_frames': self.missing_frames,
+            'filled_ms': round(self.filled_bytes / self.bytes_per_ms, 1),
+            'reordered': self.reordered,
+            'late': self.late,
+        }
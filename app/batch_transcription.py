@@ -0,0 +1,406 @@
+# app/batch_transcription.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from google.api_core import exceptions
+
+from .audio_codec import ArchiveIndex, decode_segment, SAMPLE_WIDTH
+from .cache import get_meeting
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 recognize 요청에 보내는 오디오 길이(초). 동기 인식의 한도는 60초입니다.
+BATCH_SEGMENT_SECONDS = float(os.environ.get('BATCH_SEGMENT_SECONDS', 50))
+# 이웃한 구간이 겹치는 길이(초). 경계에 걸린 단어가 어느 한쪽에서는 온전히 들리도록 합니다.
+BATCH_SEGMENT_OVERLAP = float(os.environ.get('BATCH_SEGMENT_OVERLAP', 2))
+# 프로세스 전체에서 동시에 진행하는 recognize 요청 수
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 8))
+# 동시에 처리하는 Pub/Sub 메시지(미팅) 수. 구독자 흐름 제어에 사용합니다.
+BATCH_MAX_MESSAGES = int(os.environ.get('BATCH_MAX_MESSAGES', 2))
+# 구간 하나의 인식을 다시 시도하는 횟수
+BATCH_SEGMENT_RETRIES = int(os.environ.get('BATCH_SEGMENT_RETRIES', 2))
+# 이 횟수만큼 전달된 메시지는 더 재시도하지 않고 실패 결과를 발행한 뒤 ack합니다.
+BATCH_MAX_DELIVERY_ATTEMPTS = int(os.environ.get('BATCH_MAX_DELIVERY_ATTEMPTS', 5))
+# 단어 사이가 이보다 길게 비면 대화록 줄을 나눕니다.
+BATCH_LINE_GAP = float(os.environ.get('BATCH_LINE_GAP', 0.8))
+BATCH_LINE_MAX_WORDS = int(os.environ.get('BATCH_LINE_MAX_WORDS', 40))
+# Firestore 배치 하나에 담는 쓰기 수 (Firestore 제한은 500)
+BATCH_WRITE_SIZE = min(500, int(os.environ.get('BATCH_WRITE_SIZE', 400)))
+# 배치 전사 결과를 쓰는 컬렉션. 실시간 대화록(transcripts)과 나눠 두어야 다시 전사한 미팅의
+# 발화가 회의 화면, 기록, 검색, AI 맥락에 두 번씩 나타나지 않습니다.
+BATCH_TRANSCRIPT_COLLECTION = os.environ.get('BATCH_TRANSCRIPT_COLLECTION', 'batch_transcripts')
+
+MESSAGE_VERSION = 1
+
+# 잠시 뒤 다시 시도하면 성공할 수 있는 인식 오류
+_RETRYABLE_ERRORS = (exceptions.ServiceUnavailable, exceptions.DeadlineExceeded, exceptions.InternalServerError,
+                     exceptions.ResourceExhausted)
+# 메시지를 다시 전달받으면 성공할 수 있는 오류. 그 밖의 오류(잘못된 인자, 권한, 손상된 녹음 등)는
+# 몇 번을 다시 받아도 같으므로 바로 실패 결과를 발행하고 ack합니다.
+_TRANSIENT_ERRORS = _RETRYABLE_ERRORS + (exceptions.ServerError, exceptions.TooManyRequests, exceptions.Aborted,
+                                         exceptions.RetryError, OSError)
+
+SEGMENT_SECONDS = metrics.histogram('batch_segment_recognize_seconds', 'Duration of one batch recognize request')
+JOB_SECONDS = metrics.histogram('batch_job_seconds', 'Duration of one batch transcription message',
+                                buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0))
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+TranscriptionRequest = namedtuple('TranscriptionRequest', 'meeting_id sid language request_id')
+Word = namedtuple('Word', 'text start end')
+
+
+class InvalidMessage(ValueError):
+    """형식이 잘못된 요청 메시지. 다시 전달해도 성공할 수 없으므로 ack하고 버립니다."""
+
+
+def parse_request(data):
+    """전사 요청 메시지(JSON)를 검사해 TranscriptionRequest로 바꿉니다.
+
+    {"version": 1, "meeting_id": "...", "sid": "...", "language": "ko-KR", "request_id": "..."}
+    meeting_id만 필수이고, sid를 주면 그 세션의 녹음만 전사합니다.
+    """
+    try:
+        payload = json.loads(data.decode('utf-8') if isinstance(data, bytes) else data)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise InvalidMessage(f"Message is not JSON: {e}")
+    if not isinstance(payload, dict):
+        raise InvalidMessage('Message must be a JSON object')
+    version = payload.get('version', MESSAGE_VERSION)
+    if version != MESSAGE_VERSION:
+        raise InvalidMessage(f"Unsupported message version: {version}")
+    meeting_id = payload.get('meeting_id')
+    if not isinstance(meeting_id, str) or not meeting_id:
+        raise InvalidMessage('meeting_id is required')
+    for field in ('sid', 'language', 'request_id'):
+        if payload.get(field) is not None and not isinstance(payload[field], str):
+            raise InvalidMessage(f"{field} must be a string")
+    return TranscriptionRequest(meeting_id, payload.get('sid'), payload.get('language'), payload.get('request_id'))
+
+
+def result_message(event, request, **fields):
+    """결과 토픽에 발행하는 메시지(JSON 바이트)와 속성을 만듭니다."""
+    payload = dict(version=MESSAGE_VERSION, event=event, meeting_id=request.meeting_id,
+                   request_id=request.request_id, sid=request.sid, **fields)
+    attributes = {'event': event, 'meeting_id': request.meeting_id}
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8'), attributes
+
+
+def plan_segments(duration, segment_seconds=None, overlap=None):
+    """녹음을 서로 overlap초씩 겹치는 (시작, 끝) 구간들로 나눕니다."""
+    segment_seconds = segment_seconds or BATCH_SEGMENT_SECONDS
+    overlap = BATCH_SEGMENT_OVERLAP if overlap is None else overlap
+    if overlap >= segment_seconds:
+        raise ValueError('overlap must be shorter than the segment')
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + segment_seconds)
+        segments.append((round(start, 6), round(end, 6)))
+        if end >= duration:
+            break
+        start = end - overlap
+    return segments
+
+
+def merge_segments(segments):
+    """겹치는 구간들의 단어를 이어 붙이며 겹친 부분의 중복을 없앱니다.
+
+    segments는 (시작, 끝, 단어 목록)을 시간 순으로 담습니다. 겹친 부분의 가운데를
+    경계로 앞 구간에서는 가운데 전에, 뒤 구간에서는 가운데 이후에 걸친 단어만 씁니다.
+    (구간 가장자리에서 잘린 단어는 경계에서 먼 쪽 구간에서 온전히 인식됩니다.)
+    시각이 조금 달라 양쪽에 모두 남은 같은 단어는 한 번만 씁니다.
+    """
+    merged = []
+    for i, (start, end, words) in enumerate(segments):
+        lower = None if i == 0 else (start + segments[i - 1][1]) / 2
+        upper = None if i == len(segments) - 1 else (segments[i + 1][0] + end) / 2
+        for word in words:
+            middle = (word.start + word.end) / 2
+            if (lower is not None and middle < lower) or (upper is not None and middle >= upper):
+                continue
+            if merged and word.text == merged[-1].text and word.start < merged[-1].end:
+                continue
+            merged.append(word)
+    return merged
+
+
+def group_lines(words, gap=None, max_words=None):
+    """단어들을 말이 끊긴 곳(gap초 이상)에서 나눠 (텍스트, 시작, 끝) 줄로 묶습니다."""
+    gap = BATCH_LINE_GAP if gap is None else gap
+    max_words = max_words or BATCH_LINE_MAX_WORDS
+    lines = []
+    current = []
+    for word in words:
+        if current and (word.start - current[-1].end > gap or len(current) >= max_words):
+            lines.append((' '.join(w.text for w in current), current[0].start, current[-1].end))
+            current = []
+        current.append(word)
+    if current:
+        lines.append((' '.join(w.text for w in current), current[0].start, current[-1].end))
+    return lines
+
+
+class Recording:
+    """버킷에 보관된 세션 녹음 하나 (오디오 + 사이드카 인덱스)"""
+
+    def __init__(self, bucket, blob_name, index):
+        self.bucket = bucket
+        self.blob_name = blob_name
+        self.index = index
+        self.started_at = self._parse_started_at(blob_name)
+
+    @staticmethod
+    def _parse_started_at(blob_name):
+        # {meeting_id}/{sid}_{YYYYmmdd-HHMMSS}.segments.{format} (예전 녹음은 .{format})
+        stem = blob_name.rsplit('/', 1)[-1].split('.', 1)[0]
+        try:
+            started = datetime.datetime.strptime(stem.rsplit('_', 1)[-1], '%Y%m%d-%H%M%S')
+        except ValueError:
+            return None
+        return started.replace(tzinfo=datetime.timezone.utc)
+
+    @property
+    def sid(self):
+        return self.blob_name.rsplit('/', 1)[-1].rsplit('_', 1)[0]
+
+    @property
+    def duration(self):
+        return self.index.duration
+
+    def read_pcm(self, start, end):
+        """start~end초의 PCM을 돌려줍니다. 인덱스로 찾은 바이트 범위만 한 번에 내려받습니다."""
+        covering = [segment for segment in self.index.segments
+                    if segment['start'] < end and segment['start'] + segment['duration'] > start]
+        if not covering:
+            return b''
+        base = covering[0]['offset']
+        last = covering[-1]
+        data = self.bucket.blob(self.blob_name).download_as_bytes(start=base, end=last['offset'] + last['length'] - 1)
+        pcm = b''.join(decode_segment(data[s['offset'] - base:s['offset'] - base + s['length']], self.index.format)
+                       for s in covering)
+        rate = self.index.sample_rate
+        skip = int(round((start - covering[0]['start']) * rate)) * SAMPLE_WIDTH
+        length = int(round((end - start) * rate)) * SAMPLE_WIDTH
+        return pcm[skip:skip + length]
+
+
+def list_recordings(bucket, meeting_id, sid=None):
+    """미팅의 녹음들을 인덱스와 함께 시간 순으로 반환합니다. (인덱스가 없는 예전 녹음은 건너뜁니다.)"""
+    names = {blob.name for blob in bucket.list_blobs(prefix=f"{meeting_id}/")}
+    recordings = []
+    for name in sorted(names):
+        if not name.endswith('.index.json'):
+            continue
+        audio = None
+        stem = name[:-len('.index.json')]
+        for candidate in names:
+            if candidate.startswith(stem + '.') and candidate != name:
+                audio = candidate
+        if audio is None:
+            continue
+        index = ArchiveIndex.from_json(bucket.blob(name).download_as_bytes())
+        recording = Recording(bucket, audio, index)
+        if sid is None or recording.sid == sid:
+            recordings.append(recording)
+    return sorted(recordings, key=lambda r: (r.started_at or _EPOCH, r.blob_name))
+
+
+class BatchTranscriber:
+    """보관된 미팅 녹음을 겹치는 구간으로 나눠 병렬로 전사하고 대화록을 배치로 저장합니다.
+
+    Pub/Sub 구독 콜백으로 handle_message를 넘깁니다. 구간 인식은 프로세스 전체가 나눠 쓰는
+    스레드 풀(concurrency개)에서 돌기 때문에, 흐름 제어로 동시에 받는 메시지 수를 줄여도
+    긴 녹음 하나는 여러 요청으로 나뉘어 동시에 인식됩니다. 대화록 문서 ID는 녹음과 시작
+    위치로 정해지므로 같은 메시지가 다시 전달되어도 중복으로 쌓이지 않습니다.
+    """
+
+    def __init__(self, db, bucket, speech_pool, publish=None, concurrency=None, segment_seconds=None, overlap=None,
+                 retry_backoff=0.5):
+        self.db = db
+        self.bucket = bucket
+        self.speech_pool = speech_pool
+        # publish(data, **attributes): 결과 토픽으로 보냅니다. (없으면 발행하지 않음)
+        self.publish = publish
+        self.segment_seconds = segment_seconds or BATCH_SEGMENT_SECONDS
+        self.overlap = BATCH_SEGMENT_OVERLAP if overlap is None else overlap
+        self.retry_backoff = retry_backoff
+        self._executor = ThreadPoolExecutor(max_workers=concurrency or BATCH_CONCURRENCY,
+                                            thread_name_prefix='batch-recognize')
+        self._lock = threading.Lock()
+        self._stats = {'acked': 0, 'nacked': 0, 'invalid': 0, 'failed': 0,
+                       'recordings': 0, 'segments': 0, 'lines': 0, 'audio_seconds': 0.0}
+
+    def _count(self, **amounts):
+        with self._lock:
+            for key, amount in amounts.items():
+                self._stats[key] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, audio_seconds=round(self._stats['audio_seconds'], 3))
+
+    def handle_message(self, message):
+        """요청 하나를 처리하고 ack/nack합니다.
+
+        형식이 잘못된 메시지는 ack하고 버립니다. 일시적인 오류는 nack해 다시 전달받고,
+        BATCH_MAX_DELIVERY_ATTEMPTS번째 전달에서도 실패하면 실패 결과를 발행하고 ack합니다.
+        다시 받아도 성공할 수 없는 오류는 첫 전달에서 바로 실패 결과를 발행하고 ack합니다.
+        delivery_attempt는 구독에 데드 레터 정책이 있을 때만 채워지므로, 정책이 없으면
+        일시적인 오류는 성공할 때까지 다시 전달받습니다.
+        """
+        started = time.monotonic()
+        request = None
+        try:
+            request = parse_request(message.data)
+            summary = self.transcribe(request)
+            self._publish('transcription_completed', request, **summary)
+        except InvalidMessage as e:
+            logger.error(f"Dropping transcription message {message.message_id}: {e}")
+            if request is not None:
+                self._publish('transcription_failed', request, error=str(e))
+            self._count(invalid=1)
+            message.ack()
+            return
+        except Exception as e:
+            attempt = getattr(message, 'delivery_attempt', None) or 1
+            transient = isinstance(e, _TRANSIENT_ERRORS)
+            if transient and attempt < BATCH_MAX_DELIVERY_ATTEMPTS:
+                logger.warning(f"Transcription of {request.meeting_id} failed (attempt {attempt}), "
+                               f"will be redelivered: {e}", exc_info=True)
+                self._count(nacked=1)
+                message.nack()
+                return
+            if transient:
+                logger.error(f"Giving up on transcription of {request.meeting_id} after {attempt} attempts: {e}",
+                             exc_info=True)
+            else:
+                logger.error(f"Transcription of {request.meeting_id} failed permanently: {e}", exc_info=True)
+            try:
+                self._publish('transcription_failed', request, error=str(e), attempts=attempt)
+            except Exception:
+                logger.error('Could not publish the failure result', exc_info=True)
+            self._count(failed=1)
+            message.ack()
+            return
+        JOB_SECONDS.observe(time.monotonic() - started)
+        self._count(acked=1)
+        message.ack()
+
+    def _publish(self, event, request, **fields):
+        if self.publish is not None:
+            data, attributes = result_message(event, request, **fields)
+            self.publish(data, **attributes)
+
+    def transcribe(self, request):
+        """미팅(또는 세션 하나)의 녹음을 모두 전사해 저장하고 요약을 반환합니다."""
+        language = request.language
+        if language is None:
+            meeting = get_meeting(self.db, request.meeting_id)
+            if meeting is None:
+                raise InvalidMessage(f"Meeting {request.meeting_id} not found")
+            language = meeting.get('language', 'en-US')
+
+        recordings = list_recordings(self.bucket, request.meeting_id, request.sid)
+        # 모든 녹음의 모든 구간을 먼저 풀에 넣어 동시에 인식합니다.
+        jobs = []
+        futures = []
+        for recording in recordings:
+            plan = plan_segments(recording.duration, self.segment_seconds, self.overlap)
+            pending = [self._executor.submit(self._recognize, recording, start, end, language) for start, end in plan]
+            jobs.append((recording, plan, pending))
+            futures.extend(pending)
+
+        lines_written = 0
+        try:
+            for recording, plan, pending in jobs:
+                segments = [(start, end, future.result()) for (start, end), future in zip(plan, pending)]
+                lines = group_lines(merge_segments(segments))
+                lines_written += self._write_lines(request, recording, lines)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+        audio_seconds = sum(recording.duration for recording in recordings)
+        self._count(recordings=len(recordings), segments=len(futures), lines=lines_written,
+                    audio_seconds=audio_seconds)
+        logger.info(f"Transcribed {len(recordings)} recordings ({audio_seconds:.0f}s, {len(futures)} segments) "
+                    f"of meeting {request.meeting_id} into {lines_written} lines")
+        return {'recordings': len(recordings), 'segments': len(futures), 'lines': lines_written,
+                'audio_seconds': round(audio_seconds, 3)}
+
+    def _recognize(self, recording, start, end, language):
+        """녹음의 start~end초를 인식해 녹음 기준 시각의 단어 목록을 반환합니다."""
+        pcm = recording.read_pcm(start, end)
+        if not pcm:
+            return []
+        from google.cloud import speech
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=recording.index.sample_rate,
+            language_code=language,
+            enable_word_time_offsets=True,
+            enable_automatic_punctuation=True,
+        )
+        audio = speech.RecognitionAudio(content=pcm)
+        for attempt in range(BATCH_SEGMENT_RETRIES + 1):
+            started = time.monotonic()
+            try:
+                with self.speech_pool.lease() as client:
+                    response = client.recognize(config=config, audio=audio)
+                break
+            except _RETRYABLE_ERRORS as e:
+                if attempt == BATCH_SEGMENT_RETRIES:
+                    raise
+                logger.warning(f"Recognize failed for {recording.blob_name} at {start:.0f}s ({e}), retrying")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+        SEGMENT_SECONDS.observe(time.monotonic() - started)
+
+        words = []
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            for info in result.alternatives[0].words:
+                words.append(Word(info.word, start + info.start_time.total_seconds(),
+                                  start + info.end_time.total_seconds()))
+        return words
+
+    def _write_lines(self, request, recording, lines):
+        """대화록 줄들을 BATCH_TRANSCRIPT_COLLECTION에 BATCH_WRITE_SIZE개씩 배치로 씁니다."""
+        key = hashlib.sha1(recording.blob_name.encode('utf-8')).hexdigest()[:12]
+        base_time = recording.started_at or datetime.datetime.now(datetime.timezone.utc)
+        docs = []
+        for text, start, end in lines:
+            doc_id = f"batch-{key}-{int(round(start * 1000)):09d}"
+            docs.append((doc_id, {
+                'id': doc_id,
+                'meeting_id': request.meeting_id,
+                'sid': recording.sid,
+                'speaker': 'Customer',
+                'text': text,
+                'start': round(start, 3),
+                'end': round(end, 3),
+                'timestamp': base_time + datetime.timedelta(seconds=start),
+                'source': 'batch',
+                'recording': recording.blob_name,
+            }))
+        collection = self.db.collection(BATCH_TRANSCRIPT_COLLECTION)
+        for i in range(0, len(docs), BATCH_WRITE_SIZE):
+            batch = self.db.batch()
+            for doc_id, data in docs[i:i + BATCH_WRITE_SIZE]:
+                batch.set(collection.document(doc_id), data)
+            batch.commit()
+        return len(docs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
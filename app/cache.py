@@ -0,0 +1,174 @@
+# app/cache.py
+
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+# 답변 스타일은 거의 바뀌지 않고, 미팅의 언어는 생성 후 바뀌지 않습니다.
+STYLE_CACHE_TTL = float(os.environ.get('STYLE_CACHE_TTL', 300))
+MEETING_CACHE_TTL = float(os.environ.get('MEETING_CACHE_TTL', 3600))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """항목마다 만료 시간을 두는 LRU 캐시"""
+
+    def __init__(self, maxsize=CACHE_MAX_ENTRIES, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """캐시에 없으면 loader()로 읽어 저장합니다. None은 캐시하지 않습니다."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """key 하나를, key가 없으면 전체를 무효화합니다."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        """만료되지 않은 key가 있는지 확인합니다. (적중/실패 횟수와 LRU 순서는 바꾸지 않음)"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[0] > self._clock()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+style_cache = TTLCache(ttl=STYLE_CACHE_TTL)
+meeting_cache = TTLCache(ttl=MEETING_CACHE_TTL)
+
+_ALL_STYLES = '__all__'
+
+
+def _load_document(db, collection, doc_id):
+    doc = db.collection(collection).document(doc_id).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def get_meeting(db, meeting_id):
+    """미팅 문서를 캐시를 거쳐 읽습니다. 없으면 None을 반환합니다.
+
+    캐시한 문서를 호출한 쪽이 바꿔도 다른 요청에 퍼지지 않도록 복사본을 반환합니다.
+    """
+    if not meeting_id:
+        return None
+    return copy.deepcopy(meeting_cache.get_or_load(meeting_id, lambda: _load_document(db, 'meetings', meeting_id)))
+
+
+def get_style(db, style_id):
+    """답변 스타일 문서를 캐시를 거쳐 읽습니다. 없으면 None을 반환합니다. (복사본)"""
+    if not style_id:
+        return None
+    return copy.deepcopy(style_cache.get_or_load(style_id, lambda: _load_document(db, 'answer_styles', style_id)))
+
+
+def list_styles(db):
+    """모든 답변 스타일을 캐시를 거쳐 읽습니다. (복사본)"""
+    styles = style_cache.get_or_load(
+        _ALL_STYLES, lambda: [doc.to_dict() for doc in db.collection('answer_styles').stream()]
+    )
+    return copy.deepcopy(styles)
+
+
+# 무효화를 다른 프로세스에 알리는 함수들. 확장 모드면 cluster가 Redis로 발행하는 함수를 등록합니다.
+# (등록한 함수가 없으면 다른 프로세스의 캐시는 STYLE_CACHE_TTL/MEETING_CACHE_TTL 동안 이전 값을 씁니다.)
+_invalidation_listeners = []
+
+
+def on_invalidate(listener):
+    """invalidate_styles()/invalidate_meeting()이 불릴 때마다 listener(cache, key)를 부릅니다."""
+    _invalidation_listeners.append(listener)
+
+
+def off_invalidate(listener):
+    if listener in _invalidation_listeners:
+        _invalidation_listeners.remove(listener)
+
+
+def _notify(cache, key):
+    for listener in list(_invalidation_listeners):
+        listener(cache, key)
+
+
+def invalidate_styles(style_id=None, notify=True):
+    """스타일이 생성/수정/삭제되면 호출합니다."""
+    style_cache.invalidate(_ALL_STYLES)
+    if style_id is not None:
+        style_cache.invalidate(style_id)
+    if notify:
+        _notify('styles', style_id)
+
+
+def invalidate_meeting(meeting_id, notify=True):
+    meeting_cache.invalidate(meeting_id)
+    if notify:
+        _notify('meetings', meeting_id)
+
+
+def apply_invalidation(cache, key):
+    """다른 프로세스에서 알려 온 무효화를 이 프로세스의 캐시에만 적용합니다. (다시 알리지 않음)"""
+    if cache == 'styles':
+        invalidate_styles(key, notify=False)
+    elif cache == 'meetings':
+        invalidate_meeting(key, notify=False)
+
+
+def clear_caches():
+    """모든 캐시를 비웁니다. (무효화 알림을 놓쳤을 수 있을 때)"""
+    style_cache.invalidate()
+    meeting_cache.invalidate()
+
+
+def cache_stats():
+    return {'answer_styles': style_cache.stats(), 'meetings': meeting_cache.stats()}
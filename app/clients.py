@@ -0,0 +1,326 @@
+# app/clients.py
+
+import os
+import time
+import hashlib
+import logging
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# 채널(gRPC 연결) 하나에 동시에 여는 인식 스트림 수 상한. 모든 채널이 가득 차면 새 채널을 엽니다.
+# (gRPC 서버의 HTTP/2 동시 스트림 한도가 보통 100입니다.)
+SPEECH_STREAMS_PER_CHANNEL = int(os.environ.get('SPEECH_STREAMS_PER_CHANNEL', 100))
+SPEECH_MAX_CHANNELS = int(os.environ.get('SPEECH_MAX_CHANNELS', 4))
+# 모든 채널이 가득 찼을 때 빈자리를 기다리는 최대 시간(초)
+CLIENT_ACQUIRE_TIMEOUT = float(os.environ.get('CLIENT_ACQUIRE_TIMEOUT', 10))
+# 연결 오류가 연달아 이 횟수만큼 나면 그 클라이언트를 폐기하고 새로 만듭니다.
+CLIENT_MAX_FAILURES = int(os.environ.get('CLIENT_MAX_FAILURES', 3))
+# 이 시간(초)이 지난 클라이언트는 새로 빌려주지 않고, 쓰던 곳이 모두 반납하면 닫습니다.
+CLIENT_MAX_AGE = float(os.environ.get('CLIENT_MAX_AGE', 3600))
+
+
+class PoolExhausted(RuntimeError):
+    """모든 클라이언트가 동시 사용 한도에 닿아 제때 빌리지 못했습니다."""
+
+
+def _close_client(client):
+    close = getattr(client, 'close', None) or getattr(getattr(client, 'transport', None), 'close', None)
+    if close is not None:
+        with contextlib.suppress(Exception):
+            close()
+
+
+class _Entry:
+    __slots__ = ('client', 'leases', 'failures', 'created_at', 'retired', 'shared')
+
+    def __init__(self, client):
+        self.client = client
+        self.leases = 0
+        self.failures = 0
+        self.created_at = time.monotonic()
+        self.retired = False
+        # get()으로 사용 수를 세지 않고 내준 적이 있는지 여부
+        self.shared = False
+
+
+class Lease:
+    """pool.acquire()가 빌려준 클라이언트. 다 쓰면 pool.release(lease)로 반납합니다."""
+
+    __slots__ = ('client', '_entry')
+
+    def __init__(self, entry):
+        self.client = entry.client
+        self._entry = entry
+
+
+class ClientPool:
+    """같은 종류의 클라이언트를 프로세스 안에서 나눠 쓰는 풀
+
+    클라이언트는 처음 쓸 때 factory()로 만들고(채널 생성, TLS 연결, 인증 정보 로드는 이때 한 번)
+    이후로는 재사용합니다. max_leases를 주면 클라이언트 하나를 동시에 그만큼까지만 빌려주고,
+    모두 가득 차면 max_clients개까지 새로 만들며, 그 뒤에는 반납을 기다립니다.
+    연결 오류로 반납된 횟수가 max_failures에 닿거나 max_age가 지난 클라이언트는 더 빌려주지
+    않고, 빌려 간 곳이 모두 반납하면 닫습니다. (get()으로 내준 클라이언트는 아직 쓰는 곳이 있을 수
+    있으므로 닫지 않고 풀에서 빼기만 합니다. 마지막 참조가 사라지면 GC가 정리합니다.) fork한 자식 프로세스에서는 부모의 클라이언트를
+    쓰지 않고 새로 만듭니다.
+    """
+
+    def __init__(self, name, factory, max_leases=None, max_clients=1, max_failures=None, max_age=None,
+                 acquire_timeout=None, clock=time.monotonic):
+        self.name = name
+        self.factory = factory
+        self.max_leases = max_leases
+        self.max_clients = max_clients
+        self.max_failures = max_failures or CLIENT_MAX_FAILURES
+        self.max_age = CLIENT_MAX_AGE if max_age is None else max_age
+        self.acquire_timeout = CLIENT_ACQUIRE_TIMEOUT if acquire_timeout is None else acquire_timeout
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._entries = []
+        self._creating = 0
+        self._pid = os.getpid()
+        self.created = 0
+        self.retired = 0
+        self.acquires = 0
+        self.waits = 0
+        self.create_seconds = 0.0
+
+    def _healthy(self, entry):
+        if entry.retired:
+            return False
+        if self.max_age and self._clock() - entry.created_at >= self.max_age:
+            self._retire(entry, 'max age')
+            return False
+        return True
+
+    def _retire(self, entry, reason):
+        # self._cond를 잡은 상태에서 호출됩니다.
+        if not entry.retired:
+            entry.retired = True
+            self.retired += 1
+            logger.info(f"Retiring {self.name} client ({reason})")
+        if entry.leases == 0 and entry in self._entries:
+            self._entries.remove(entry)
+            if not entry.shared:
+                _close_client(entry.client)
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # 부모 프로세스의 채널은 자식에서 쓸 수 없으므로 닫지 않고 버립니다.
+            self._entries = []
+            self._creating = 0
+            self._pid = os.getpid()
+
+    def reset(self):
+        """fork 뒤 자식 프로세스에서 호출됩니다."""
+        with self._cond:
+            self._pid = None
+            self._check_fork()
+
+    def _create(self):
+        started = time.monotonic()
+        client = self.factory()
+        elapsed = time.monotonic() - started
+        logger.info(f"Created {self.name} client in {elapsed * 1000:.0f} ms")
+        entry = _Entry(client)
+        entry.created_at = self._clock()
+        return entry, elapsed
+
+    def acquire(self, timeout=None):
+        """클라이언트 하나를 빌립니다. 자리가 날 때까지 timeout초 넘게 기다리면 PoolExhausted."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._check_fork()
+            while True:
+                live = [e for e in list(self._entries) if self._healthy(e)]
+                free = [e for e in live if self.max_leases is None or e.leases < self.max_leases]
+                if free:
+                    entry = min(free, key=lambda e: e.leases)
+                    entry.leases += 1
+                    self.acquires += 1
+                    return Lease(entry)
+                # 이미 만들고 있는 클라이언트가 있으면 그것을 기다립니다. (동시에 몰려도 하나씩 만듦)
+                if not self._creating and len(live) < self.max_clients:
+                    self._creating += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f"All {self.name} clients are at {self.max_leases} concurrent uses")
+                self.waits += 1
+                self._cond.wait(remaining)
+
+        # 클라이언트를 만드는 동안(수백 ms) 다른 호출이 기다리지 않도록 락 밖에서 만듭니다.
+        try:
+            entry, elapsed = self._create()
+        except Exception:
+            with self._cond:
+                self._creating -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._creating -= 1
+            entry.leases = 1
+            self._entries.append(entry)
+            self.created += 1
+            self.acquires += 1
+            self.create_seconds += elapsed
+            self._cond.notify_all()
+        return Lease(entry)
+
+    def release(self, lease, failed=False):
+        """빌린 클라이언트를 반납합니다. failed는 연결(채널) 오류로 실패했는지 여부입니다."""
+        entry = lease._entry
+        with self._cond:
+            if entry not in self._entries:
+                return
+            entry.leases -= 1
+            if failed:
+                entry.failures += 1
+                if entry.failures >= self.max_failures:
+                    self._retire(entry, f"{entry.failures} consecutive failures")
+            else:
+                entry.failures = 0
+            if entry.retired:
+                self._retire(entry, 'retired')
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def lease(self):
+        """with pool.lease() as client: ... (예외가 나면 실패로 반납합니다.)"""
+        lease = self.acquire()
+        try:
+            yield lease.client
+        except Exception:
+            self.release(lease, failed=True)
+            raise
+        self.release(lease)
+
+    def get(self):
+        """사용 수를 세지 않는 요청/응답형 클라이언트(Storage, OpenAI)를 위한 공유 클라이언트"""
+        lease = self.acquire()
+        # 반납한 뒤에도 호출한 곳이 계속 쓰므로(업로드, 스트리밍 응답 등) 이 클라이언트는 닫지 않습니다.
+        lease._entry.shared = True
+        self.release(lease)
+        return lease.client
+
+    def stats(self):
+        with self._cond:
+            return {
+                'clients': len(self._entries),
+                'in_use': sum(e.leases for e in self._entries),
+                'max_leases': self.max_leases,
+                'max_clients': self.max_clients,
+                'created': self.created,
+                'retired': self.retired,
+                'acquires': self.acquires,
+                'waits': self.waits,
+                'create_ms_avg': round(self.create_seconds / self.created * 1000, 1) if self.created else None,
+            }
+
+
+class ClientRegistry:
+    """이름별 클라이언트 풀을 모아 둔 프로세스 전역 레지스트리
+
+    register()로 만드는 방법만 등록해 두고, 풀은 처음 쓰일 때 만듭니다. key를 주면
+    (예: OpenAI API 키) key마다 따로 풀을 둡니다.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, **options):
+        with self._lock:
+            self._factories[name] = (factory, options)
+            for pool_key in [k for k in self._pools if k[0] == name]:
+                del self._pools[pool_key]
+
+    def pool(self, name, *key):
+        pool_key = (name,) + key
+        pool = self._pools.get(pool_key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(pool_key)
+                if pool is None:
+                    factory, options = self._factories[name]
+                    label = name if not key else f"{name}:{hashlib.sha1(repr(key).encode()).hexdigest()[:8]}"
+                    pool = self._pools[pool_key] = ClientPool(label, lambda: factory(*key), **options)
+        return pool
+
+    def get(self, name, *key):
+        return self.pool(name, *key).get()
+
+    def warm(self, name, *key):
+        """클라이언트를 미리 만들어 둡니다. (SDK import와 채널 생성) 걸린 시간(초)을 반환합니다."""
+        started = time.monotonic()
+        self.get(name, *key)
+        return time.monotonic() - started
+
+    def created(self, name, *key):
+        """그 이름의 클라이언트가 이미 만들어져 있는지 여부"""
+        pool = self._pools.get((name,) + key)
+        return pool is not None and pool.created > 0
+
+    def reset(self):
+        for pool in list(self._pools.values()):
+            pool.reset()
+
+    def stats(self):
+        return {pool.name: pool.stats() for pool in list(self._pools.values())}
+
+
+class LazyClient:
+    """처음 속성에 접근할 때 레지스트리에서 클라이언트를 꺼내 쓰는 대리 객체
+
+    모듈 수준에 db = LazyClient('firestore')처럼 두면 import할 때는 SDK를 불러오지 않고,
+    첫 요청이 db.collection(...)을 부를 때 클라이언트를 만듭니다.
+    """
+
+    def __init__(self, name, registry=None):
+        self._name = name
+        self._registry = registry
+
+    def __getattr__(self, attr):
+        registry = self._registry if self._registry is not None else clients
+        return getattr(registry.get(self._name), attr)
+
+    def __repr__(self):
+        return f"<LazyClient {self._name}>"
+
+
+def _firestore_client():
+    from google.cloud import firestore
+    # 특별한 설정 없이 자동으로 인증됩니다.
+    return firestore.Client()
+
+
+def _speech_client():
+    from google.cloud import speech
+    return speech.SpeechClient()
+
+
+def _storage_client():
+    from google.cloud import storage
+    return storage.Client()
+
+
+def _openai_client(api_key):
+    import openai
+    # OPENAI_BASE_URL 환경변수가 있으면 openai 클라이언트가 그 주소를 사용합니다.
+    return openai.OpenAI(api_key=api_key)
+
+
+clients = ClientRegistry()
+# Firestore 클라이언트는 요청/응답형이라 하나를 계속 나눠 씁니다. (오래됐다고 교체하지 않음)
+clients.register('firestore', _firestore_client, max_age=0)
+clients.register('speech', _speech_client, max_leases=SPEECH_STREAMS_PER_CHANNEL, max_clients=SPEECH_MAX_CHANNELS)
+clients.register('storage', _storage_client)
+clients.register('openai', _openai_client)
+
+# gunicorn이 워커를 fork하면 자식은 부모의 gRPC 채널과 HTTP 연결을 버리고 새로 만듭니다.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=clients.reset)
@@ -0,0 +1,192 @@
+# app/context.py
+
+import os
+import math
+import logging
+import threading
+from collections import deque
+
+from .cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트에 넣는 대화 맥락(요약 + 최근 발화)의 최대 토큰 수
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', 1200))
+# 그중 이전 대화 요약에 쓰는 토큰 수. 나머지는 최근 발화를 그대로 넣는 데 씁니다.
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get('CONTEXT_SUMMARY_TOKENS', 300))
+# 최근 발화에서 밀려난 발화가 이만큼(토큰) 쌓이면 요약에 합칩니다.
+CONTEXT_FOLD_TOKENS = int(os.environ.get('CONTEXT_FOLD_TOKENS', 200))
+# 이 시간(초) 동안 쓰이지 않은 미팅의 맥락은 메모리에서 지웁니다.
+CONTEXT_IDLE_SECONDS = float(os.environ.get('CONTEXT_IDLE_SECONDS', 3600))
+# 서버가 다시 시작된 뒤 맥락을 처음 만들 때 Firestore에서 읽어 오는 최근 줄 수
+CONTEXT_SEED_LINES = int(os.environ.get('CONTEXT_SEED_LINES', 20))
+# build()가 붙이는 제목과 줄바꿈 몫으로 남겨 두는 토큰 수
+_HEADER_TOKENS = 16
+# tiktoken 인코딩은 불러오는 데 시간이 걸리므로 처음 토큰을 셀 때 불러옵니다. (False: 아직 안 불러옴)
+_ENCODING = False
+
+
+def _encoding():
+    global _ENCODING
+    if _ENCODING is False:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding('cl100k_base')
+        except Exception:  # tiktoken이 없으면 글자 수로 어림합니다.
+            _ENCODING = None
+    return _ENCODING
+
+
+def count_tokens(text):
+    """text의 토큰 수를 셉니다. tiktoken이 없으면 넉넉하게 어림합니다. (영문 4글자, 한글 1글자 = 1토큰)"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars))
+
+
+def count_message_tokens(messages):
+    """Chat Completions 메시지 목록의 프롬프트 토큰 수 (메시지마다 형식 토큰 4개 포함)"""
+    return sum(count_tokens(m.get('content')) + 4 for m in messages) + 2
+
+
+def truncate_tokens(text, limit, keep='head'):
+    """text를 limit 토큰 이하로 자릅니다. keep='tail'이면 뒷부분을 남깁니다."""
+    tokens = count_tokens(text)
+    while tokens > limit and text:
+        size = max(0, min(len(text) - 1, int(len(text) * limit / tokens)))
+        text = text[:size] if keep == 'head' else text[len(text) - size:]
+        tokens = count_tokens(text)
+    return text
+
+
+def extractive_summary(summary, turns, limit):
+    """LLM을 쓸 수 없을 때의 요약: 이전 요약 뒤에 밀려난 발화를 붙이고 최근 쪽을 남깁니다."""
+    text = ' '.join([summary] + [f"{speaker}: {text}" for speaker, text in turns]).strip()
+    return truncate_tokens(text, limit, keep='tail')
+
+
+class MeetingContext:
+    """미팅 하나의 대화 맥락. 최근 발화는 그대로, 그 이전은 요약으로 보관합니다.
+
+    최근 발화가 recent_budget 토큰을 넘으면 오래된 발화부터 밀려나 요약 대기열에 쌓이고,
+    fold()가 (이전 요약 + 새로 밀려난 발화)만으로 요약을 갱신합니다. 전체 대화록을 다시
+    요약하지 않으므로 미팅이 길어져도 요약 비용이 일정하고, build()의 결과는 항상
+    budget 토큰 이하입니다.
+    """
+
+    def __init__(self, meeting_id, budget=None, summary_tokens=None, fold_tokens=None):
+        self.meeting_id = meeting_id
+        self.budget = budget or CONTEXT_TOKEN_BUDGET
+        self.summary_budget = min(summary_tokens or CONTEXT_SUMMARY_TOKENS, self.budget // 2)
+        self.recent_budget = self.budget - self.summary_budget - _HEADER_TOKENS
+        self.fold_tokens = fold_tokens or CONTEXT_FOLD_TOKENS
+        self._lock = threading.Lock()
+        self._recent = deque()  # (speaker, text, tokens)
+        self._recent_tokens = 0
+        self._evicted = []  # 요약에 아직 합치지 않은 (speaker, text)
+        self._evicted_tokens = 0
+        self._folding = False
+        self.summary = ''
+        self.turns = 0
+        self.folds = 0
+
+    def add_turn(self, speaker, text):
+        """발화 하나를 추가합니다. 요약을 갱신할 때가 되면 True를 반환합니다."""
+        if not text:
+            return False
+        # 발화 하나가 최근 예산보다 길면 뒷부분만 남깁니다.
+        line = truncate_tokens(f"{speaker}: {text}", self.recent_budget, keep='tail')
+        # 줄바꿈 몫으로 1토큰을 더 셉니다.
+        tokens = count_tokens(line) + 1
+        with self._lock:
+            self._recent.append((speaker, line, tokens))
+            self._recent_tokens += tokens
+            self.turns += 1
+            while self._recent_tokens > self.recent_budget:
+                old_speaker, old_line, old_tokens = self._recent.popleft()
+                self._recent_tokens -= old_tokens
+                self._evicted.append((old_speaker, old_line.split(': ', 1)[-1]))
+                self._evicted_tokens += old_tokens
+            return self._evicted_tokens >= self.fold_tokens and not self._folding
+
+    def fold(self, summarize=None):
+        """밀려난 발화를 요약에 합칩니다. summarize(이전 요약, 발화 목록, 최대 토큰) -> 새 요약"""
+        with self._lock:
+            if self._folding or not self._evicted:
+                return False
+            self._folding = True
+            turns, summary = list(self._evicted), self.summary
+        try:
+            new_summary = None
+            if summarize is not None:
+                try:
+                    new_summary = summarize(summary, turns, self.summary_budget)
+                except Exception as e:
+                    logger.warning(f"Context summary failed for meeting {self.meeting_id}: {e}")
+            if not new_summary:
+                new_summary = extractive_summary(summary, turns, self.summary_budget)
+            new_summary = truncate_tokens(new_summary, self.summary_budget, keep='tail')
+            with self._lock:
+                self.summary = new_summary
+                # 요약하는 동안 새로 밀려난 발화는 다음 번에 합칩니다.
+                del self._evicted[:len(turns)]
+                self._evicted_tokens = sum(count_tokens(f"{s}: {t}") + 1 for s, t in self._evicted)
+                self.folds += 1
+            return True
+        finally:
+            self._folding = False
+
+    def build(self):
+        """프롬프트에 넣을 맥락 텍스트를 만듭니다. 항상 budget 토큰 이하입니다."""
+        with self._lock:
+            summary = self.summary
+            recent = [line for _, line, _ in self._recent]
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation: {summary}")
+        if recent:
+            parts.append("Recent conversation:\n" + '\n'.join(recent))
+        return '\n\n'.join(parts)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'turns': self.turns,
+                'recent_tokens': self._recent_tokens,
+                'summary_tokens': count_tokens(self.summary),
+                'pending_fold_tokens': self._evicted_tokens,
+                'folds': self.folds,
+            }
+
+
+class ContextStore:
+    """미팅별 MeetingContext를 보관합니다. 오래 쓰이지 않은 미팅은 TTL이 지나면 지워집니다."""
+
+    def __init__(self, ttl=None, maxsize=1024):
+        self._contexts = TTLCache(maxsize=maxsize, ttl=ttl or CONTEXT_IDLE_SECONDS)
+
+    def get(self, meeting_id, seed=None):
+        """미팅의 맥락을 반환합니다. 없으면 seed()가 돌려준 (speaker, text) 목록으로 새로 만듭니다."""
+        def load():
+            context = MeetingContext(meeting_id)
+            for speaker, text in (seed() if seed is not None else []):
+                context.add_turn(speaker, text)
+            return context
+        context = self._contexts.get_or_load(meeting_id, load)
+        # 진행 중인 미팅의 맥락이 TTL로 사라지지 않도록 쓸 때마다 만료 시간을 늘립니다.
+        self._contexts.set(meeting_id, context)
+        return context
+
+    def forget(self, meeting_id):
+        self._contexts.invalidate(meeting_id)
+
+    def __len__(self):
+        return len(self._contexts)
+
+
+meeting_contexts = ContextStore()
@@ -0,0 +1,159 @@
+# app/drain.py
+
+import os
+import json
+import time
+import uuid
+import base64
+import datetime
+import signal
+import logging
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# SIGTERM(Cloud Run 축소, 배포)을 받으면 세션을 넘기고 녹음과 대화록을 저장하는 데 쓰는 최대 시간(초).
+# Cloud Run은 SIGTERM 뒤 10초 안에 종료되지 않으면 강제로 끝냅니다.
+DRAIN_DEADLINE_SECONDS = float(os.environ.get('DRAIN_DEADLINE_SECONDS', 8))
+# 0이면 SIGTERM 처리기를 설치하지 않습니다. (서버의 원래 종료 처리만 사용)
+DRAIN_ON_SIGTERM = os.environ.get('DRAIN_ON_SIGTERM', '1') != '0'
+# 넘긴 세션을 이어받을 수 있는 시간(초)
+HANDOFF_TTL_SECONDS = int(os.environ.get('HANDOFF_TTL_SECONDS', 300))
+# 넘기는 확정되지 않은 오디오의 최대 길이(초). (Firestore 문서 크기 한도 1MiB 안에 들어가도록)
+HANDOFF_MAX_TAIL_SECONDS = float(os.environ.get('HANDOFF_MAX_TAIL_SECONDS', 20))
+HANDOFF_COLLECTION = 'session_handoffs'
+
+
+def encode_state(state):
+    """세션 상태를 JSON 문자열로 만듭니다. 오디오 구간은 base64로 넣습니다."""
+    state = dict(state, tail=[[offset, base64.b64encode(pcm).decode()] for offset, pcm in state['tail']])
+    return json.dumps(state)
+
+
+def decode_state(raw):
+    state = json.loads(raw)
+    state['tail'] = [(offset, base64.b64decode(pcm)) for offset, pcm in state['tail']]
+    return state
+
+
+class HandoffStore:
+    """종료되는 인스턴스가 넘긴 세션 상태를 다른 인스턴스가 토큰으로 찾아갈 수 있게 둡니다.
+
+    확장 모드(cluster가 켜져 있음)면 Redis에 TTL을 걸어 두고, 아니면 Firestore의
+    session_handoffs 컬렉션에 만료 시각(expires_at, Timestamp)과 함께 둡니다. 토큰은 한 번만 쓸 수
+    있습니다. Firestore에서는 expires_at에 TTL 정책을 걸어 가져가지 않은 문서가 지워지게 합니다.
+    (cloudbuild.yaml 참고. TTL 삭제는 늦게 일어날 수 있으므로 take()도 만료 시각을 확인합니다.)
+    """
+
+    def __init__(self, db, cluster=None, ttl=None):
+        self.db = db
+        self.cluster = cluster
+        self.ttl = ttl or HANDOFF_TTL_SECONDS
+        self.saved = 0
+        self.taken = 0
+
+    def _key(self, token):
+        return f"{self.cluster.prefix}:handoff:{token}"
+
+    def save(self, state):
+        """상태를 저장하고 클라이언트에 보낼 토큰을 반환합니다."""
+        token = uuid.uuid4().hex
+        raw = encode_state(state)
+        if self.cluster is not None and self.cluster.enabled:
+            self.cluster.redis.set(self._key(token), raw, ex=self.ttl)
+        else:
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.ttl)
+            self.db.collection(HANDOFF_COLLECTION).document(token).set({'state': raw, 'expires_at': expires_at})
+        self.saved += 1
+        return token
+
+    def take(self, token):
+        """토큰의 상태를 꺼내고 지웁니다. 없거나, 만료됐거나, 이미 쓴 토큰이면 None."""
+        if not token or not isinstance(token, str):
+            return None
+        if self.cluster is not None and self.cluster.enabled:
+            # 읽으면서 지우므로(GETDEL) 두 인스턴스가 같은 토큰을 동시에 가져가지 않습니다.
+            raw = self.cluster.redis.getdel(self._key(token))
+            if raw is None:
+                return None
+        else:
+            data = self._take_document(token)
+            if data is None or data['expires_at'] < datetime.datetime.now(datetime.timezone.utc):
+                return None
+            raw = data['state']
+        self.taken += 1
+        return decode_state(raw)
+
+    def _take_document(self, token):
+        """문서를 읽고 지우는 것을 한 트랜잭션으로 합니다. 두 인스턴스가 같은 토큰을 동시에 가져가면
+        한쪽의 커밋이 충돌해 다시 실행되고, 그때는 문서가 없으므로 None을 받습니다."""
+        from google.cloud import firestore
+        ref = self.db.collection(HANDOFF_COLLECTION).document(token)
+
+        @firestore.transactional
+        def read_and_delete(transaction):
+            doc = ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            transaction.delete(ref)
+            return doc.to_dict()
+
+        return read_and_delete(self.db.transaction())
+
+
+class Drain:
+    """SIGTERM을 받으면 세션을 정리한 뒤 서버의 원래 종료 처리를 이어서 부르는 종료 절차
+
+    install()로 등록한 handler(deadline)가 새 세션을 받지 않는 상태(draining)에서 한 번
+    실행되고, 끝나면(또는 deadline이 지나면) 이전에 설치돼 있던 신호 처리기(gunicorn 워커의
+    종료 처리 등)를 부릅니다. 이전 처리기가 없으면 기본 동작으로 프로세스를 끝냅니다.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = DRAIN_DEADLINE_SECONDS if deadline is None else deadline
+        self.draining = False
+        self.result = None
+        self._handler = None
+        self._installed = False
+        self._lock = threading.Lock()
+
+    def install(self, handler, app=None, spawn=None, signals=(signal.SIGTERM,)):
+        self._handler = handler
+        # 신호 처리기는 메인 스레드에서만 설치할 수 있습니다. (테스트 러너의 작업 스레드 등에서는 건너뜀)
+        if not DRAIN_ON_SIGTERM or self._installed or threading.current_thread() is not threading.main_thread():
+            return self
+        self._installed = True
+        spawn = spawn or (lambda target, *args: threading.Thread(target=target, args=args, daemon=True).start())
+        for signum in signals:
+            previous = signal.getsignal(signum)
+            # 신호 처리기 안에서는 오래 기다릴 수 없으므로 백그라운드 작업으로 넘깁니다.
+            signal.signal(signum, lambda sig, frame, previous=previous: spawn(self._on_signal, app, sig, previous))
+        return self
+
+    def _on_signal(self, app, signum, previous):
+        logger.info(f"Received signal {signum}, draining sessions (deadline {self.deadline:.0f}s)")
+        try:
+            self.run(app)
+        finally:
+            if callable(previous):
+                previous(signum, None)
+            elif previous != signal.SIG_IGN:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+    def run(self, app=None):
+        """드레인을 한 번 실행하고 handler의 결과를 반환합니다. (이미 했으면 그 결과)"""
+        with self._lock:
+            if self.draining:
+                return self.result
+            self.draining = True
+        started = time.monotonic()
+        with app.app_context() if app is not None else contextlib.nullcontext():
+            try:
+                self.result = self._handler(started + self.deadline) if self._handler else {}
+            except Exception as e:
+                logger.error(f"Drain failed: {e}", exc_info=True)
+                self.result = {'error': str(e)}
+        logger.info(f"Drained in {time.monotonic() - started:.2f}s: {self.result}")
+        return self.result
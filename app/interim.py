@@ -0,0 +1,143 @@
+# app/interim.py
+
+import os
+import json
+import time
+import threading
+
+from .metrics import metrics
+
+# 한 세션에 중간 결과를 보내는 최소 간격(초). 그 사이에 온 결과는 가장 최근 것만 보냅니다.
+INTERIM_MIN_INTERVAL = float(os.environ.get('INTERIM_MIN_INTERVAL', 0.25))
+# 켜져 있으면 중간 결과를 (앞에서 그대로인 길이, 바뀐 꼬리)로 보냅니다. 끄면 전체 문장을 보냅니다.
+INTERIM_DELTA = os.environ.get('INTERIM_DELTA', '1') != '0'
+
+INTERIM_EVENTS = metrics.counter('speech_interim_events', 'Interim results received from the recognizer and emitted',
+                                 labels=('stage',))
+INTERIM_BYTES = metrics.counter('speech_interim_bytes',
+                                'Interim payload bytes: as full transcripts (baseline) and as actually emitted',
+                                labels=('encoding',))
+
+
+def utf16_length(text):
+    """브라우저(JavaScript) 문자열 길이와 같은 UTF-16 코드 단위 수"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def common_prefix(a, b):
+    """두 문자열에서 앞부분이 같은 길이(문자 수)"""
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def wire_size(event, payload):
+    """Socket.IO 이벤트 패킷('42[event, payload]')의 대략적인 크기(바이트)"""
+    return len(json.dumps([event, payload], separators=(',', ':')).encode('utf-8')) + 2
+
+
+def apply_delta(current, payload):
+    """클라이언트(main.js)와 같은 방식으로 중간 결과 이벤트를 적용합니다."""
+    if 'transcript' in payload:
+        return payload['transcript']
+    kept = current.encode('utf-16-le')[:payload['keep'] * 2].decode('utf-16-le')
+    return kept + payload['tail']
+
+
+class InterimEmitter:
+    """한 세션의 중간 결과를 묶고 줄여서 보내는 클래스
+
+    중간 결과는 min_interval마다 최대 한 번 보내며, 그 사이에 온 결과는 가장 최근 것만
+    남겼다가 간격이 지나면 보냅니다(latest-wins). delta가 켜져 있으면 마지막으로 보낸
+    문장과 앞부분이 같은 길이(keep, UTF-16 단위)와 바뀐 꼬리(tail)만 보냅니다.
+    최종 결과는 기다리지 않고 바로 보내며, 아직 보내지 않은 중간 결과는 버립니다.
+    """
+
+    def __init__(self, emit, min_interval=None, delta=None, clock=time.monotonic, timer=threading.Timer):
+        # emit(event, payload): 이벤트를 클라이언트로 보냅니다.
+        self._emit = emit
+        self.min_interval = INTERIM_MIN_INTERVAL if min_interval is None else min_interval
+        self.delta = INTERIM_DELTA if delta is None else delta
+        self._clock = clock
+        self._timer_factory = timer
+        self._lock = threading.Lock()
+        self._sent = ''  # 이번 발화에서 클라이언트가 가지고 있는 중간 결과
+        self._pending = None
+        self._last_emit = None
+        self._timer = None
+        self.received = 0
+        self.emitted = 0
+        self.full_bytes = 0
+        self.emitted_bytes = 0
+
+    def interim(self, transcript, **extra):
+        """인식기의 중간 결과 하나를 받습니다."""
+        with self._lock:
+            self.received += 1
+            full = wire_size('interim_transcript', dict(extra, transcript=transcript))
+            self.full_bytes += full
+            INTERIM_EVENTS.inc(stage='received')
+            INTERIM_BYTES.inc(full, encoding='full')
+            self._pending = (transcript, extra)
+            wait = 0 if self._last_emit is None else self._last_emit + self.min_interval - self._clock()
+            if wait <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = self._timer_factory(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """기다리던 중간 결과가 있으면 지금 보냅니다."""
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending is None:
+            return
+        transcript, extra = self._pending
+        self._pending = None
+        if transcript == self._sent:
+            return
+        if self.delta:
+            keep = common_prefix(self._sent, transcript)
+            payload = dict(extra, keep=utf16_length(transcript[:keep]), tail=transcript[keep:])
+        else:
+            payload = dict(extra, transcript=transcript)
+        self._sent = transcript
+        self._last_emit = self._clock()
+        self.emitted += 1
+        size = wire_size('interim_transcript', payload)
+        self.emitted_bytes += size
+        INTERIM_EVENTS.inc(stage='emitted')
+        INTERIM_BYTES.inc(size, encoding='sent')
+        self._emit('interim_transcript', payload)
+
+    def final(self, payload):
+        """최종 결과를 바로 보내고 다음 발화를 위해 중간 결과 상태를 비웁니다."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = None
+            self._sent = ''
+            self._emit('final_transcript', payload)
+
+    def cancel(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = None
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'emitted': self.emitted,
+            'full_bytes': self.full_bytes,
+            'emitted_bytes': self.emitted_bytes,
+            'bytes_saved_ratio': round(1 - self.emitted_bytes / self.full_bytes, 4) if self.full_bytes else 0.0,
+        }
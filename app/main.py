@@ -1,45 +1,279 @@
 # app/main.py
 
 import os
+import time
 import datetime
 from flask import Blueprint, render_template, request, jsonify, current_app
-from google.cloud import storage
 
 # __init__.py에서 초기화된 firestore 클라이언트(db)와 socketio를 가져옵니다.
 from . import db, socketio
-from .utils import get_gpt_suggestion
-from .speech_worker import SpeechWorker
+from .utils import get_gpt_suggestion, build_messages, summarize_conversation, ERROR_REPLY_PREFIXES
+from .context import meeting_contexts, count_message_tokens, CONTEXT_SEED_LINES
+from .suggestions import (AI_STREAMING, stream_suggestion_to_client, suggestion_latency,
+                          FINAL_TO_FIRST_TOKEN, FINAL_TO_DONE)
+from .scheduler import SuggestionScheduler
+from .speech_worker import SpeechWorker, session_startup
+from .clients import clients
+from .archive import AudioArchiveWriter
+from .audio_frames import FrameAssembler
+from .resample import negotiate_sample_rate, sample_width
+from .write_behind import WriteBehindQueue
+from .pagination import fetch_page, parse_limit, to_json
+from .search import search_index, parse_date, SEARCH_MAX_RESULTS
+from .cache import get_meeting, get_style, list_styles, invalidate_styles, invalidate_meeting, cache_stats
+from .suggestion_cache import suggestion_cache, SUGGESTION_CACHE_ENABLED
+from .cluster import cluster
+from .metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .drain import Drain, HandoffStore, HANDOFF_MAX_TAIL_SECONDS
 
 main = Blueprint('main', __name__)
 
-# 각 클라이언트(sid)에 대한 워커와 오디오 버퍼를 저장하는 딕셔너리
+# 각 클라이언트(sid)에 대한 워커, 오디오 아카이브 작성기, 프레임 조립기를 저장하는 딕셔너리
+# (이 프로세스에 연결된 세션만 들어 있습니다. websocket 전송만 쓰므로 연결의 이벤트는 모두 이 프로세스로 옵니다.)
 workers = {}
 audio_buffers = {}
-
-# ❗️ 중요: Cloud Storage에서 음성 파일을 저장할 버킷의 이름입니다.
-# 이 이름으로 된 버킷이 프로젝트에 미리 생성되어 있어야 합니다.
-# (예: my-meeting-app-final-audio-uploads)
-GCS_BUCKET_NAME = f"{os.environ.get('GCP_PROJECT', 'my-meeting-app-final')}-audio-uploads"
-
-
-def upload_audio_to_gcs(audio_data, meeting_id, sid):
-    """메모리에 저장된 오디오 데이터를 GCS에 업로드합니다."""
+audio_assemblers = {}
+
+AUDIO_HANDLER_SECONDS = metrics.histogram(
+    'audio_stream_handler_seconds', 'Time spent handling one audio_stream event (assembly, resampling, archive)',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+# /ready가 준비됐다고 답하기 전에 미리 만들어 둘 클라이언트 (예: "firestore,speech,storage,openai")
+READY_WARM_CLIENTS = os.environ.get('READY_WARM_CLIENTS', '')
+WARMABLE_CLIENTS = ('firestore', 'speech', 'storage', 'openai')
+
+# 대화록 쓰기는 핸들러에서 바로 커밋하지 않고 배치로 모아 백그라운드에서 저장합니다.
+transcript_writes = WriteBehindQueue(db).register_shutdown()
+
+# SIGTERM을 받으면 새 세션을 받지 않고, 진행 중인 세션을 다른 인스턴스로 넘긴 뒤 종료합니다.
+# (create_app()이 신호 처리기를 설치합니다.)
+drain = Drain()
+handoffs = HandoffStore(db, cluster)
+
+
+def session_trace_id(sid):
+    worker = workers.get(sid)
+    return worker.trace_id if worker is not None else None
+
+
+# /metrics를 읽을 때 계산하는 현재 값들
+metrics.gauge('speech_workers_active', 'Speech sessions owned by this process', fn=lambda: len(workers))
+metrics.gauge('speech_pending_audio_bytes', 'Audio received but not yet sent to the recognizer',
+              fn=lambda: sum(w.pending_bytes for w in list(workers.values())))
+metrics.gauge('speech_buffered_audio_bytes', 'Audio held for replay until it is finalized',
+              fn=lambda: sum(w.buffered_bytes for w in list(workers.values())))
+
+
+def save_transcript_line(line):
+    """대화록 한 줄을 쓰기 큐에 넣고, 검색 색인에도 바로 추가합니다."""
+    doc_id = transcript_writes.enqueue('transcripts', line)
+    search_index.add(doc_id, line)
+    return doc_id
+
+
+def conversation_context(meeting_id, exclude=()):
+    """미팅의 대화 맥락을 반환합니다. 메모리에 없으면 Firestore의 최근 대화록으로 채웁니다."""
+    def seed():
+        lines, _ = load_transcripts(meeting_id, limit=CONTEXT_SEED_LINES)
+        # 지금 답하려는 발화는 이미 저장됐더라도 맥락에서 빼고, 답한 뒤에 추가합니다.
+        return [(line.get('speaker'), line.get('text')) for line in lines if line.get('text') not in exclude]
+    return meeting_contexts.get(meeting_id, seed)
+
+
+def run_suggestion(job):
+    """스케줄러가 호출하는 AI 제안 작업입니다. (합쳐진 대화록 하나에 대한 응답)"""
+    ctx = job.context
+    trace_id = ctx.get('trace_id')
+    ai_line = {'meeting_id': ctx['meeting_id'], 'speaker': 'AI', 'trace_id': trace_id}
+    # 이전 대화는 토큰 예산 안의 맥락(요약 + 최근 발화)으로만 보내므로 프롬프트 크기가 일정합니다.
+    context = conversation_context(ctx['meeting_id'], exclude=job.transcripts)
+    history = context.build()
+    prompt_tokens = count_message_tokens(build_messages(job.transcript, ctx['style_prompt'], ctx['language'], history))
+    started = time.perf_counter()
+    began = time.monotonic()
+    if AI_STREAMING:
+        # 토큰이 도착하는 대로 클라이언트에 보내고, 완성된 텍스트는 마지막에 저장합니다.
+        result = stream_suggestion_to_client(socketio, job.sid, job.transcript, ctx['style_prompt'], ctx['language'],
+                                             job=job, context=history, trace_id=trace_id)
+        if result is None:
+            return
+        suggestion = result['text']
+        ai_line['latency_ms'] = round(result['latency'] * 1000, 1)
+        if result['ttft'] is not None:
+            ai_line['ttft_ms'] = round(result['ttft'] * 1000, 1)
+            FINAL_TO_FIRST_TOKEN.observe(began + result['ttft'] - job.submitted_at, source='openai')
+    else:
+        suggestion = get_gpt_suggestion(job.transcript, ctx['style_prompt'], ctx['language'], context=history)
+        if job.is_stale():
+            job.drop()
+            return
+        job.mark_emitted()
+        socketio.emit('ai_response', {'text': suggestion, 'trace_id': trace_id}, to=job.sid)
+        FINAL_TO_FIRST_TOKEN.observe(time.monotonic() - job.submitted_at, source='openai')
+    # 대화록을 받은 때(스케줄러 대기 포함)부터 응답을 모두 보낼 때까지
+    FINAL_TO_DONE.observe(time.monotonic() - job.submitted_at, source='openai')
+
+    suggestion_latency.record_prompt_tokens(prompt_tokens)
+    ai_line['prompt_tokens'] = prompt_tokens
+
+    # 답한 발화와 응답을 맥락에 추가하고, 밀려난 발화가 쌓였으면 백그라운드에서 요약에 합칩니다.
+    needs_fold = context.add_turn('Customer', job.transcript)
+    if not suggestion.startswith(ERROR_REPLY_PREFIXES):
+        needs_fold = context.add_turn('AI', suggestion) or needs_fold
+    if needs_fold:
+        socketio.start_background_task(context.fold, summarize_conversation)
+
+    # 같은 질문이 다시 오면 OpenAI를 부르지 않고 바로 보낼 수 있도록 응답을 캐시합니다.
+    if SUGGESTION_CACHE_ENABLED and not suggestion.startswith(ERROR_REPLY_PREFIXES):
+        suggestion_cache.put(job.transcript, ctx['meeting_id'], ctx['style_prompt'], ctx['language'],
+                             suggestion, time.perf_counter() - started)
+
+    # AI 응답을 쓰기 큐에 넣습니다.
+    ai_line['text'] = suggestion
+    ai_line['timestamp'] = datetime.datetime.now(datetime.timezone.utc)
+    save_transcript_line(ai_line)
+
+def send_cached_suggestion(sid, transcript, meeting_id, style_prompt, language, trace_id=None, received_at=None):
+    """캐시된 응답이 있으면 스케줄러를 거치지 않고 바로 보내고 저장합니다. 보냈으면 True."""
+    hit = suggestion_cache.get(transcript, meeting_id, style_prompt, language)
+    if hit is None:
+        return False
+    socketio.emit('ai_response', {'text': hit.text, 'cached': True, 'trace_id': trace_id}, to=sid)
+    if received_at is not None:
+        elapsed = time.monotonic() - received_at
+        FINAL_TO_FIRST_TOKEN.observe(elapsed, source='cache')
+        FINAL_TO_DONE.observe(elapsed, source='cache')
+
+    context = conversation_context(meeting_id, exclude=[transcript])
+    needs_fold = context.add_turn('Customer', transcript)
+    needs_fold = context.add_turn('AI', hit.text) or needs_fold
+    if needs_fold:
+        socketio.start_background_task(context.fold, summarize_conversation)
+
+    save_transcript_line({
+        'meeting_id': meeting_id,
+        'speaker': 'AI',
+        'text': hit.text,
+        'cached': True,
+        'trace_id': trace_id,
+        'similarity': hit.similarity,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc),
+    })
+    return True
+
+# AI 제안은 전역 동시성 제한이 있는 스케줄러를 거쳐 백그라운드에서 실행됩니다.
+suggestion_scheduler = SuggestionScheduler(run_suggestion, spawn=socketio.start_background_task)
+
+metrics.gauge('transcript_write_queue_depth', 'Transcript writes waiting for a Firestore batch commit',
+              fn=lambda: transcript_writes.depth)
+metrics.gauge('ai_suggestions_running', 'AI suggestions currently being generated',
+              fn=lambda: suggestion_scheduler.stats()['running'])
+
+
+def deliver_audio(sid, chunks):
+    """조립된 인식 요청 크기의 오디오를 워커와 아카이브에 넘깁니다."""
+    worker = workers.get(sid)
+    writer = audio_buffers.get(sid)
+    for chunk in chunks:
+        if worker is None:
+            continue
+        # 워커가 인식기 레이트로 바꾼 PCM을 아카이브에도 그대로 기록합니다.
+        pcm = worker.add_audio_chunk(chunk)
+        if writer is not None and pcm:
+            writer.write(pcm)
+
+
+def flush_audio_frames(sid):
+    """세션이 끝날 때 조립기에 남은 오디오를 마저 넘깁니다."""
+    assembler = audio_assemblers.pop(sid, None)
+    if assembler is not None:
+        deliver_audio(sid, assembler.flush())
+        current_app.logger.info(f"Audio frames for {sid}: {assembler.stats()}")
+
+
+# 목록 화면에 필요한 필드만 가져옵니다. (프로젝션)
+MEETING_LIST_FIELDS = ['id', 'title', 'language', 'created_at']
+TRANSCRIPT_FIELDS = ['speaker', 'text', 'timestamp']
+
+
+def load_meetings(cursor=None, limit=None):
+    """최근 미팅부터 한 페이지를 읽습니다. (미팅 목록, 다음 커서)"""
+    return fetch_page(db.collection('meetings'), 'created_at', 'DESCENDING',
+                      limit=limit, fields=MEETING_LIST_FIELDS, cursor=cursor)
+
+
+def load_transcripts(meeting_id, before=None, limit=None):
+    """before 커서보다 이전의 대화록 한 페이지를 읽어 시간순으로 반환합니다. (대화록 목록, 더 이전 페이지 커서)"""
+    query = db.collection('transcripts').where('meeting_id', '==', meeting_id)
+    # 최근 줄부터 거꾸로 읽고, 화면에는 시간순으로 보여 줍니다.
+    lines, older = fetch_page(query, 'timestamp', 'DESCENDING', limit=limit, fields=TRANSCRIPT_FIELDS, cursor=before)
+    lines.reverse()
+    return lines, older
+
+
+def hand_off_session(sid):
+    """세션의 인식을 멈추고, 다른 인스턴스가 이어받을 수 있게 상태를 저장한 뒤 클라이언트에 알립니다.
+
+    아직 업로드하지 않은 녹음 작성기를 반환합니다. (드레인이 기한 안에 모아서 업로드합니다.)
+    """
+    assembler = audio_assemblers.get(sid)
+    flush_audio_frames(sid)
+    worker = workers.pop(sid, None)
+    writer = audio_buffers.pop(sid, None)
+    suggestion_scheduler.forget(sid)
+    if worker is None:
+        return writer
+    state = worker.detach(max_tail_seconds=HANDOFF_MAX_TAIL_SECONDS)
+    state['meeting_id'] = writer.meeting_id if writer is not None else None
+    token = None
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        
-        # 각 녹음 세션에 대한 고유한 파일 이름을 생성합니다.
-        timestamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d-%H%M%S")
-        destination_blob_name = f"{meeting_id}/{sid}_{timestamp}.raw"
-        
-        blob = bucket.blob(destination_blob_name)
-        blob.upload_from_string(audio_data, content_type='audio/l16') # l16은 raw pcm 오디오를 의미
-        
-        current_app.logger.info(f"Audio for SID {sid} uploaded to {destination_blob_name}.")
-        return blob.public_url
+        token = handoffs.save(state)
     except Exception as e:
-        current_app.logger.error(f"GCS Upload failed for SID {sid}: {e}", exc_info=True)
-        return None
+        current_app.logger.error(f"Could not save handoff for {sid} [{worker.trace_id}]: {e}")
+    # 클라이언트는 다른 인스턴스에 다시 연결해 resume_token과 함께 start_session을 보내고,
+    # next_seq부터의 오디오 프레임을 다시 보냅니다. (이 인스턴스가 받지 못했을 수 있음)
+    socketio.emit('session_handoff', {
+        'resume_token': token,
+        'trace_id': worker.trace_id,
+        'next_seq': assembler.expected_seq if assembler is not None and assembler.framed else None,
+    }, to=sid)
+    return writer
+
+
+def drain_sessions(deadline):
+    """SIGTERM을 받았을 때 실행됩니다. 세션을 넘기고, 녹음과 대화록 쓰기를 deadline까지 저장합니다."""
+    sessions = list(workers)
+    writers = [hand_off_session(sid) for sid in sessions]
+    writers += [audio_buffers.pop(sid) for sid in list(audio_buffers)]
+    writers = [writer for writer in writers if writer is not None]
+    uploads = [socketio.start_background_task(writer.finalize) for writer in writers]
+    for task in uploads:
+        task.join(max(0.0, deadline - time.monotonic()))
+    flushed = transcript_writes.flush(max(0.0, deadline - time.monotonic()))
+    # session_handoff가 전달되도록 넘긴 클라이언트가 연결을 끊을 때까지(기한 안에서) 기다립니다.
+    while time.monotonic() < deadline and any(socketio.server.manager.is_connected(sid, '/') for sid in sessions):
+        time.sleep(0.05)
+    return {
+        'handed_off': len(sessions),
+        'recordings': len(writers),
+        'uploads_unfinished': sum(1 for task in uploads if _task_alive(task)),
+        'transcript_writes_flushed': flushed,
+    }
+
+
+def _task_alive(task):
+    # 스레드(threading)와 그린렛(gevent)의 살아 있는지 확인 방법이 다릅니다.
+    alive = getattr(task, 'is_alive', None)
+    return alive() if alive is not None else not task.dead
+
+
+def finalize_audio_archive(sid):
+    """세션의 녹음 스풀을 닫고, 업로드는 백그라운드 작업으로 넘깁니다."""
+    writer = audio_buffers.pop(sid, None)
+    if writer is None:
+        return
+    writer.close()
+    socketio.start_background_task(writer.finalize)
 
 # --- 라우팅 (Firestore 사용) ---
 
@@ -52,19 +286,17 @@ def index():
 def meeting_room(meeting_id):
     """미팅 룸, 실시간 음성 인식이 진행되는 곳입니다."""
     try:
-        meeting_ref = db.collection('meetings').document(meeting_id)
-        meeting_doc = meeting_ref.get()
-        if not meeting_doc.exists:
+        meeting = get_meeting(db, meeting_id)
+        if meeting is None:
             return "Meeting not found", 404
-        meeting = meeting_doc.to_dict()
 
-        styles_stream = db.collection('answer_styles').stream()
-        styles = [doc.to_dict() for doc in styles_stream]
+        styles = list_styles(db)
 
-        transcripts_stream = db.collection('transcripts').where('meeting_id', '==', meeting_id).order_by('timestamp').stream()
-        transcripts = [doc.to_dict() for doc in transcripts_stream]
+        # 최근 대화록 한 페이지만 먼저 보여 주고, 이전 줄은 스크롤할 때 API로 더 불러옵니다.
+        transcripts, older_cursor = load_transcripts(meeting_id)
 
-        return render_template('meeting.html', meeting=meeting, styles=styles, transcripts=transcripts, meeting_id=meeting_id)
+        return render_template('meeting.html', meeting=meeting, styles=styles, transcripts=transcripts,
+                               older_cursor=older_cursor, meeting_id=meeting_id)
     except Exception as e:
         current_app.logger.error(f"Error loading meeting room {meeting_id}: {e}", exc_info=True)
         return "Internal Server Error", 500
@@ -73,9 +305,8 @@ def meeting_room(meeting_id):
 def history():
     """과거 미팅 기록을 보여줍니다."""
     try:
-        meetings_stream = db.collection('meetings').order_by('created_at', direction='DESCENDING').stream()
-        meetings = [doc.to_dict() for doc in meetings_stream]
-        return render_template('history.html', meetings=meetings)
+        meetings, next_cursor = load_meetings()
+        return render_template('history.html', meetings=meetings, next_cursor=next_cursor)
     except Exception as e:
         current_app.logger.error(f"Error fetching history: {e}", exc_info=True)
         return "Internal Server Error", 500
@@ -84,8 +315,7 @@ def history():
 def styles():
     """답변 스타일을 관리합니다."""
     try:
-        styles_stream = db.collection('answer_styles').stream()
-        all_styles = [doc.to_dict() for doc in styles_stream]
+        all_styles = list_styles(db)
         return render_template('styles.html', styles=all_styles)
     except Exception as e:
         current_app.logger.error(f"Error fetching styles: {e}", exc_info=True)
@@ -107,6 +337,7 @@ def create_meeting():
             'created_at': datetime.datetime.now(datetime.timezone.utc)
         }
         doc_ref.set(meeting_data)
+        invalidate_meeting(doc_ref.id)
         
         return jsonify({'meeting_id': doc_ref.id})
     except Exception as e:
@@ -129,11 +360,131 @@ def create_style():
             'prompt': prompt
         }
         doc_ref.set(style_data)
+        invalidate_styles(doc_ref.id)
         return jsonify({'success': True, 'id': doc_ref.id})
     except Exception as e:
         current_app.logger.error(f"Error creating style: {e}", exc_info=True)
         return jsonify({'success': False, 'message': 'An internal error occurred.'}), 500
 
+@main.route('/api/meetings')
+def list_meetings():
+    """과거 미팅 목록의 다음 페이지를 반환합니다. (?cursor=...&limit=...)"""
+    try:
+        meetings, next_cursor = load_meetings(request.args.get('cursor'), parse_limit(request.args.get('limit')))
+        return jsonify({'meetings': [to_json(m) for m in meetings], 'next_cursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error listing meetings: {e}", exc_info=True)
+        return jsonify({'error': 'An internal error occurred.'}), 500
+
+@main.route('/api/meeting/<string:meeting_id>/transcripts')
+def list_transcripts(meeting_id):
+    """미팅 대화록에서 before 커서 이전의 줄들을 시간순으로 반환합니다. (?before=...&limit=...)"""
+    try:
+        lines, older_cursor = load_transcripts(meeting_id, request.args.get('before'), parse_limit(request.args.get('limit')))
+        return jsonify({'transcripts': [to_json(line) for line in lines], 'older_cursor': older_cursor})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error listing transcripts for {meeting_id}: {e}", exc_info=True)
+        return jsonify({'error': 'An internal error occurred.'}), 500
+
+@main.route('/api/search')
+def search_transcripts():
+    """모든 미팅의 대화록을 검색합니다. (?q=...&meeting_id=...&from=YYYY-MM-DD&to=YYYY-MM-DD&limit=...)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query.'}), 400
+    try:
+        start = parse_date(request.args.get('from'))
+        end = parse_date(request.args.get('to'), end_of_day=True)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+
+    # 서버가 시작된 뒤 처음 검색할 때 기존 대화록 색인을 백그라운드에서 채웁니다.
+    if not search_index.loaded and not search_index.loading:
+        socketio.start_background_task(search_index.load, db)
+
+    try:
+        started = time.perf_counter()
+        results = search_index.search(query, meeting_id=request.args.get('meeting_id') or None,
+                                      start=start, end=end, limit=parse_limit(request.args.get('limit'), SEARCH_MAX_RESULTS))
+        return jsonify({
+            'results': [to_json(r) for r in results],
+            'took_ms': round((time.perf_counter() - started) * 1000, 2),
+            # 기존 대화록을 아직 색인하는 중이거나, 최대 줄 수에 닿았거나, 여러 워커로 실행 중이면
+            # (다른 워커가 저장한 줄은 이 워커의 색인에 없음) 결과가 일부일 수 있습니다.
+            'partial': not search_index.loaded or search_index.truncated or cluster.enabled,
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error searching transcripts: {e}", exc_info=True)
+        return jsonify({'error': 'An internal error occurred.'}), 500
+
+@main.route('/api/cache/stats')
+def get_cache_stats():
+    """스타일/미팅 캐시와 AI 제안 캐시의 적중/실패 횟수를 반환합니다."""
+    return jsonify(dict(cache_stats(), suggestions=suggestion_cache.stats()))
+
+@main.route('/api/suggestions/latency')
+def get_suggestion_latency():
+    """AI 제안의 첫 토큰 시간과 전체 지연 시간 통계를 반환합니다."""
+    return jsonify(dict(suggestion_latency.summary(), scheduler=suggestion_scheduler.stats(),
+                        cache=suggestion_cache.stats()))
+
+@main.route('/metrics')
+def get_metrics():
+    """지연 시간 히스토그램과 현재 값(게이지)을 Prometheus 텍스트 형식으로 반환합니다."""
+    return current_app.response_class(metrics.render(), mimetype=METRICS_CONTENT_TYPE)
+
+def _client_key(name):
+    # OpenAI 클라이언트는 API 키마다 따로 만듭니다. (utils._get_client와 같은 키)
+    return (os.environ.get('OPENAI_API_KEY'),) if name == 'openai' else ()
+
+@main.route('/ready')
+def readiness():
+    """준비 상태 확인(startup/readiness probe)용 경로입니다.
+
+    ?warm=firestore,speech(없으면 READY_WARM_CLIENTS, all이면 전부)로 고른 클라이언트를 먼저
+    만들어 두므로 첫 사용자가 SDK import와 연결 비용을 기다리지 않습니다. 만들지 못한 것이
+    있으면 503을 반환합니다.
+    """
+    if drain.draining:
+        # 종료 중인 인스턴스로는 새 요청을 보내지 않게 합니다.
+        return jsonify({'ready': False, 'draining': True}), 503
+    names = [name.strip() for name in request.args.get('warm', READY_WARM_CLIENTS).split(',') if name.strip()]
+    if names == ['all']:
+        names = list(WARMABLE_CLIENTS)
+    warmed, errors = {}, {}
+    for name in names:
+        try:
+            warmed[name] = round(clients.warm(name, *_client_key(name)) * 1000, 1)
+        except Exception as e:
+            current_app.logger.warning(f"Could not warm {name} client: {e}")
+            errors[name] = str(e)
+    created = {name: clients.created(name, *_client_key(name)) for name in WARMABLE_CLIENTS}
+    body = {'ready': not errors, 'warmed_ms': warmed, 'errors': errors, 'clients': created}
+    return jsonify(body), 503 if errors else 200
+
+@main.route('/api/cluster')
+def get_cluster_stats():
+    """이 프로세스의 ID와 이 프로세스에 연결된 음성 세션 수를 반환합니다."""
+    return jsonify(dict(cluster.stats(), sessions=len(workers)))
+
+@main.route('/api/clients')
+def get_client_stats():
+    """공유 클라우드 클라이언트 풀의 상태와, 세션 시작부터 첫 인식 요청까지의 시간을 반환합니다."""
+    return jsonify({'pools': clients.stats(), 'session_startup': session_startup.summary()})
+
+@main.route('/api/speech/stats')
+def get_speech_stats():
+    """진행 중인 음성 인식 세션별로 보낸 오디오 양, VAD가 걸러 낸 비율, 프레임 통계를 반환합니다."""
+    stats = []
+    for sid, worker in list(workers.items()):
+        assembler = audio_assemblers.get(sid)
+        stats.append(dict(worker.stats(), frames=assembler.stats() if assembler else None))
+    return jsonify(stats)
+
 # (이하 Delete API 및 Socket.IO 핸들러)
 
 # --- Socket.IO 핸들러 (Firestore 및 GCS 사용) ---
@@ -145,16 +496,14 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     sid = request.sid
+    current_app.logger.info(f"Client disconnected: {sid}")
+    flush_audio_frames(sid)
     if sid in workers:
         workers[sid].close()
         del workers[sid]
+    suggestion_scheduler.forget(sid)
     # 연결이 끊기면 녹음된 오디오를 업로드합니다.
-    if sid in audio_buffers and audio_buffers[sid]['data']:
-        audio_data = b''.join(audio_buffers[sid]['data'])
-        meeting_id = audio_buffers[sid]['meeting_id']
-        upload_audio_to_gcs(audio_data, meeting_id, sid)
-        del audio_buffers[sid]
-    current_app.logger.info(f"Client disconnected: {sid}")
+    finalize_audio_archive(sid)
 
 @socketio.on('start_session')
 def handle_start_session(data):
@@ -162,96 +511,133 @@ def handle_start_session(data):
     if sid in workers:
         current_app.logger.warning(f"Session already started for {sid}")
         return
+    if drain.draining:
+        # 이 인스턴스는 곧 종료되므로 다른 인스턴스에 다시 연결하게 합니다. (받은 토큰은 그대로 돌려줌)
+        socketio.emit('session_handoff', {'resume_token': data.get('resume_token'), 'next_seq': None}, to=sid)
+        return
 
     meeting_id = data.get('meeting_id')
-    meeting_ref = db.collection('meetings').document(meeting_id)
-    meeting = meeting_ref.get()
-    if not meeting.exists:
+    meeting = get_meeting(db, meeting_id)
+    if meeting is None:
         current_app.logger.error(f"Meeting {meeting_id} not found for session {sid}")
         return
 
+    # 종료된 인스턴스에서 넘어온 세션이면 그 인식 상태(추적 ID, 세션 시각, 확정되지 않은 오디오)를 이어받습니다.
+    resume = None
+    if data.get('resume_token'):
+        try:
+            resume = handoffs.take(data['resume_token'])
+        except Exception as e:
+            current_app.logger.error(f"Could not load handoff for {sid}: {e}")
+        if resume is None or resume.get('meeting_id') != meeting_id:
+            current_app.logger.warning(f"Unknown or expired resume token for {sid}; starting a new session")
+            resume = None
+
+    # 클라이언트가 'framing'을 보내면 순번/시각 헤더가 붙은 약 100ms 프레임을 원래 샘플 레이트
+    # 그대로 받아 서버에서 리샘플링합니다. 예전 클라이언트는 브라우저에서 16kHz로 줄인
+    # 헤더 없는 PCM 조각을 보내므로(sample_rate 값과 상관없이) 16kHz int16으로 받습니다.
+    framed = bool(data.get('framing'))
+    input_rate = data.get('sample_rate', 16000) if framed else 16000
+    sample_format = data.get('sample_format', 'int16') if framed else 'int16'
+    try:
+        input_rate = int(input_rate)
+        recognizer_rate = negotiate_sample_rate(input_rate)
+        width = sample_width(sample_format)
+    except (TypeError, ValueError) as e:
+        current_app.logger.error(f"Rejected audio format for {sid}: {e}")
+        socketio.emit('transcription_error', {'message': f'Unsupported audio format: {e}'}, to=sid)
+        return
+    if resume is not None and resume['sample_rate'] != recognizer_rate:
+        # 넘겨받은 오디오와 세션 위치는 같은 레이트에서만 이어 붙일 수 있습니다.
+        current_app.logger.warning(f"Resumed session for {sid} changed sample rate; starting a new session")
+        resume = None
+
     try:
-        language_code = meeting.to_dict().get('language', 'en-US')
-        worker = SpeechWorker(socketio, sid, language_code=language_code)
+        language_code = meeting.get('language', 'en-US')
+        worker = SpeechWorker(socketio, sid, language_code=language_code, sample_rate=recognizer_rate,
+                              input_rate=input_rate, sample_format=sample_format,
+                              trace_id=resume['trace_id'] if resume else None, resume=resume)
         workers[sid] = worker
         
-        # 오디오 저장을 위한 버퍼를 초기화합니다.
-        audio_buffers[sid] = {'data': [], 'meeting_id': meeting_id}
+        # 오디오 저장을 위한 아카이브 작성기를 준비합니다. (스풀 파일로 흘려보냄)
+        audio_buffers[sid] = AudioArchiveWriter(meeting_id, sid, sample_rate=recognizer_rate)
+        audio_assemblers[sid] = FrameAssembler(sample_rate=input_rate, framed=framed, sample_width=width)
         
         socketio.start_background_task(worker.process)
-        current_app.logger.info(f"Speech worker started for {sid} in meeting {meeting_id}")
+        current_app.logger.info(f"Speech worker {'resumed' if resume else 'started'} for {sid} [{worker.trace_id}] "
+                                f"in meeting {meeting_id} ({input_rate}Hz {sample_format} -> {recognizer_rate}Hz)")
+        # 클라이언트는 이 응답(ack)을 받은 뒤에 다시 연결하는 동안 모아 둔 오디오를 보냅니다.
+        return {'trace_id': worker.trace_id, 'resumed': resume is not None}
     except Exception as e:
         current_app.logger.error(f"Failed to start speech worker for {sid}: {e}")
 
 @socketio.on('audio_stream')
 def handle_audio_stream(audio_data):
     sid = request.sid
-    if sid in workers:
-        workers[sid].add_audio_chunk(audio_data)
-        # 오디오 데이터를 버퍼에 추가합니다.
-        if sid in audio_buffers:
-            audio_buffers[sid]['data'].append(audio_data)
+    assembler = audio_assemblers.get(sid)
+    if assembler is None:
+        return
+    started = time.perf_counter()
+    try:
+        chunks = assembler.feed(audio_data)
+    except ValueError as e:
+        current_app.logger.warning(f"Dropped malformed audio frame from {sid}: {e}")
+        return
+    # 고정 크기로 모인 오디오만 워커와 아카이브에 기록합니다.
+    deliver_audio(sid, chunks)
+    AUDIO_HANDLER_SECONDS.observe(time.perf_counter() - started)
 
 @socketio.on('stop_session')
 def handle_stop_session():
     sid = request.sid
+    flush_audio_frames(sid)
     if sid in workers:
         workers[sid].close()
         del workers[sid]
         current_app.logger.info(f"Session stopped for {sid}")
     # 세션이 중지되면 녹음된 오디오를 업로드합니다.
-    if sid in audio_buffers and audio_buffers[sid]['data']:
-        audio_data = b''.join(audio_buffers[sid]['data'])
-        meeting_id = audio_buffers[sid]['meeting_id']
-        upload_audio_to_gcs(audio_data, meeting_id, sid)
-        del audio_buffers[sid]
+    finalize_audio_archive(sid)
 
 @socketio.on('final_transcript')
 def handle_final_transcript_and_gpt(data):
     """최종 대화록을 Firestore에 저장하고 GPT 제안을 요청합니다."""
     sid = request.sid
+    received_at = time.monotonic()
     transcript_text = data.get('transcript')
     meeting_id = data.get('meeting_id')
     answer_style_id = data.get('answer_style_id')
+    # 클라이언트가 돌려준 추적 ID가 없으면 세션의 추적 ID를 씁니다.
+    trace_id = data.get('trace_id') or session_trace_id(sid)
 
     if not all([transcript_text, meeting_id, answer_style_id]):
         return
 
     try:
-        # 1. 사용자 대화록을 Firestore에 저장합니다.
-        user_transcript_ref = db.collection('transcripts').document()
-        user_transcript_data = {
-            'id': user_transcript_ref.id,
+        # 1. 사용자 대화록을 쓰기 큐에 넣습니다. (배치로 Firestore에 저장되고 검색 색인에 추가됨)
+        save_transcript_line({
             'meeting_id': meeting_id,
             'speaker': 'Customer',
             'text': transcript_text,
+            'trace_id': trace_id,
             'timestamp': datetime.datetime.now(datetime.timezone.utc)
-        }
-        user_transcript_ref.set(user_transcript_data)
-        
+        })
+
         # 2. 답변 스타일을 가져오고 GPT 제안을 요청합니다.
-        style_ref = db.collection('answer_styles').document(answer_style_id)
-        style_doc = style_ref.get()
-        meeting_ref = db.collection('meetings').document(meeting_id)
-        meeting_doc = meeting_ref.get()
-
-        if style_doc.exists and meeting_doc.exists:
-            style_prompt = style_doc.to_dict().get('prompt', '')
-            language = meeting_doc.to_dict().get('language', 'en-US')
-            
-            suggestion = get_gpt_suggestion(transcript_text, style_prompt, language)
-            socketio.emit('ai_response', {'text': suggestion}, to=sid)
-
-            # 3. AI 응답을 Firestore에 저장합니다.
-            ai_transcript_ref = db.collection('transcripts').document()
-            ai_transcript_data = {
-                'id': ai_transcript_ref.id,
-                'meeting_id': meeting_id,
-                'speaker': 'AI',
-                'text': suggestion,
-                'timestamp': datetime.datetime.now(datetime.timezone.utc)
-            }
-            ai_transcript_ref.set(ai_transcript_data)
-            
+        style = get_style(db, answer_style_id)
+        meeting = get_meeting(db, meeting_id)
+
+        if style is not None and meeting is not None:
+            style_prompt = style.get('prompt', '')
+            language = meeting.get('language', 'en-US')
+
+            # 3. 같은(또는 거의 같은) 질문에 대한 응답이 캐시에 있으면 바로 보냅니다.
+            if SUGGESTION_CACHE_ENABLED and send_cached_suggestion(sid, transcript_text, meeting_id, style_prompt,
+                                                                   language, trace_id, received_at):
+                return
+
+            # 4. 스케줄러에 넣고 바로 반환합니다. 응답 전송과 저장은 run_suggestion이 합니다.
+            suggestion_scheduler.submit(sid, transcript_text, meeting_id=meeting_id,
+                                        style_prompt=style_prompt, language=language, trace_id=trace_id)
+
     except Exception as e:
-        current_app.logger.error(f"Error handling final transcript: {e}", exc_info=True)
\ No newline at end of file
+        current_app.logger.error(f"Error handling final transcript [{trace_id}]: {e}", exc_info=True)
@@ -0,0 +1,79 @@
+# app/pagination.py
+
+import os
+import json
+import base64
+import datetime
+
+# 한 번에 보여 주는 미팅/대화록 줄 수
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value, default=None):
+    """요청의 limit 값을 1 ~ MAX_PAGE_SIZE 범위의 정수로 바꿉니다."""
+    default = default or PAGE_SIZE
+    try:
+        limit = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'$dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and '$dt' in value:
+        return datetime.datetime.fromisoformat(value['$dt'])
+    return value
+
+
+def encode_cursor(values):
+    """정렬 값 목록을 URL에 넣을 수 있는 불투명한 커서 문자열로 만듭니다."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """encode_cursor의 반대입니다. 잘못된 커서면 ValueError를 발생시킵니다."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return [_decode_value(v) for v in values]
+
+
+def fetch_page(query, order_field, direction='ASCENDING', limit=None, fields=None, cursor=None):
+    """order_field(동률이면 문서 ID) 순서로 한 페이지를 읽습니다. (키셋 페이지네이션)
+
+    오프셋 없이 커서 다음부터 limit + 1개만 읽으므로 앞 페이지가 많아도 비용이 같고,
+    fields를 주면 그 필드만 가져옵니다. (문서 dict 목록, 다음 페이지 커서 또는 None)을 반환합니다.
+    """
+    limit = limit or PAGE_SIZE
+    query = query.order_by(order_field, direction=direction).order_by('__name__', direction=direction)
+    if fields is not None:
+        query = query.select(list(dict.fromkeys(list(fields) + [order_field])))
+    if cursor:
+        value, doc_id = decode_cursor(cursor)
+        query = query.start_after({order_field: value, '__name__': doc_id})
+
+    docs = list(query.limit(limit + 1).stream())
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    items = [dict(doc.to_dict(), id=doc.id) for doc in docs]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([docs[-1].get(order_field), docs[-1].id])
+    return items, next_cursor
+
+
+def to_json(item):
+    """jsonify가 datetime을 RFC 822 형식으로 바꾸지 않도록 ISO 8601 문자열로 바꿉니다."""
+    return {k: v.isoformat() if isinstance(v, datetime.datetime) else v for k, v in item.items()}
@@ -0,0 +1,106 @@
+# app/resample.py
+
+import os
+from math import gcd, ceil
+
+import numpy as np
+
+# 클라이언트 샘플 레이트가 이보다 높으면 이 레이트로 줄여서 인식기에 보냅니다.
+RECOGNIZER_SAMPLE_RATE = int(os.environ.get('RECOGNIZER_SAMPLE_RATE', 16000))
+# 받을 수 있는 입력 샘플 레이트 범위 (Google STT가 지원하는 범위)
+MIN_INPUT_RATE = 8000
+MAX_INPUT_RATE = 48000
+
+SAMPLE_FORMATS = {'int16': np.dtype('<i2'), 'float32': np.dtype('<f4')}
+
+
+def negotiate_sample_rate(input_rate):
+    """클라이언트 레이트에 맞는 인식기 레이트를 정합니다.
+
+    목표 레이트 이하면 그대로 쓰고(올려도 정보가 늘지 않음), 높으면 목표 레이트로 줄입니다.
+    지원하지 않는 레이트면 ValueError를 발생시킵니다.
+    """
+    input_rate = int(input_rate)
+    if not MIN_INPUT_RATE <= input_rate <= MAX_INPUT_RATE:
+        raise ValueError(f"Unsupported sample rate {input_rate}")
+    return min(input_rate, RECOGNIZER_SAMPLE_RATE)
+
+
+def sample_width(sample_format):
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported sample format {sample_format!r}")
+    return SAMPLE_FORMATS[sample_format].itemsize
+
+
+def design_filter(up, down, taps_per_phase=None, beta=5.0):
+    """카이저 창을 씌운 sinc 저역 통과 필터를 (up, taps_per_phase) 폴리페이즈 행렬로 만듭니다."""
+    if taps_per_phase is None:
+        taps_per_phase = 2 * ceil(10 * max(up, down) / up)
+    num_taps = up * taps_per_phase
+    cutoff = 0.5 / max(up, down)
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(num_taps, beta) * up
+    # phases[p, j] = h[p + j * up]
+    return h.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+class StreamingResampler:
+    """조각 단위로 들어오는 오디오를 다른 레이트의 16비트 PCM으로 바꾸는 폴리페이즈 FIR 리샘플러
+
+    필터 길이만큼의 이전 입력과 출력 위상을 다음 조각으로 넘기므로, 조각을 어떻게 나눠서
+    넣어도 한 번에 넣은 것과 같은 결과가 나옵니다. 조각 하나의 출력 샘플은 모두 한 번의
+    벡터 연산(gather + 행별 내적)으로 계산합니다. 입력은 int16 또는 float32(-1~1)입니다.
+    """
+
+    def __init__(self, input_rate, output_rate, sample_format='int16'):
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        self.dtype = SAMPLE_FORMATS[sample_format]
+        self.sample_format = sample_format
+        g = gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate // g
+        self.down = self.input_rate // g
+        self.passthrough = self.up == self.down
+        self._pending = b''
+        if self.passthrough:
+            return
+        self._phases = design_filter(self.up, self.down)
+        self.taps = self._phases.shape[1]
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._taps_range = np.arange(self.taps)
+        # 다음 출력 샘플의 위치 (현재 조각 시작 기준, 업샘플링된 단위)
+        self._t = 0
+
+    def _to_float(self, chunk):
+        data = self._pending + bytes(chunk) if self._pending else chunk
+        usable = len(data) - len(data) % self.dtype.itemsize
+        self._pending = bytes(data[usable:])
+        x = np.frombuffer(data, dtype=self.dtype, count=usable // self.dtype.itemsize)
+        if self.dtype.kind == 'i':
+            return x.astype(np.float32) / 32768.0
+        return x.astype(np.float32, copy=False)
+
+    @staticmethod
+    def _to_pcm16(y):
+        return np.clip(np.rint(y * 32768.0), -32768, 32767).astype('<i2').tobytes()
+
+    def process(self, chunk):
+        """입력 조각(bytes)을 받아 출력 레이트의 16비트 PCM(bytes)을 반환합니다."""
+        if self.passthrough and self.dtype.kind == 'i':
+            return bytes(chunk)
+        x = self._to_float(chunk)
+        if self.passthrough or not len(x):
+            return self._to_pcm16(x) if len(x) else b''
+
+        span = len(x) * self.up
+        count = max(0, -(-(span - self._t) // self.down))
+        t = self._t + np.arange(count) * self.down
+        k, p = np.divmod(t, self.up)
+        ext = np.concatenate((self._history, x))
+        # ext에서 출력 샘플마다 필요한 입력 창 [k - taps + 1, k]를 뒤집은 순서로 모읍니다.
+        windows = ext[(k + self.taps - 1)[:, None] - self._taps_range]
+        y = np.einsum('ij,ij->i', windows, self._phases[p])
+
+        self._t = self._t + count * self.down - span
+        self._history = ext[len(ext) - (self.taps - 1):]
+        return self._to_pcm16(y)
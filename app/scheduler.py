@@ -0,0 +1,160 @@
+# app/scheduler.py
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# 동시에 진행할 수 있는 AI 제안 요청의 최대 개수입니다. (프로세스 전체)
+SUGGESTION_CONCURRENCY = int(os.environ.get('SUGGESTION_CONCURRENCY', 8))
+
+
+def _spawn_thread(fn, *args):
+    threading.Thread(target=fn, args=args, daemon=True).start()
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 4)
+
+
+class SuggestionJob:
+    """한 세션(sid)의 AI 제안 요청 하나. 아직 시작 전이면 새 대화록이 합쳐집니다."""
+
+    def __init__(self, sid, seq, transcript, context):
+        self.sid = sid
+        self.seq = seq
+        self.transcripts = [transcript]
+        self.context = context
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.superseded = False
+        self.emitted = False
+        self.dropped = False
+
+    @property
+    def transcript(self):
+        return ' '.join(self.transcripts)
+
+    def merge(self, transcript, seq, context):
+        self.transcripts.append(transcript)
+        self.seq = seq
+        self.context = context
+
+    def is_stale(self):
+        """더 새로운 요청이 들어왔고, 아직 클라이언트에 아무것도 보내지 않았으면 True입니다."""
+        return self.superseded and not self.emitted
+
+    def mark_emitted(self):
+        self.emitted = True
+
+    def drop(self):
+        """오래된 응답을 버립니다. 이 요청의 대화록은 다음 요청에 합쳐집니다."""
+        self.dropped = True
+
+
+class SuggestionScheduler:
+    """get_gpt_suggestion 호출을 전역 동시성 제한과 세션별 대기열로 관리합니다.
+
+    - 세션마다 동시에 하나의 요청만 진행하므로 응답 순서가 뒤바뀌지 않습니다.
+    - 시작 전인 요청이 있는 상태에서 새 대화록이 오면 하나의 요청으로 합칩니다.
+    - 진행 중인 요청이 첫 출력 전에 더 새로운 요청에 밀리면(stale) 결과를 버리고,
+      그 대화록은 다음 요청에 합쳐집니다.
+    """
+
+    def __init__(self, runner, max_concurrency=None, spawn=None, sample_size=1000):
+        self._runner = runner
+        self.max_concurrency = max_concurrency or SUGGESTION_CONCURRENCY
+        self._spawn = spawn or _spawn_thread
+        self._lock = threading.Lock()
+        self._seq = {}
+        self._pending = {}
+        self._ready = deque()
+        self._running = {}
+        self._wait_times = deque(maxlen=sample_size)
+        self.counters = {'submitted': 0, 'merged': 0, 'started': 0, 'completed': 0, 'dropped': 0, 'failed': 0}
+
+    def submit(self, sid, transcript, **context):
+        """대화록을 세션 대기열에 넣고 요청 순번(seq)을 반환합니다."""
+        with self._lock:
+            seq = self._seq.get(sid, 0) + 1
+            self._seq[sid] = seq
+            self.counters['submitted'] += 1
+            job = self._pending.get(sid)
+            if job is not None:
+                job.merge(transcript, seq, context)
+                self.counters['merged'] += 1
+            else:
+                self._pending[sid] = SuggestionJob(sid, seq, transcript, context)
+                self._ready.append(sid)
+            running = self._running.get(sid)
+            if running is not None:
+                running.superseded = True
+            self._dispatch()
+        return seq
+
+    def forget(self, sid):
+        """세션이 끝나면 대기 중인 요청을 버리고 진행 중인 요청은 stale로 표시합니다."""
+        with self._lock:
+            if self._pending.pop(sid, None) is not None:
+                self._ready.remove(sid)
+            running = self._running.get(sid)
+            if running is not None:
+                running.superseded = True
+            self._seq.pop(sid, None)
+
+    def _dispatch(self):
+        # self._lock을 잡은 상태에서 호출됩니다.
+        while len(self._running) < self.max_concurrency:
+            sid = next((s for s in self._ready if s not in self._running), None)
+            if sid is None:
+                return
+            self._ready.remove(sid)
+            job = self._pending.pop(sid)
+            job.started_at = time.monotonic()
+            self._wait_times.append(job.started_at - job.submitted_at)
+            self._running[sid] = job
+            self.counters['started'] += 1
+            self._spawn(self._run, job)
+
+    def _run(self, job):
+        failed = False
+        try:
+            self._runner(job)
+        except Exception as e:
+            failed = True
+            logger.error(f"AI suggestion failed for {job.sid}: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._running.pop(job.sid, None)
+                if failed:
+                    self.counters['failed'] += 1
+                elif job.dropped:
+                    self.counters['dropped'] += 1
+                    pending = self._pending.get(job.sid)
+                    if pending is not None:
+                        pending.transcripts[:0] = job.transcripts
+                else:
+                    self.counters['completed'] += 1
+                self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            waits = list(self._wait_times)
+            queued = sum(len(job.transcripts) for job in self._pending.values())
+            oldest = min((job.submitted_at for job in self._pending.values()), default=None)
+            return dict(
+                self.counters,
+                max_concurrency=self.max_concurrency,
+                running=len(self._running),
+                queued_sessions=len(self._pending),
+                queue_depth=queued,
+                oldest_wait=None if oldest is None else round(time.monotonic() - oldest, 4),
+                wait_p50=_percentile(waits, 0.5),
+                wait_p99=_percentile(waits, 0.99),
+            )
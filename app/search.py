@@ -0,0 +1,262 @@
+# app/search.py
+
+import os
+import re
+import html
+import math
+import heapq
+import logging
+import datetime
+import threading
+import unicodedata
+
+from .pagination import fetch_page
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 20))
+# 시작할 때 Firestore에서 기존 대화록을 읽어 올 때의 페이지 크기
+SEARCH_LOAD_PAGE_SIZE = int(os.environ.get('SEARCH_LOAD_PAGE_SIZE', 500))
+# 색인에 두는 최대 대화록 줄 수. 넘으면 가장 오래된 줄부터 빼고, 시작할 때도 최근 줄만 읽습니다.
+SEARCH_MAX_DOCUMENTS = int(os.environ.get('SEARCH_MAX_DOCUMENTS', 200000))
+SNIPPET_CHARS = 120
+
+# 영문/숫자 단어, 한글 단어(공백으로 나뉜 어절)를 찾습니다.
+_WORD = re.compile(r'[0-9a-z]+|[가-힣]+')
+_STOPWORDS = frozenset('a an and are as at be but by for from has have i in is it of on or so that the this to was we were will with you'.split())
+
+# BM25 매개변수
+_K1 = 1.2
+_B = 0.75
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def _english_term(word):
+    # 복수형 정도만 맞춥니다. (contracts -> contract)
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """검색어와 대화록을 같은 방식으로 토큰 목록으로 나눕니다.
+
+    영어는 단어 단위(불용어 제외), 한국어는 어절에 조사가 붙어도 찾을 수 있도록
+    글자 2개씩 묶은 바이그램(회의를 -> 회의, 의를) 단위로 나눕니다.
+    """
+    tokens = []
+    for word in _WORD.findall(_normalize(text)):
+        if '가' <= word[0] <= '힣':
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif word not in _STOPWORDS:
+            tokens.append(_english_term(word))
+    return tokens
+
+
+def highlight(text, query, width=SNIPPET_CHARS):
+    """첫 일치 위치 주변을 잘라 검색어를 <mark>로 감싼 HTML 조각을 만듭니다."""
+    words = sorted({w for w in _WORD.findall(_normalize(query)) if w not in _STOPWORDS}, key=len, reverse=True)
+    text = text or ''
+    if not words:
+        return html.escape(text[:width])
+    pattern = re.compile('|'.join(re.escape(w) for w in words), re.IGNORECASE)
+    first = pattern.search(text)
+    start = 0
+    if first is not None and first.start() > width // 3:
+        start = first.start() - width // 3
+    end = min(len(text), start + width)
+
+    parts = ['…' if start > 0 else '']
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        parts.append(html.escape(text[pos:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        pos = match.end()
+    parts.append(html.escape(text[pos:end]))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
+
+
+class SearchIndex:
+    """대화록 전문 검색을 위한 인메모리 역색인
+
+    토큰마다 {문서 번호: 등장 횟수}를 보관하고, 질의는 BM25로 점수를 매겨 상위 결과만
+    돌려줍니다. 대화록이 저장될 때마다 add()로 한 줄씩 갱신하고, 서버가 시작되면
+    load()로 Firestore의 최근 대화록을 페이지 단위로 읽어 채웁니다. (같은 문서는 한 번만 색인)
+    max_documents줄을 넘으면 가장 오래된 줄부터 색인에서 뺍니다.
+
+    색인은 프로세스마다 따로 있습니다. 여러 워커로 실행하면(SOCKETIO_MESSAGE_QUEUE) 각 워커는
+    처음 읽은 대화록과 자기가 저장한 줄만 알고, 다른 워커가 그 뒤에 저장한 줄은 모릅니다.
+    """
+
+    def __init__(self, max_documents=None):
+        self.max_documents = max_documents or SEARCH_MAX_DOCUMENTS
+        self._lock = threading.RLock()
+        self._postings = {}  # token -> {doc_no: tf}
+        self._docs = {}  # doc_no -> (doc_id, meeting_id, timestamp, speaker, text)
+        self._ids = {}  # doc_id -> doc_no
+        self._by_meeting = {}  # meeting_id -> set(doc_no)
+        # 점수 계산과 기간 필터가 자주 읽는 값은 따로 둡니다.
+        self._lengths = {}
+        self._timestamps = {}
+        self._total_length = 0
+        self._next_no = 0
+        # 오래된 순서로 빼기 위한 (시각, 문서 번호) 힙. 시각이 없는 줄이 가장 먼저 빠집니다.
+        self._oldest = []
+        self.loaded = False
+        self.loading = False
+        # 최대 줄 수에 닿아 오래된 대화록을 색인하지 않았거나 뺐으면 True
+        self.truncated = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, line):
+        """대화록 한 줄(meeting_id, speaker, text, timestamp)을 색인합니다."""
+        tokens = tokenize(line.get('text'))
+        timestamp = line.get('timestamp')
+        with self._lock:
+            if doc_id in self._ids:
+                return False
+            doc_no = self._next_no
+            self._next_no += 1
+            self._ids[doc_id] = doc_no
+            self._docs[doc_no] = (doc_id, line.get('meeting_id'), timestamp, line.get('speaker'), line.get('text') or '')
+            self._lengths[doc_no] = len(tokens)
+            self._timestamps[doc_no] = timestamp
+            self._total_length += len(tokens)
+            self._by_meeting.setdefault(line.get('meeting_id'), set()).add(doc_no)
+            for token in tokens:
+                postings = self._postings.setdefault(token, {})
+                postings[doc_no] = postings.get(doc_no, 0) + 1
+            heapq.heappush(self._oldest, ((timestamp is not None, timestamp or 0), doc_no))
+            while len(self._docs) > self.max_documents:
+                self._remove(heapq.heappop(self._oldest)[1])
+                self.truncated = True
+        return doc_id in self._ids
+
+    def _remove(self, doc_no):
+        doc_id, meeting_id, _, _, text = self._docs.pop(doc_no)
+        del self._ids[doc_id]
+        del self._timestamps[doc_no]
+        self._total_length -= self._lengths.pop(doc_no)
+        meeting_docs = self._by_meeting[meeting_id]
+        meeting_docs.discard(doc_no)
+        if not meeting_docs:
+            del self._by_meeting[meeting_id]
+        for token in set(tokenize(text)):
+            postings = self._postings[token]
+            del postings[doc_no]
+            if not postings:
+                del self._postings[token]
+
+    def load(self, db, page_size=None):
+        """Firestore에 저장된 대화록을 최근 것부터 max_documents줄까지 색인합니다. 백그라운드 작업으로 실행합니다."""
+        with self._lock:
+            if self.loaded or self.loading:
+                return
+            self.loading = True
+        count, cursor = 0, None
+        try:
+            query = db.collection('transcripts')
+            while True:
+                lines, cursor = fetch_page(query, 'timestamp', 'DESCENDING', limit=page_size or SEARCH_LOAD_PAGE_SIZE,
+                                           fields=['meeting_id', 'speaker', 'text', 'timestamp'], cursor=cursor)
+                for line in lines:
+                    count += self.add(line['id'], line)
+                if cursor is None:
+                    break
+                if len(self._docs) >= self.max_documents:
+                    # 더 오래된 대화록은 읽지 않습니다.
+                    self.truncated = True
+                    break
+            self.loaded = True
+            logger.info(f"Search index loaded {count} transcripts ({len(self._postings)} terms)")
+        except Exception as e:
+            logger.error(f"Failed to load search index: {e}", exc_info=True)
+        finally:
+            self.loading = False
+
+    def search(self, query, meeting_id=None, start=None, end=None, limit=None):
+        """query와 맞는 대화록을 점수 순으로 반환합니다.
+
+        meeting_id로 미팅을, start <= timestamp < end로 기간을 제한할 수 있습니다.
+        """
+        terms = tokenize(query)
+        limit = limit or SEARCH_MAX_RESULTS
+        if not terms:
+            return []
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            lengths, timestamps = self._lengths, self._timestamps
+            # BM25: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * 길이 / 평균 길이))
+            base = _K1 * (1 - _B)
+            per_token = _K1 * _B / (self._total_length / n)
+            # 미팅을 지정하면 그 미팅의 문서만 훑습니다. (대부분 토큰의 목록보다 훨씬 작음)
+            meeting_docs = self._by_meeting.get(meeting_id, set()) if meeting_id is not None else None
+            scores = {}
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * terms.count(term) * (_K1 + 1)
+                matches = postings.items()
+                if meeting_docs is not None:
+                    if len(meeting_docs) < len(postings):
+                        matches = [(doc_no, postings[doc_no]) for doc_no in meeting_docs if doc_no in postings]
+                    else:
+                        matches = [(doc_no, tf) for doc_no, tf in matches if doc_no in meeting_docs]
+                if start is not None or end is not None:
+                    matches = [(doc_no, tf) for doc_no, tf in matches
+                               if timestamps[doc_no] is not None
+                               and (start is None or timestamps[doc_no] >= start)
+                               and (end is None or timestamps[doc_no] < end)]
+                for doc_no, tf in matches:
+                    scores[doc_no] = scores.get(doc_no, 0.0) + weight * tf / (tf + base + per_token * lengths[doc_no])
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            docs = [(self._docs[doc_no], score) for doc_no, score in top]
+
+        return [{
+            'id': doc_id,
+            'meeting_id': doc_meeting,
+            'speaker': speaker,
+            'timestamp': timestamp,
+            'score': round(score, 4),
+            'snippet': highlight(text, query),
+        } for (doc_id, doc_meeting, timestamp, speaker, text), score in docs]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'terms': len(self._postings),
+                'max_documents': self.max_documents,
+                'truncated': self.truncated,
+                'loaded': self.loaded,
+                'loading': self.loading,
+            }
+
+
+def parse_date(value, end_of_day=False):
+    """'YYYY-MM-DD'(또는 ISO 시각)를 UTC datetime으로 바꿉니다. end_of_day면 다음 날 0시를 반환합니다."""
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    if end_of_day and len(value) == 10:
+        parsed += datetime.timedelta(days=1)
+    return parsed
+
+
+search_index = SearchIndex()
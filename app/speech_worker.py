@@ -1,19 +1,156 @@
 # app/speech_worker.py
 
-import queue
-from google.cloud import speech
+import os
+import time
+import uuid
+import bisect
+import logging
+import threading
+from collections import deque
 from flask_socketio import SocketIO
-from flask import current_app
+
+from .audio_buffer import AudioRingBuffer
+from .vad import EnergyVAD, VAD_ENABLED
+from .resample import StreamingResampler
+from .clients import clients
+from .metrics import metrics
+from .interim import InterimEmitter
+
+logger = logging.getLogger(__name__)
+
+# Google STT 스트림은 약 5분이 지나면 끊기므로, 그 전에 새 스트림으로 교체합니다.
+STREAM_ROTATE_SECONDS = float(os.environ.get('STREAM_ROTATE_SECONDS', 240))
+# 확정되지 않은 오디오를 최대 몇 초까지 보관할지 (다시 보내기용)
+REPLAY_MAX_SECONDS = float(os.environ.get('REPLAY_MAX_SECONDS', 120))
+# 연속으로 실패하면 이 횟수까지만 다시 연결합니다.
+STREAM_MAX_RECONNECTS = int(os.environ.get('STREAM_MAX_RECONNECTS', 5))
+STREAM_RECONNECT_BACKOFF = float(os.environ.get('STREAM_RECONNECT_BACKOFF', 0.5))
+# VAD가 이 시간(초) 이상 침묵만 걸러 내면 스트림을 닫고, 음성이 다시 들어오면 새로 엽니다.
+STREAM_IDLE_CLOSE_SECONDS = float(os.environ.get('STREAM_IDLE_CLOSE_SECONDS', 5))
+
+
+def _is_channel_error(error):
+    """이 오류로 끝난 스트림은 채널 문제로 보고 풀에 실패로 반납합니다."""
+    # google.api_core는 불러오는 데 오래 걸리므로 import할 때가 아니라 필요할 때 불러옵니다.
+    from google.api_core import exceptions
+    return isinstance(error, (exceptions.ServiceUnavailable, exceptions.Unauthenticated))
+
+
+class StartupLatency:
+    """최근 세션들의 시작(start_session)부터 첫 인식 요청을 보내기까지 걸린 시간"""
+
+    def __init__(self, maxlen=1000):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': 0}
+        return {
+            'count': len(samples),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 1),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 1),
+            'max_ms': round(samples[-1] * 1000, 1),
+        }
+
+
+session_startup = StartupLatency()
+
+AUDIO_TO_INTERIM = metrics.histogram(
+    'speech_audio_to_first_interim_seconds',
+    'Time from receiving the audio an utterance\'s first interim result covers to that result')
+AUDIO_TO_FINAL = metrics.histogram(
+    'speech_audio_to_final_seconds', 'Time from receiving the audio a final result covers to that result')
+INTERIM_TO_FINAL = metrics.histogram(
+    'speech_interim_to_final_seconds', 'Time from an utterance\'s first interim result to its final result')
+FIRST_REQUEST = metrics.histogram(
+    'speech_session_first_request_seconds', 'Time from session start to the first recognize request')
+
+
+class _RecognizeStream:
+    """streaming_recognize 호출 하나의 상태"""
+
+    def __init__(self, base_offset, rotate_after_bytes, rotate_after_seconds):
+        self.base_offset = base_offset
+        # (스트림에 보낸 바이트 수, 세션 위치) 목록. 침묵을 건너뛴 곳마다 하나씩 추가됩니다.
+        self._positions = [0]
+        self._offsets = [base_offset]
+        self.rotate_after_bytes = rotate_after_bytes
+        self.rotate_after_seconds = rotate_after_seconds
+        self.opened_at = time.monotonic()
+        # 다시 보내는 꼬리 부분의 끝. 적어도 여기까지는 보낸 뒤에 교체합니다.
+        self.replay_end = base_offset
+        self.sent_bytes = 0
+        self.active = True
+        self.rotating = False
+        self.exhausted = False
+        self.idle = False
+        self.cursor = base_offset
+        self.call = None
+        self.lease = None
+
+    def mark_gap(self, session_offset):
+        """다음으로 보내는 오디오가 session_offset에서 시작함을 기록합니다."""
+        self._positions.append(self.sent_bytes)
+        self._offsets.append(session_offset)
+
+    def to_session(self, stream_bytes):
+        """스트림 기준 위치(결과의 result_end_time)를 세션 기준 위치로 바꿉니다."""
+        i = bisect.bisect_left(self._positions, stream_bytes) - 1
+        if i < 0:
+            return self.base_offset
+        return self._offsets[i] + (stream_bytes - self._positions[i])
+
+    def should_rotate(self):
+        return (self.sent_bytes >= self.rotate_after_bytes
+                or time.monotonic() - self.opened_at >= self.rotate_after_seconds)
+
+    def rotate(self):
+        """요청 스트림을 끝내고, 응답을 기다리지 않도록 호출을 취소합니다."""
+        self.rotating = True
+        cancel = getattr(self.call, 'cancel', None)
+        if cancel is not None:
+            cancel()
+
 
 class SpeechWorker:
-    """Google Speech-to-Text API 스트리밍을 관리하는 클래스"""
+    """Google Speech-to-Text API 스트리밍을 관리하는 클래스
+
+    스트림 길이 제한에 닿기 전(rotate_after초)에 새 스트림으로 교체하고, 오류가 나면
+    다시 연결합니다. 마지막 최종 결과 이후의 오디오는 버퍼에 남겨 두었다가 새 스트림에
+    다시 보내므로 단어가 빠지거나 중복되지 않으며, 결과의 시간 위치는 세션 시작
+    기준으로 이어집니다. VAD가 켜져 있으면 침묵 구간은 인식기로 보내지 않습니다.
+    클라이언트 오디오(input_rate, sample_format)는 먼저 인식기 레이트(sample_rate)의
+    16비트 PCM으로 리샘플링합니다. 인식 스트림은 프로세스 전체가 나눠 쓰는 채널 풀에서
+    빌려 열고, 스트림이 끝나면 반납합니다. (client를 주면 그 클라이언트만 씁니다.)
+    인스턴스가 종료될 때는 detach()로 인식을 멈추고 상태를 넘기며, 다른 인스턴스는 그 상태를
+    resume으로 받아 마지막 최종 결과 위치부터 같은 세션 시각으로 이어서 인식합니다.
+    """
 
-    def __init__(self, socketio: SocketIO, sid: str, language_code: str, sample_rate: int = 16000):
+    def __init__(self, socketio: SocketIO, sid: str, language_code: str, sample_rate: int = 16000,
+                 client=None, rotate_after: float = None, vad=None, replay_max_seconds: float = None,
+                 input_rate: int = None, sample_format: str = 'int16', pool=None, trace_id: str = None,
+                 resume: dict = None):
+        self.created_at = time.monotonic()
         self.socketio = socketio
         self.sid = sid
+        # 이 세션에서 보내는 이벤트와 로그에 붙는 추적 ID
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
         self.language_code = language_code
         self.sample_rate = sample_rate
-        self.client = speech.SpeechClient()
+        self.bytes_per_second = sample_rate * 2
+        self.input_rate = input_rate or sample_rate
+        self.sample_format = sample_format
+        self.resampler = StreamingResampler(self.input_rate, sample_rate, sample_format)
+        self.client = client
+        self.pool = pool if pool is not None else (clients.pool('speech') if client is None else None)
+        from google.cloud import speech
         self.config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
             sample_rate_hertz=self.sample_rate,
@@ -24,32 +161,179 @@ class SpeechWorker:
             config=self.config,
             interim_results=True
         )
-        self._buffer = queue.Queue()
+        self.rotate_after = rotate_after or STREAM_ROTATE_SECONDS
+        replay_max_seconds = replay_max_seconds or REPLAY_MAX_SECONDS
+        # 넘겨받은 세션은 마지막 최종 결과 위치에서 시작합니다.
+        start = resume['offset'] if resume else 0
+        self._buffer = AudioRingBuffer(max_bytes=int(replay_max_seconds * self.bytes_per_second), start=start)
+        if vad is None:
+            vad = VAD_ENABLED
+        self.vad = EnergyVAD(sample_rate) if vad is True else (vad or None)
+        self._idle_bytes = int(STREAM_IDLE_CLOSE_SECONDS * self.bytes_per_second)
+        self.sent_bytes = 0
+        # 최종 결과로 확정된 오디오의 끝 위치(바이트). 새 스트림은 여기서부터 다시 보냅니다.
+        self._final_offset = start
+        self.streams_opened = 0
+        self.first_request_seconds = None
+        # 지연 시간 측정용: 받은 오디오의 (세션 위치 끝, 받은 시각) 목록과 발화의 첫 중간 결과 시각
+        self._received_bytes = start
+        self._arrival_offsets = []
+        self._arrival_times = []
+        self._arrival_lock = threading.Lock()
+        self._first_interim_at = None
+        # 중간 결과는 간격을 두고 최신 것만, 바뀐 꼬리만 보냅니다. 최종 결과는 바로 보냅니다.
+        self.interim = InterimEmitter(lambda event, payload: self.socketio.emit(event, payload, to=self.sid))
+        self._cursor = start
         self.closed = False
+        # detach() 뒤에는 결과를 보내지 않습니다. 결과 처리와 detach()는 이 락으로 순서를 정합니다.
+        self.detached = False
+        self._result_lock = threading.Lock()
+        self._stream = None
+        if resume:
+            self._restore(resume)
+
+    def _restore(self, state):
+        """넘겨받은 확정되지 않은 오디오를 버퍼에 다시 넣고, 세션 위치를 이어 붙입니다."""
+        for offset, pcm in state['tail']:
+            self._buffer.append_at(offset, pcm)
+        position = max(state['position'], self._buffer.data_end)
+        self._buffer.advance(position)
+        self._received_bytes = position
+        if self.vad is not None:
+            self.vad.offset = position
+        with self._arrival_lock:
+            self._arrival_offsets.append(position)
+            self._arrival_times.append(time.monotonic())
 
-    def _generator(self):
+    def _generator(self, stream):
         """버퍼에서 오디오 청크를 가져와 API로 보낼 요청을 생성합니다."""
-        while not self.closed:
-            chunk = self._buffer.get()
+        from google.cloud import speech
+        offset = stream.base_offset
+        while stream.active:
+            if offset >= stream.replay_end and stream.should_rotate():
+                stream.rotate()
+                return
+            start, chunk = self._buffer.read(offset, timeout=0.2)
             if chunk is None:
+                stream.exhausted = True
+                return
+            if not chunk:
+                # 침묵만 이어지면 스트림을 닫아 요금이 나가지 않게 합니다.
+                if self._buffer.end - offset >= self._idle_bytes and offset > stream.base_offset:
+                    stream.idle = True
+                    return
+                continue
+            if not stream.active:
                 return
+            if start != offset:
+                stream.mark_gap(start)
+            offset = start + len(chunk)
+            stream.cursor = offset
+            self._cursor = offset
+            if self.first_request_seconds is None:
+                self.first_request_seconds = time.monotonic() - self.created_at
+                session_startup.record(self.first_request_seconds)
+                FIRST_REQUEST.observe(self.first_request_seconds)
+            stream.sent_bytes += len(chunk)
+            self.sent_bytes += len(chunk)
             yield speech.StreamingRecognizeRequest(audio_content=chunk)
 
+    def _open_stream(self):
+        stream = _RecognizeStream(
+            self._final_offset,
+            int(self.rotate_after * self.bytes_per_second),
+            self.rotate_after,
+        )
+        stream.replay_end = self._buffer.data_end
+        self._stream = stream
+        self.streams_opened += 1
+        client = self.client
+        if self.pool is not None:
+            stream.lease = self.pool.acquire()
+            client = stream.lease.client
+        stream.call = client.streaming_recognize(
+            config=self.streaming_config,
+            requests=self._generator(stream)
+        )
+        return stream
+
     def process(self):
         """API로부터 응답을 받고 실시간으로 클라이언트에 전송합니다."""
-        try:
-            requests = self._generator()
-            responses = self.client.streaming_recognize(
-                config=self.streaming_config,
-                requests=requests
-            )
-            self._listen_for_responses(responses)
-        except Exception as e:
-            current_app.logger.error(f"Speech worker error for {self.sid}: {e}")
-
-    def _listen_for_responses(self, responses):
+        failures = 0
+        while True:
+            # 보낼 오디오가 생기기 전에는 스트림을 열지 않습니다. (오디오 없는 스트림은 시간 초과로 끊김)
+            if self.detached or not self._wait_for_audio(self._final_offset):
+                return
+            stream = None
+            error = None
+            progress = self._final_offset
+            try:
+                stream = self._open_stream()
+                self._listen_for_responses(stream.call, stream)
+            except Exception as e:
+                error = e
+            finally:
+                if stream is not None:
+                    stream.active = False
+                    if stream.lease is not None:
+                        self.pool.release(stream.lease, failed=_is_channel_error(error))
+
+            if self.detached:
+                return
+            if stream is not None and stream.rotating:
+                logger.info(f"Rotated speech stream for {self.sid} at {self._final_offset / self.bytes_per_second:.2f}s")
+                failures = 0
+                continue
+            if stream is not None and stream.idle and error is None:
+                self._drop_unrecognized(stream.cursor)
+                failures = 0
+                continue
+            if stream is not None and stream.exhausted and error is None:
+                return
+            if self._final_offset > progress:
+                failures = 0
+            failures += 1
+            if failures > STREAM_MAX_RECONNECTS:
+                logger.error(f"Speech worker error for {self.sid}, giving up: {error}")
+                # 더 이상 보내지 않을 오디오를 계속 쌓아 두지 않도록 닫습니다.
+                self.close()
+                self.socketio.emit('transcription_error', {'message': 'Speech recognition stopped.',
+                                                           'trace_id': self.trace_id}, to=self.sid)
+                return
+            logger.warning(f"Speech stream ended for {self.sid} ({error}), reconnecting ({failures})")
+            time.sleep(STREAM_RECONNECT_BACKOFF * failures)
+
+    def _drop_unrecognized(self, offset):
+        """침묵으로 닫은 스트림이 최종 결과 없이 끝낸 오디오(기침, 잡음 등)를 다시 보내지 않도록 버립니다.
+
+        요청을 끝낸 스트림은 받은 오디오의 최종 결과를 모두 보낸 뒤에 닫히므로, 그때까지
+        확정되지 않은 부분은 인식할 말이 없는 소리입니다. 버리지 않으면 새 오디오가 없는데도
+        그 꼬리를 보내는 스트림을 계속 다시 엽니다.
+        """
+        with self._result_lock:
+            if offset <= self._final_offset:
+                return
+            logger.info(f"Dropped {(offset - self._final_offset) / self.bytes_per_second:.2f}s of unrecognized "
+                        f"audio for {self.sid} after silence")
+            self._final_offset = offset
+            self._buffer.release(offset)
+            self._forget_arrivals(offset)
+
+    def _wait_for_audio(self, offset):
+        """offset 이후에 보낼 오디오가 생길 때까지 기다립니다. 세션이 끝나면 False를 반환합니다."""
+        while True:
+            _, chunk = self._buffer.read(offset, timeout=1.0)
+            if chunk is None:
+                return False
+            if chunk:
+                return True
+
+    def _listen_for_responses(self, responses, stream=None):
         """응답을 분석하여 최종 또는 중간 결과를 클라이언트로 보냅니다."""
         for response in responses:
+            # 교체 중인 스트림의 나머지 결과는 새 스트림이 다시 인식하므로 버립니다.
+            if stream is not None and stream.rotating:
+                break
             if not response.results:
                 continue
 
@@ -57,22 +341,150 @@ class SpeechWorker:
             if not result.alternatives:
                 continue
 
-            transcript = result.alternatives[0].transcript
+            with self._result_lock:
+                # detach()한 뒤의 결과는 세션을 넘겨받은 인스턴스가 다시 인식하므로 버립니다.
+                if self.detached:
+                    break
+                self._handle_result(result, stream)
+
+    def _handle_result(self, result, stream):
+        transcript = result.alternatives[0].transcript
+        now = time.monotonic()
+        end_bytes = int(result.result_end_time.total_seconds() * self.sample_rate) * 2
+        end_offset = stream.to_session(end_bytes) if stream is not None else end_bytes
+        received_at = self._arrival_time(end_offset)
 
-            if result.is_final:
-                current_app.logger.info(f"Final transcript for {self.sid}: {transcript}")
-                self.socketio.emit('final_transcript', {'transcript': transcript}, to=self.sid)
-            else:
-                self.socketio.emit('interim_transcript', {'transcript': transcript}, to=self.sid)
+        if result.is_final:
+            start = self._final_offset / self.bytes_per_second
+            self._final_offset = max(self._final_offset, end_offset)
+            self._buffer.release(self._final_offset)
+            self._forget_arrivals(self._final_offset)
+            if received_at is not None:
+                AUDIO_TO_FINAL.observe(now - received_at)
+            if self._first_interim_at is not None:
+                INTERIM_TO_FINAL.observe(now - self._first_interim_at)
+                self._first_interim_at = None
+            logger.info(f"Final transcript for {self.sid} [{self.trace_id}]: {transcript}")
+            self.interim.final({
+                'transcript': transcript,
+                'start': round(start, 3),
+                'end': round(self._final_offset / self.bytes_per_second, 3),
+                'trace_id': self.trace_id,
+            })
+        else:
+            if self._first_interim_at is None:
+                self._first_interim_at = now
+                if received_at is not None:
+                    AUDIO_TO_INTERIM.observe(now - received_at)
+            self.interim.interim(transcript, trace_id=self.trace_id)
+
+    def _arrival_time(self, offset):
+        """세션 위치 offset의 오디오를 받은 시각. 모르면 None."""
+        with self._arrival_lock:
+            i = bisect.bisect_left(self._arrival_offsets, offset)
+            return self._arrival_times[i] if i < len(self._arrival_times) else None
+
+    def _forget_arrivals(self, offset):
+        with self._arrival_lock:
+            i = bisect.bisect_right(self._arrival_offsets, offset)
+            del self._arrival_offsets[:i]
+            del self._arrival_times[:i]
 
     def add_audio_chunk(self, chunk):
-        """메인 스레드에서 오디오 데이터를 버퍼에 추가합니다."""
-        if not self.closed:
-            self._buffer.put(chunk)
+        """메인 스레드에서 오디오 데이터를 버퍼에 추가합니다.
+
+        인식기 레이트로 바꾼 16비트 PCM을 반환합니다. (아카이브에 같은 오디오를 남기기 위해)
+        """
+        pcm = self.resampler.process(chunk)
+        if self.closed or not pcm:
+            return pcm
+        self._received_bytes += len(pcm)
+        with self._arrival_lock:
+            self._arrival_offsets.append(self._received_bytes)
+            self._arrival_times.append(time.monotonic())
+            overflow = len(self._arrival_offsets) > 1000
+        if overflow:
+            # 결과가 오랫동안 없으면 버퍼에서 이미 버려진 오디오의 기록을 지웁니다.
+            self._forget_arrivals(self._buffer.start)
+        if self.vad is None:
+            self._buffer.append(pcm)
+            return pcm
+        for offset, voiced in self.vad.feed(pcm):
+            self._buffer.append_at(offset, voiced)
+        self._buffer.advance(self.vad.offset)
+        return pcm
+
+    @property
+    def pending_bytes(self):
+        """버퍼에 들어왔지만 아직 인식기로 보내지 않은 오디오 바이트 수"""
+        return self._buffer.bytes_after(self._cursor)
+
+    @property
+    def buffered_bytes(self):
+        """다시 보내기용으로 보관 중인 오디오 바이트 수 (확정되지 않은 꼬리 포함)"""
+        return self._buffer.stored_bytes
+
+    def stats(self):
+        received = self._buffer.end / self.bytes_per_second
+        return {
+            'sid': self.sid,
+            'trace_id': self.trace_id,
+            'pending_bytes': self.pending_bytes,
+            'buffered_bytes': self.buffered_bytes,
+            'streams_opened': self.streams_opened,
+            'audio_seconds': round(received, 3),
+            'sent_seconds': round(self.sent_bytes / self.bytes_per_second, 3),
+            'gated_ratio': round(self.vad.gated_ratio, 4) if self.vad is not None else 0.0,
+            'first_request_ms': round(self.first_request_seconds * 1000, 1) if self.first_request_seconds else None,
+            'interim': self.interim.stats(),
+        }
 
     def close(self):
-        """스트림을 안전하게 종료합니다."""
+        """스트림을 안전하게 종료합니다. 남은 오디오는 마지막 스트림이 마저 보냅니다."""
         if not self.closed:
-            current_app.logger.info(f"Closing speech worker for {self.sid}")
+            if self.vad is not None:
+                for offset, voiced in self.vad.flush():
+                    self._buffer.append_at(offset, voiced)
+            logger.info(f"Closing speech worker for {self.sid}: {self.stats()}")
             self.closed = True
-            self._buffer.put(None)
\ No newline at end of file
+            self._buffer.close()
+
+    def detach(self, max_tail_seconds=None):
+        """인식을 멈추고, 다른 인스턴스가 이어서 인식할 수 있는 세션 상태를 반환합니다.
+
+        마지막 최종 결과 이후의 오디오(tail)를 함께 넘기므로 새 워커가 그 부분부터 다시
+        인식하면 단어가 빠지거나 겹치지 않습니다. tail이 max_tail_seconds보다 길면 앞부분을
+        버리고 남은 부분의 시작에서 이어 갑니다. 이 워커는 이후의 결과를 보내지 않습니다.
+        """
+        if self.vad is not None and not self.closed:
+            for offset, voiced in self.vad.flush():
+                self._buffer.append_at(offset, voiced)
+        with self._result_lock:
+            self.detached = True
+            position = self._buffer.end
+            offset = self._final_offset
+            if max_tail_seconds is not None:
+                offset = max(offset, position - int(max_tail_seconds * self.sample_rate) * 2)
+            tail = self._buffer.spans(offset)
+        if offset > self._final_offset:
+            logger.warning(f"Dropped {(offset - self._final_offset) / self.bytes_per_second:.1f}s of unfinalized "
+                           f"audio from the handoff of {self.sid}")
+        self.interim.cancel()
+        self.closed = True
+        self._buffer.close()
+        stream = self._stream
+        if stream is not None:
+            stream.active = False
+            cancel = getattr(stream.call, 'cancel', None)
+            if cancel is not None:
+                cancel()
+        logger.info(f"Detached speech worker for {self.sid} at {offset / self.bytes_per_second:.2f}s "
+                    f"({sum(len(pcm) for _, pcm in tail) / self.bytes_per_second:.2f}s unfinalized)")
+        return {
+            'trace_id': self.trace_id,
+            'language_code': self.language_code,
+            'sample_rate': self.sample_rate,
+            'offset': offset,
+            'position': position,
+            'tail': tail,
+        }
@@ -1,14 +1,44 @@
-class ResamplingProcessor extends AudioWorkletProcessor {
+// 서버의 app/audio_frames.py와 같은 프레임 형식입니다.
+// 헤더 12바이트: 버전(u8), 플래그(u8), 예약(u16), 순번(u32), 세션 시작 기준 시각 ms(u32), 리틀 엔디언
+const FRAME_VERSION = 1;
+const FRAME_HEADER_BYTES = 12;
+// 렌더 퀀텀(128샘플)마다 보내지 않고 약 100ms씩 모아서 보냅니다.
+const FRAME_MS = 100;
+
+// 마이크 오디오를 원래 샘플 레이트 그대로 16-bit PCM 프레임으로 만듭니다.
+// (리샘플링은 서버에서 저역 통과 필터를 거쳐 합니다. app/resample.py)
+class FramingProcessor extends AudioWorkletProcessor {
   constructor() {
     super();
-    // Google STT가 요구하는 목표 샘플 레이트는 16kHz입니다.
-    this.targetSampleRate = 16000;
-    
     // 이 프로세서가 생성될 때의 실제 입력 샘플 레이트입니다. (예: 48000)
-    this.inputSampleRate = sampleRate; 
-    
-    this.resampleRatio = this.inputSampleRate / this.targetSampleRate;
-    this.position = 0;
+    this.inputSampleRate = sampleRate;
+
+    this.frameSamples = Math.round(this.inputSampleRate * FRAME_MS / 1000);
+    this.seq = 0;
+    this.sentSamples = 0;
+    this.newFrame();
+  }
+
+  newFrame() {
+    // 보낸 버퍼는 메인 스레드로 넘어가므로(transfer) 프레임마다 새로 만듭니다.
+    this.frame = new ArrayBuffer(FRAME_HEADER_BYTES + this.frameSamples * 2);
+    this.samples = new Int16Array(this.frame, FRAME_HEADER_BYTES);
+    this.filled = 0;
+  }
+
+  flushFrame() {
+    const header = new DataView(this.frame, 0, FRAME_HEADER_BYTES);
+    header.setUint8(0, FRAME_VERSION);
+    header.setUint8(1, 0);
+    header.setUint16(2, 0, true);
+    header.setUint32(4, this.seq, true);
+    // 시각은 오디오 클럭(보낸 샘플 수) 기준이라 메인 스레드가 밀려도 어긋나지 않습니다.
+    header.setUint32(8, Math.round(this.sentSamples * 1000 / this.inputSampleRate), true);
+    this.port.postMessage(this.frame, [this.frame]);
+
+    this.seq += 1;
+    this.sentSamples += this.filled;
+    this.newFrame();
   }
 
   process(inputs) {
@@ -18,30 +48,24 @@ class ResamplingProcessor extends AudioWorkletProcessor {
       return true;
     }
     
-    const output = [];
-    
-    // 입력 데이터를 순회하며, 비율에 맞춰 샘플을 추출합니다.
-    while (this.position < inputData.length) {
-      output.push(inputData[Math.floor(this.position)]);
-      this.position += this.resampleRatio;
-    }
-    
-    // 다음 블록 처리를 위해 현재 블록의 길이를 빼줍니다.
-    this.position -= inputData.length;
-
-    if (output.length > 0) {
-      // 16-bit PCM 형식으로 변환합니다.
-      const int16Array = new Int16Array(output.length);
-      for(let i = 0; i < output.length; i++) {
-        int16Array[i] = Math.min(1, output[i]) * 0x7FFF;
+    let i = 0;
+    while (i < inputData.length) {
+      const count = Math.min(inputData.length - i, this.frameSamples - this.filled);
+      for (let j = 0; j < count; j++) {
+        // 16-bit PCM 형식으로 변환합니다.
+        this.samples[this.filled + j] = Math.max(-1, Math.min(1, inputData[i + j])) * 0x7FFF;
+      }
+      this.filled += count;
+      i += count;
+
+      if (this.filled === this.frameSamples) {
+        // 프레임이 다 찼으면 메인 스레드로 보냅니다.
+        this.flushFrame();
       }
-      
-      // 변환된 데이터를 메인 스레드로 보냅니다.
-      this.port.postMessage(int16Array.buffer, [int16Array.buffer]);
     }
     
     return true;
   }
 }
 
-registerProcessor('resampling-processor', ResamplingProcessor);
+registerProcessor('framing-processor', FramingProcessor);
@@ -13,6 +13,14 @@ document.addEventListener('DOMContentLoaded', () => {
     let processor;
     let input;
     let globalStream;
+    // 서버 인스턴스가 종료되며 세션을 넘기는 중인지, 다시 보낼 세션 시작 정보와 오디오 프레임
+    let handingOff = false;
+    let resumeToken = null;
+    let sessionOptions = null;
+    let pendingFrames = [];
+    const recentFrames = [];
+    const RECENT_FRAME_LIMIT = 50;   // 약 5초 (100ms 프레임)
+    const PENDING_FRAME_LIMIT = 600; // 다시 연결하는 동안 최대 약 60초까지 모아 둠
 
     // --- 오디오 제약 조건 ---
     const constraints = { audio: true, video: false };
@@ -31,16 +39,24 @@ document.addEventListener('DOMContentLoaded', () => {
      * 서버와의 웹소켓 연결을 설정하고 이벤트 핸들러를 등록하는 함수
      */
     function connectSocket() {
-        // 현재 위치를 기준으로 소켓에 연결합니다.
-        socket = io.connect(location.protocol + '//' + document.domain + ':' + location.port);
+        // 현재 위치를 기준으로 소켓에 연결합니다. 서버가 여러 워커 프로세스로 실행되어도 한 연결이
+        // 한 프로세스에 머물도록 롱 폴링 없이 웹소켓으로만 연결합니다.
+        socket = io.connect(location.protocol + '//' + document.domain + ':' + location.port,
+                            { transports: ['websocket'] });
 
         socket.on('connect', () => {
             console.log("Socket connected!");
+            if (handingOff && isRecording) {
+                resumeSession();
+                return;
+            }
             updateStatus('Ready to start');
         });
 
         socket.on('disconnect', () => {
             console.log("Socket disconnected!");
+            // 세션을 넘기는 중이면 녹음을 멈추지 않고 다시 연결합니다.
+            if (handingOff) return;
             updateStatus('Disconnected', true);
             // 연결이 끊겼을 때 녹음 중이었다면 중지 처리
             if (isRecording) {
@@ -48,8 +64,30 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         });
 
+        // 서버 인스턴스가 종료되는 중: 다른 인스턴스에 다시 연결해 같은 세션을 이어 갑니다.
+        socket.on('session_handoff', (data) => {
+            if (!isRecording) return;
+            handingOff = true;
+            resumeToken = data.resume_token;
+            // 서버가 받지 못했을 수 있는 프레임(next_seq 이후)을 다시 보낼 목록에 넣습니다.
+            // (next_seq가 없으면 세션을 시작하지 못한 것이므로 최근 프레임을 모두 다시 보냄)
+            pendingFrames = data.next_seq === null || data.next_seq === undefined ? recentFrames.slice() :
+                recentFrames.filter((frame) => new DataView(frame).getUint32(4, true) >= data.next_seq);
+            updateStatus('Reconnecting...');
+            socket.disconnect();
+            socket.connect();
+        });
+
+        // 서버 측 음성 인식이 다시 연결하지 못하고 멈춘 경우
+        socket.on('transcription_error', (data) => {
+            updateStatus(data.message, true);
+        });
+
         // 중간 음성 인식 결과 수신
+        // 서버는 앞에서 그대로인 길이(keep)와 바뀐 꼬리(tail)만 보냅니다. (전체 문장을 보내면 transcript)
+        let interimText = '';
         socket.on('interim_transcript', (data) => {
+            interimText = data.transcript !== undefined ? data.transcript : interimText.slice(0, data.keep) + data.tail;
             // 최종 결과가 표시되기 전까지 임시 결과를 보여줌
             const finalTranscriptElement = transcriptDiv.querySelector('.final');
             if (!finalTranscriptElement || finalTranscriptElement.textContent.includes('You:')) {
@@ -59,7 +97,7 @@ document.addEventListener('DOMContentLoaded', () => {
                      tempP.className = 'interim';
                      transcriptDiv.appendChild(tempP);
                  }
-                 tempP.textContent = `You: ${data.transcript}...`;
+                 tempP.textContent = `You: ${interimText}...`;
                  transcriptDiv.scrollTop = transcriptDiv.scrollHeight;
             }
         });
@@ -67,6 +105,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // 최종 음성 인식 결과 수신
         socket.on('final_transcript', (data) => {
             // 임시 결과를 지우고 최종 결과를 표시
+            interimText = '';
             const tempP = transcriptDiv.querySelector('.interim');
             if (tempP) {
                 tempP.remove();
@@ -79,6 +118,31 @@ document.addEventListener('DOMContentLoaded', () => {
             transcriptDiv.scrollTop = transcriptDiv.scrollHeight;
         });
 
+        // 스트리밍 AI 응답: 조각이 도착할 때마다 같은 문단에 이어 붙임
+        socket.on('ai_response_delta', (data) => {
+            let p = aiResponseDiv.querySelector(`p[data-suggestion-id="${data.id}"]`);
+            if (!p) {
+                p = document.createElement('p');
+                p.dataset.suggestionId = data.id;
+                const label = document.createElement('strong');
+                label.textContent = 'AI:';
+                p.appendChild(label);
+                p.appendChild(document.createTextNode(' '));
+                p.appendChild(document.createElement('span'));
+                aiResponseDiv.appendChild(p);
+            }
+            p.querySelector('span').textContent += data.delta;
+            aiResponseDiv.scrollTop = aiResponseDiv.scrollHeight;
+        });
+
+        // 스트리밍 완료: 최종 텍스트로 정리
+        socket.on('ai_response_done', (data) => {
+            const p = aiResponseDiv.querySelector(`p[data-suggestion-id="${data.id}"]`);
+            if (p) {
+                p.querySelector('span').textContent = data.text;
+            }
+        });
+
         // AI 응답 수신
         socket.on('ai_response', (data) => {
             const p = document.createElement('p');
@@ -88,11 +152,26 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    /**
+     * 다른 서버 인스턴스에서 세션을 이어 가고, 다시 연결하는 동안 모아 둔 오디오를 보내는 함수
+     */
+    function resumeSession() {
+        socket.emit('start_session', Object.assign({}, sessionOptions, { resume_token: resumeToken }), () => {
+            handingOff = false;
+            resumeToken = null;
+            pendingFrames.forEach((frame) => socket.emit('audio_stream', frame));
+            pendingFrames = [];
+            updateStatus('Listening...');
+        });
+    }
+
     /**
      * 로컬 오디오 스트림을 중지하고 관련 리소스를 해제하는 함수
      */
     function stopRecording() {
         if (!isRecording) return;
+        handingOff = false;
+        pendingFrames = [];
 
         if (globalStream) {
             globalStream.getTracks().forEach(track => track.stop());
@@ -139,22 +218,33 @@ document.addEventListener('DOMContentLoaded', () => {
 
                 // 3. 서버로 세션 시작 이벤트 전송 (MEETING_ID 포함)
                 // 이 시점에서는 audioContext.sampleRate를 정확히 알 수 있음
-                socket.emit('start_session', {
+                sessionOptions = {
                     meeting_id: MEETING_ID, // meeting.html에서 정의된 전역 변수
                     answer_style_id: answerStyleSelect.value,
-                    sample_rate: audioContext.sampleRate
-                });
+                    sample_rate: audioContext.sampleRate,
+                    sample_format: 'int16',
+                    // 오디오를 순번/시각 헤더가 붙은 약 100ms 프레임으로, 원래 샘플 레이트 그대로 보냅니다.
+                    // (16kHz로 줄이는 리샘플링은 서버에서 합니다. audio-processor.js)
+                    framing: 1
+                };
+                socket.emit('start_session', sessionOptions);
 
                 console.log(`Session started for meeting ${MEETING_ID} with sample rate ${audioContext.sampleRate}`);
                 
                 // 4. 오디오 처리 노드 생성 및 연결
                 input = audioContext.createMediaStreamSource(globalStream);
-                processor = new AudioWorkletNode(audioContext, 'audio-processor');
+                processor = new AudioWorkletNode(audioContext, 'framing-processor');
 
                 // 5. 오디오 프로세서에서 처리된 데이터를 서버로 전송
                 processor.port.onmessage = (event) => {
                     const audioData = event.data;
-                    if (socket && socket.connected) {
+                    recentFrames.push(audioData);
+                    if (recentFrames.length > RECENT_FRAME_LIMIT) recentFrames.shift();
+                    if (handingOff) {
+                        // 새 인스턴스가 세션을 이어받을 때까지 모아 둡니다.
+                        pendingFrames.push(audioData);
+                        if (pendingFrames.length > PENDING_FRAME_LIMIT) pendingFrames.shift();
+                    } else if (socket && socket.connected) {
                         socket.emit('audio_stream', audioData);
                     }
                 };
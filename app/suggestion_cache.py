@@ -0,0 +1,173 @@
+# app/suggestion_cache.py
+
+import os
+import re
+import zlib
+import hashlib
+import threading
+import unicodedata
+from collections import deque, namedtuple
+
+import numpy as np
+
+from .cache import TTLCache
+
+SUGGESTION_CACHE_ENABLED = os.environ.get('SUGGESTION_CACHE_ENABLED', '1') != '0'
+SUGGESTION_CACHE_TTL = float(os.environ.get('SUGGESTION_CACHE_TTL', 3600))
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.environ.get('SUGGESTION_CACHE_MAX_ENTRIES', 5000))
+# 0보다 크면 정확히 같지 않아도 MinHash로 추정한 유사도가 이 값 이상인 질문의 응답을 재사용합니다.
+SUGGESTION_CACHE_SIMILARITY = float(os.environ.get('SUGGESTION_CACHE_SIMILARITY', 0))
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+CachedSuggestion = namedtuple('CachedSuggestion', 'text latency similarity')
+
+# MinHash 매개변수: 해시 64개를 4개씩 16개 밴드로 나눠 후보를 찾습니다. (LSH)
+_NUM_PERM = 64
+_BAND_ROWS = 4
+_SHINGLE = 3
+_PRIME = np.uint64(4294967311)  # 2^32보다 큰 소수
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 2 ** 32, _NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), _NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text):
+    """대소문자, 문장 부호, 공백 차이를 없앱니다. ("What's the price?" == "whats the price")"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = _PUNCTUATION.sub('', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def minhash(normalized):
+    """글자 3-gram 집합의 MinHash 서명(uint64 배열)을 계산합니다."""
+    text = normalized.replace(' ', '_')
+    if len(text) < _SHINGLE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + _SHINGLE] for i in range(len(text) - _SHINGLE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * h + b) mod p 를 해시 함수마다 계산해 최솟값을 고릅니다. a, h < 2^32라 곱이 uint64를 넘지 않습니다.
+    values = (_A[:, None] * hashes[None, :] % _PRIME + _B[:, None]) % _PRIME
+    return values.min(axis=1)
+
+
+class SuggestionCache:
+    """(미팅, 정규화한 대화록, 스타일 프롬프트, 언어)별 AI 제안 캐시
+
+    응답은 그 미팅의 요약과 최근 대화를 맥락으로 만들어지므로 같은 미팅 안에서만 재사용합니다.
+    같은 질문은 정확히 일치하는 키로 찾고, similarity가 0보다 크면 같은 미팅/스타일/언어의
+    질문 중 MinHash 유사도가 similarity 이상인 것도 재사용합니다. 항목은 TTLCache(LRU + TTL)에
+    보관하고, 적중할 때마다 원래 응답에 걸렸던 시간을 아낀 시간으로 더합니다.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, similarity=None, clock=None):
+        kwargs = {'clock': clock} if clock is not None else {}
+        self._entries = TTLCache(maxsize=maxsize or SUGGESTION_CACHE_MAX_ENTRIES,
+                                 ttl=ttl or SUGGESTION_CACHE_TTL, **kwargs)
+        self.similarity = SUGGESTION_CACHE_SIMILARITY if similarity is None else similarity
+        self._lock = threading.Lock()
+        self._bands = {}  # (스타일/언어 키, 밴드 번호, 밴드 해시) -> deque(항목 키)
+        self._signatures = {}  # 항목 키 -> MinHash 서명
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def _scope(meeting_id, style_prompt, language):
+        return hashlib.sha1(f"{meeting_id}\0{language}\0{style_prompt}".encode()).hexdigest()
+
+    def _band_keys(self, scope, signature):
+        rows = signature.reshape(-1, _BAND_ROWS)
+        return [(scope, band, row.tobytes()) for band, row in enumerate(rows)]
+
+    def get(self, transcript, meeting_id, style_prompt, language):
+        """캐시된 응답을 CachedSuggestion으로 반환합니다. 없으면 None."""
+        normalized = normalize(transcript)
+        if not normalized:
+            return None
+        scope = self._scope(meeting_id, style_prompt, language)
+        key = (scope, normalized)
+        with self._lock:
+            self.lookups += 1
+        entry = self._entries.get(key)
+        if entry is not None:
+            return self._hit(entry, 1.0, exact=True)
+        if self.similarity <= 0:
+            return None
+
+        signature = minhash(normalized)
+        best, best_similarity = None, 0.0
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(scope, signature):
+                candidates.update(self._bands.get(band_key, ()))
+            for candidate in candidates:
+                other = self._signatures.get(candidate)
+                if other is None:
+                    continue
+                similarity = float(np.mean(signature == other))
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+        if best is None or best_similarity < self.similarity:
+            return None
+        entry = self._entries.get(best)
+        if entry is None:
+            # TTL이 지났거나 LRU에서 밀려난 항목입니다.
+            with self._lock:
+                self._signatures.pop(best, None)
+            return None
+        return self._hit(entry, best_similarity, exact=False)
+
+    def _hit(self, entry, similarity, exact):
+        text, latency = entry
+        with self._lock:
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            self.latency_saved += latency
+        return CachedSuggestion(text, latency, round(similarity, 3))
+
+    def put(self, transcript, meeting_id, style_prompt, language, text, latency):
+        """OpenAI에서 받은 응답과 걸린 시간(초)을 저장합니다."""
+        normalized = normalize(transcript)
+        if not normalized or not text:
+            return
+        scope = self._scope(meeting_id, style_prompt, language)
+        key = (scope, normalized)
+        self._entries.set(key, (text, latency))
+        if self.similarity <= 0:
+            return
+        signature = minhash(normalized)
+        with self._lock:
+            self._signatures[key] = signature
+            for band_key in self._band_keys(scope, signature):
+                # 밴드마다 최근 항목 몇 개만 후보로 둡니다.
+                self._bands.setdefault(band_key, deque(maxlen=8)).append(key)
+            if len(self._signatures) > 2 * self._entries.maxsize:
+                self._prune()
+
+    def _prune(self):
+        # self._lock을 잡은 상태에서 호출됩니다. 캐시에서 빠진 항목의 서명과 밴드를 지웁니다.
+        live = {key for key in self._signatures if key in self._entries}
+        self._signatures = {key: sig for key, sig in self._signatures.items() if key in live}
+        self._bands = {band: keys for band, keys in self._bands.items() if any(k in live for k in keys)}
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            return dict(
+                self._entries.stats(),
+                lookups=self.lookups,
+                exact_hits=self.exact_hits,
+                near_hits=self.near_hits,
+                hit_rate=round(hits / self.lookups, 4) if self.lookups else 0.0,
+                latency_saved_s=round(self.latency_saved, 3),
+                near_duplicate_threshold=self.similarity,
+            )
+
+
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,113 @@
+# app/suggestions.py
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+
+from .utils import stream_gpt_suggestion
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# '0'으로 설정하면 예전처럼 완성된 응답을 'ai_response' 한 번으로 보냅니다.
+AI_STREAMING = os.environ.get('AI_STREAMING', '1') != '0'
+
+# source: 'openai'(요청해서 받은 응답) 또는 'cache'(캐시에서 바로 보낸 응답)
+FINAL_TO_FIRST_TOKEN = metrics.histogram(
+    'ai_final_to_first_token_seconds', 'Time from receiving a final transcript to the first AI token sent',
+    labels=('source',))
+FINAL_TO_DONE = metrics.histogram(
+    'ai_final_to_done_seconds', 'Time from receiving a final transcript to the complete AI response',
+    labels=('source',))
+
+
+class SuggestionLatency:
+    """최근 AI 제안들의 첫 토큰 시간(TTFT)과 전체 지연 시간을 모아 둡니다."""
+
+    def __init__(self, maxlen=1000):
+        self._samples = deque(maxlen=maxlen)
+        self._prompt_tokens = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, ttft, total):
+        with self._lock:
+            self._samples.append((ttft, total))
+            self.count += 1
+
+    def record_prompt_tokens(self, tokens):
+        """요청 하나의 프롬프트 토큰 수를 기록합니다. (맥락 예산이 지켜지는지 확인용)"""
+        with self._lock:
+            self._prompt_tokens.append(tokens)
+
+    def summary(self):
+        with self._lock:
+            samples = list(self._samples)
+            prompt_tokens = list(self._prompt_tokens)
+        result = {'count': self.count}
+        if prompt_tokens:
+            result['prompt_tokens_p50'] = sorted(prompt_tokens)[len(prompt_tokens) // 2]
+            result['prompt_tokens_max'] = max(prompt_tokens)
+        if not samples:
+            return result
+
+        def percentile(values, p):
+            values = sorted(v for v in values if v is not None)
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(len(values) * p))], 4)
+
+        ttfts = [s[0] for s in samples]
+        totals = [s[1] for s in samples]
+        return dict(
+            result,
+            ttft_p50=percentile(ttfts, 0.5),
+            ttft_p99=percentile(ttfts, 0.99),
+            total_p50=percentile(totals, 0.5),
+            total_p99=percentile(totals, 0.99),
+        )
+
+
+suggestion_latency = SuggestionLatency()
+
+
+def stream_suggestion_to_client(socketio, sid, transcript, style_prompt, language, client=None, job=None, context=None,
+                                trace_id=None):
+    """응답 조각이 도착하는 대로 'ai_response_delta'로 보내고, 끝나면 'ai_response_done'을 보냅니다.
+
+    완성된 텍스트와 첫 토큰 시간/전체 지연 시간(초)을 담은 dict를 반환합니다.
+    job(SuggestionJob)이 첫 조각을 보내기 전에 stale이 되면 스트림을 닫고 None을 반환합니다.
+    """
+    suggestion_id = uuid.uuid4().hex[:12]
+    start = time.perf_counter()
+    ttft = None
+    parts = []
+    deltas = stream_gpt_suggestion(transcript, style_prompt, language, client=client, context=context)
+    for delta in deltas:
+        if ttft is None:
+            if job is not None and job.is_stale():
+                deltas.close()
+                job.drop()
+                logger.info(f"Dropped stale AI suggestion {suggestion_id} for {sid}")
+                return None
+            ttft = time.perf_counter() - start
+            if job is not None:
+                job.mark_emitted()
+        parts.append(delta)
+        socketio.emit('ai_response_delta', {'id': suggestion_id, 'delta': delta, 'trace_id': trace_id}, to=sid)
+    total = time.perf_counter() - start
+
+    text = ''.join(parts)
+    suggestion_latency.record(ttft, total)
+    socketio.emit('ai_response_done', {
+        'id': suggestion_id,
+        'text': text,
+        'ttft_ms': None if ttft is None else round(ttft * 1000, 1),
+        'latency_ms': round(total * 1000, 1),
+        'trace_id': trace_id,
+    }, to=sid)
+    logger.info(f"AI suggestion {suggestion_id} for {sid} [{trace_id}]: ttft={ttft}, total={total:.3f}s")
+    return {'id': suggestion_id, 'text': text, 'ttft': ttft, 'latency': total}
@@ -1,28 +1,102 @@
 # app/utils.py
 
 import os
-import openai
 
-def get_gpt_suggestion(transcript, style_prompt, language="en"):
+from .clients import clients
+
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+# 아래 함수들이 오류 대신 돌려주는 응답의 시작 부분
+ERROR_REPLY_PREFIXES = ("Error: ", "Sorry, I encountered an error")
+
+
+def build_messages(transcript, style_prompt, language, context=None):
+    if context:
+        # 이전 대화(요약 + 최근 발화)를 함께 보내 앞서 나온 이야기를 반영하게 합니다.
+        user = (f"Conversation so far:\n{context}\n\n"
+                f"Based on the conversation and the latest transcript, provide a response in {language}. "
+                f"Latest transcript: {transcript}")
+    else:
+        user = f"Based on the following transcript, provide a response in {language}. Transcript: {transcript}"
+    return [
+        {"role": "system", "content": style_prompt},
+        {"role": "user", "content": user}
+    ]
+
+
+def _get_client(api_key):
+    # 호출마다 새 HTTP 연결 풀을 만들지 않도록 API 키별로 하나의 클라이언트를 나눠 씁니다.
+    return clients.get('openai', api_key)
+
+
+def get_gpt_suggestion(transcript, style_prompt, language="en", client=None, context=None):
     """GPT-3.5-turbo를 사용하여 응답을 생성합니다."""
-    
+
     # [⭐️핵심 수정⭐️] OpenAI API 키도 환경변수에서 직접 읽어옵니다.
     api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+    if client is None and not api_key:
         # 이 함수는 앱 실행 중에 호출되므로, 오류가 발생해도 서버가 멈추지는 않습니다.
         return "Error: OPENAI_API_KEY is not configured."
-        
-    openai.api_key = api_key
 
     try:
-        completion = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": style_prompt},
-                {"role": "user", "content": f"Based on the following transcript, provide a response in {language}. Transcript: {transcript}"}
-            ]
+        client = client or _get_client(api_key)
+        completion = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_messages(transcript, style_prompt, language, context)
         )
         return completion.choices[0].message.content
     except Exception as e:
         print(f"Error calling OpenAI: {e}")
-        return f"Sorry, I encountered an error: {e}"
\ No newline at end of file
+        return f"Sorry, I encountered an error: {e}"
+
+
+def stream_gpt_suggestion(transcript, style_prompt, language="en", client=None, context=None):
+    """응답을 토큰 단위 조각(delta)으로 생성하는 제너레이터입니다."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if client is None and not api_key:
+        yield "Error: OPENAI_API_KEY is not configured."
+        return
+
+    try:
+        client = client or _get_client(api_key)
+        stream = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_messages(transcript, style_prompt, language, context),
+            stream=True
+        )
+        # 소비하는 쪽이 중간에 멈추면(close) 스트림 연결도 닫힙니다.
+        with stream:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    except Exception as e:
+        print(f"Error calling OpenAI: {e}")
+        yield f"Sorry, I encountered an error: {e}"
+
+
+def summarize_conversation(summary, turns, max_tokens, client=None):
+    """이전 요약에 새로 밀려난 발화(speaker, text)를 합친 새 요약을 만듭니다.
+
+    API 키가 없거나 호출이 실패하면 None을 반환합니다. (호출하는 쪽이 대신 요약)
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if client is None and not api_key:
+        return None
+
+    lines = "\n".join(f"{speaker}: {text}" for speaker, text in turns)
+    try:
+        client = client or _get_client(api_key)
+        completion = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": "You maintain a running summary of a meeting. Keep names, numbers, decisions and open questions. Answer with the updated summary only, in the language of the conversation."},
+                {"role": "user", "content": f"Current summary:\n{summary or '(empty)'}\n\nNew lines:\n{lines}"}
+            ],
+            max_tokens=max_tokens
+        )
+        return completion.choices[0].message.content
+    except Exception as e:
+        print(f"Error summarizing conversation: {e}")
+        return None
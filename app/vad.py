@@ -0,0 +1,121 @@
+# app/vad.py
+
+import os
+from collections import deque
+
+import numpy as np
+
+VAD_ENABLED = os.environ.get('VAD_ENABLED', '1') != '0'
+# 이 값(dBFS)보다 조용한 프레임은 잡음 수준과 상관없이 침묵으로 봅니다.
+VAD_THRESHOLD_DB = float(os.environ.get('VAD_THRESHOLD_DB', -45))
+# 추정한 잡음 수준보다 이만큼(dB) 커야 음성으로 봅니다.
+VAD_MARGIN_DB = float(os.environ.get('VAD_MARGIN_DB', 10))
+VAD_HANGOVER_MS = int(os.environ.get('VAD_HANGOVER_MS', 300))
+VAD_PREROLL_MS = int(os.environ.get('VAD_PREROLL_MS', 200))
+
+
+class EnergyVAD:
+    """에너지와 영교차율(ZCR)로 음성 구간만 골라내는 스트리밍 VAD
+
+    16비트 PCM을 frame_ms 단위 프레임으로 나누어 한꺼번에(벡터 연산으로) 판정합니다.
+    음성이 끝난 뒤에도 hangover_ms 동안은 계속 내보내고, 음성이 시작되면 직전
+    preroll_ms 분량의 프레임을 함께 내보내 말의 앞뒤가 잘리지 않게 합니다.
+    feed()는 내보낼 구간을 세션 기준 바이트 위치와 함께 [(offset, bytes), ...]로 반환합니다.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold_db=None, margin_db=None,
+                 hangover_ms=None, preroll_ms=None, zcr_threshold=0.3):
+        frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = frame_samples * 2
+        self.threshold_db = VAD_THRESHOLD_DB if threshold_db is None else threshold_db
+        self.margin_db = VAD_MARGIN_DB if margin_db is None else margin_db
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = int((VAD_HANGOVER_MS if hangover_ms is None else hangover_ms) / frame_ms)
+        preroll_frames = int((VAD_PREROLL_MS if preroll_ms is None else preroll_ms) / frame_ms)
+        self._preroll = deque(maxlen=max(preroll_frames, 1))
+        self._keep_preroll = preroll_frames > 0
+        self._pending = bytearray()
+        self._hang = 0
+        self.noise_db = None
+        # 지금까지 판정한 오디오의 끝 위치(바이트)
+        self.offset = 0
+        self.total_bytes = 0
+        self.voiced_bytes = 0
+
+    @property
+    def gated_ratio(self):
+        """걸러 낸(보내지 않은) 오디오의 비율"""
+        if not self.total_bytes:
+            return 0.0
+        return 1 - self.voiced_bytes / self.total_bytes
+
+    def classify(self, frames):
+        """(프레임 수, 프레임 길이) int16 배열을 받아 프레임별 음성 여부를 반환합니다."""
+        x = frames.astype(np.float32) / 32768.0
+        energy_db = 10 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = self.threshold_db
+        if self.noise_db is not None:
+            threshold = max(threshold, self.noise_db + self.margin_db)
+        voiced = energy_db > threshold
+        # 마찰음(ㅅ, s 등)은 에너지가 낮고 영교차율이 높습니다.
+        voiced |= (zcr > self.zcr_threshold) & (energy_db > threshold - self.margin_db / 2)
+
+        silent = energy_db[~voiced]
+        if silent.size:
+            floor = float(np.median(silent))
+            self.noise_db = floor if self.noise_db is None else 0.9 * self.noise_db + 0.1 * floor
+        return voiced
+
+    def feed(self, chunk):
+        self._pending += chunk
+        count = len(self._pending) // self.frame_bytes
+        if not count:
+            return []
+        size = count * self.frame_bytes
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        voiced = self.classify(np.frombuffer(data, dtype='<i2').reshape(count, -1))
+
+        out = []
+        for i, is_voiced in enumerate(voiced.tolist()):
+            offset = self.offset + i * self.frame_bytes
+            frame = data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            if is_voiced:
+                if self._hang == 0:
+                    out.extend(self._preroll)
+                    self._preroll.clear()
+                self._hang = self.hangover_frames + 1
+            if self._hang > 0:
+                self._hang -= 1
+                out.append((offset, frame))
+            elif self._keep_preroll:
+                self._preroll.append((offset, frame))
+        self.offset += size
+        self.total_bytes += size
+        return self._merge(out)
+
+    def flush(self):
+        """남은 (한 프레임이 안 되는) 오디오를 처리합니다. 음성이 이어지던 중이면 내보냅니다."""
+        rest = bytes(self._pending)
+        self._pending = bytearray()
+        if not rest:
+            return []
+        offset = self.offset
+        self.offset += len(rest)
+        self.total_bytes += len(rest)
+        if self._hang > 0:
+            return self._merge([(offset, rest)])
+        return []
+
+    def _merge(self, frames):
+        spans = []
+        for offset, frame in frames:
+            if spans and spans[-1][0] + len(spans[-1][1]) == offset:
+                spans[-1][1].extend(frame)
+            else:
+                spans.append((offset, bytearray(frame)))
+        self.voiced_bytes += sum(len(frame) for _, frame in frames)
+        return [(offset, bytes(data)) for offset, data in spans]
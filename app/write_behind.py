@@ -0,0 +1,159 @@
+# app/write_behind.py
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_COMMIT = metrics.histogram('firestore_batch_commit_seconds', 'Duration of one Firestore batch commit')
+WRITE_LATENCY = metrics.histogram('firestore_write_seconds',
+                                  'Time from enqueueing a transcript write to its commit')
+
+# Firestore 배치 하나에 담을 최대 쓰기 수입니다. (Firestore 제한은 500)
+WRITE_BATCH_SIZE = min(500, int(os.environ.get('WRITE_BATCH_SIZE', 200)))
+# 배치가 가득 차지 않아도 이 시간(초)이 지나면 커밋합니다.
+WRITE_BATCH_DELAY = float(os.environ.get('WRITE_BATCH_DELAY', 0.25))
+WRITE_MAX_RETRIES = int(os.environ.get('WRITE_MAX_RETRIES', 5))
+WRITE_RETRY_BACKOFF = float(os.environ.get('WRITE_RETRY_BACKOFF', 0.2))
+
+
+class WriteBehindQueue:
+    """Firestore 쓰기를 모아 두었다가 배치 커밋으로 내보내는 큐
+
+    소켓 핸들러는 enqueue()로 문서를 넣고 바로 반환합니다. 백그라운드 스레드가
+    모든 세션의 쓰기를 모아 batch_size에 도달하거나 max_delay가 지나면 커밋하고,
+    실패하면 지수 백오프로 재시도합니다. 프로세스 종료 시에는 남은 쓰기를 비웁니다.
+    """
+
+    def __init__(self, db, batch_size=None, max_delay=None, max_retries=None, retry_backoff=None):
+        self.db = db
+        self.batch_size = batch_size or WRITE_BATCH_SIZE
+        self.max_delay = WRITE_BATCH_DELAY if max_delay is None else max_delay
+        self.max_retries = WRITE_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = WRITE_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._inflight = 0
+        # flush()를 기다리는 호출 수. 0보다 크면 max_delay를 기다리지 않고 바로 커밋합니다.
+        self._flushing = 0
+        self.stats = {'enqueued': 0, 'committed': 0, 'batches': 0, 'retries': 0, 'failed': 0}
+
+    def enqueue(self, collection, data):
+        """문서를 쓰기 큐에 넣고, 미리 발급한 문서 ID를 반환합니다."""
+        ref = self.db.collection(collection).document()
+        data = dict(data, id=ref.id)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('write-behind queue is closed')
+            self._pending.append((ref, data, time.monotonic()))
+            self.stats['enqueued'] += 1
+            self._ensure_started()
+            # 비어 있던 큐에 처음 들어온 쓰기는 max_delay 타이머를 시작하도록 깨웁니다.
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return ref.id
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='firestore-write-behind', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self):
+        """커밋할 쓰기 묶음을 기다렸다가 꺼냅니다. 닫혔고 비어 있으면 None을 반환합니다."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    waited = time.monotonic() - self._pending[0][2]
+                    if (self._closed or self._flushing or len(self._pending) >= self.batch_size
+                            or waited >= self.max_delay):
+                        break
+                    self._cond.wait(self.max_delay - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+            count = min(self.batch_size, len(self._pending))
+            self._inflight += count
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            items = self._take_batch()
+            if items is None:
+                return
+            try:
+                self._commit(items)
+            finally:
+                with self._cond:
+                    self._inflight -= len(items)
+                    self._cond.notify_all()
+
+    def _commit(self, items):
+        for attempt in range(self.max_retries + 1):
+            try:
+                batch = self.db.batch()
+                for ref, data, _ in items:
+                    batch.set(ref, data)
+                started = time.monotonic()
+                batch.commit()
+                committed_at = time.monotonic()
+                BATCH_COMMIT.observe(committed_at - started)
+                for _, _, enqueued_at in items:
+                    WRITE_LATENCY.observe(committed_at - enqueued_at)
+                self.stats['committed'] += len(items)
+                self.stats['batches'] += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.stats['failed'] += len(items)
+                    logger.error(f"Dropping {len(items)} transcript writes after {attempt + 1} attempts: {e}", exc_info=True)
+                    return False
+                self.stats['retries'] += 1
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"Batch commit failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 쓰기가 모두 커밋될 때까지 기다립니다. 모두 비워졌으면 True를 반환합니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._pending:
+                self._ensure_started()
+            # 지연 시간을 기다리지 말고 바로 커밋하도록 깨웁니다.
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout=None):
+        """새 쓰기를 막고 남은 쓰기를 모두 커밋합니다."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        return not self._pending and not self._inflight
+
+    def register_shutdown(self):
+        atexit.register(self.close, 10)
+        return self
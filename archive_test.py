@@ -0,0 +1,90 @@
+import os
+import json
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.archive import AudioArchiveWriter, LocalBucket
+from app.audio_codec import ArchiveIndex, decode_segment
+
+
+class RecordingBucket(LocalBucket):
+    """업로드한 Blob을 이름으로 기억해 Content-Type을 확인할 수 있는 로컬 버킷"""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.blobs = {}
+
+    def blob(self, name):
+        return self.blobs.setdefault(name, super().blob(name))
+
+
+def test_archive_spools_in_parts_and_uploads(tmp_path):
+    bucket = LocalBucket(str(tmp_path / 'bucket'))
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    writer = AudioArchiveWriter('meeting-1', 'sid-1', bucket=bucket, spool_dir=str(spool_dir),
+                                part_size=256 * 1024, archive_format='raw')
+
+    chunk = bytes(range(256)) * 10
+    for _ in range(1000):
+        writer.write(chunk)
+        # 메모리에는 한 파트 이상 쌓이지 않아야 합니다.
+        assert len(writer._part) < writer.part_size
+    assert len(os.listdir(spool_dir)) == 1
+
+    url = writer.finalize()
+
+    blob = bucket.blob(writer.blob_name)
+    assert url == blob.public_url
+    assert blob.download_as_bytes() == chunk * 1000
+    assert os.listdir(spool_dir) == []
+
+
+def test_archive_without_audio_uploads_nothing(tmp_path):
+    bucket = LocalBucket(str(tmp_path / 'bucket'))
+    writer = AudioArchiveWriter('meeting-1', 'sid-1', bucket=bucket, spool_dir=str(tmp_path))
+
+    assert writer.finalize() is None
+    assert not bucket.blob(writer.blob_name).exists()
+
+
+def test_archive_keeps_spool_when_upload_fails(tmp_path):
+    class BrokenBucket:
+        def blob(self, name):
+            raise RuntimeError('bucket unavailable')
+
+    writer = AudioArchiveWriter('meeting-1', 'sid-1', bucket=BrokenBucket(), spool_dir=str(tmp_path),
+                                archive_format='raw')
+    writer.write(b'\x01\x02' * 100)
+
+    assert writer.finalize() is None
+    spools = os.listdir(tmp_path)
+    assert len(spools) == 1
+    assert (tmp_path / spools[0]).read_bytes() == b'\x01\x02' * 100
+
+
+def test_archive_segments_are_indexed_and_decodable(tmp_path):
+    bucket = RecordingBucket(str(tmp_path / 'bucket'))
+    writer = AudioArchiveWriter('meeting-1', 'sid-1', bucket=bucket, spool_dir=str(tmp_path),
+                                archive_format='wav', segment_seconds=1)
+    # 2.5초 분량의 16kHz PCM을 작은 청크로 나누어 기록합니다.
+    pcm = b''.join(i.to_bytes(2, 'little', signed=True) for i in range(-20000, 20000))
+    for i in range(0, len(pcm), 640):
+        writer.write(pcm[i:i + 640])
+    writer.finalize()
+
+    data = bucket.blob(writer.blob_name).download_as_bytes()
+    index = ArchiveIndex.from_json(bucket.blob(writer.index_blob_name).download_as_bytes())
+    assert [s['start'] for s in index.segments] == [0.0, 1.0, 2.0]
+    # 여러 WAV 스트림을 이어 붙인 객체이므로 하나의 오디오 파일로 표시하지 않습니다.
+    assert writer.blob_name.endswith('.segments.wav')
+    assert bucket.blobs[writer.blob_name].content_type == 'application/octet-stream'
+    assert json.loads(bucket.blob(writer.index_blob_name).download_as_bytes())['segment_content_type'] == 'audio/wav'
+    assert index.duration == 2.5
+
+    # 인덱스로 찾은 구간만 잘라 내어도 독립적으로 디코딩되어야 합니다.
+    segment = index.locate(1.7)
+    assert segment['start'] == 1.0
+    part = data[segment['offset']:segment['offset'] + segment['length']]
+    assert decode_segment(part, 'wav') == pcm[32000:64000]
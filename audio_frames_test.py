@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.audio_frames import FrameAssembler, build_frame, parse_frame
+
+FRAME_BYTES = 3200  # 16kHz에서 100ms
+
+
+def frames(count):
+    """k번째 프레임을 값 k로 채운 100ms 프레임들을 만듭니다."""
+    return [build_frame(k, k * 100, k.to_bytes(2, 'little') * (FRAME_BYTES // 2)) for k in range(count)]
+
+
+def test_reassembles_small_chunks_into_fixed_size_requests():
+    assembler = FrameAssembler(framed=False)
+    pcm = bytes(range(256)) * 100
+    requests = []
+    for i in range(0, len(pcm), 86):
+        requests += assembler.feed(pcm[i:i + 86])
+    requests += assembler.flush()
+
+    assert all(len(r) == assembler.request_bytes for r in requests[:-1])
+    assert b''.join(requests) == pcm
+
+
+def test_reorders_frames_and_drops_duplicates():
+    assembler = FrameAssembler(reorder_window=4)
+    sent = frames(6)
+    requests = []
+    for i in (0, 2, 1, 1, 3, 5, 4):
+        requests += assembler.push(sent[i])
+
+    assert b''.join(requests) == b''.join(parse_frame(f)[2] for f in sent)
+    assert assembler.stats()['late'] == 1
+    assert assembler.gaps == 0
+
+
+def test_fills_missing_frames_with_silence():
+    assembler = FrameAssembler(reorder_window=1)
+    sent = frames(6)
+    requests = []
+    for i in (0, 1, 4, 5):
+        requests += assembler.push(sent[i])
+    requests += assembler.flush()
+
+    pcm = b''.join(requests)
+    # 빠진 2, 3번 프레임(200ms)은 침묵으로 채워 뒤쪽 시간 위치가 그대로 유지됩니다.
+    assert len(pcm) == 6 * FRAME_BYTES
+    assert pcm[2 * FRAME_BYTES:4 * FRAME_BYTES] == bytes(2 * FRAME_BYTES)
+    assert pcm[4 * FRAME_BYTES:5 * FRAME_BYTES] == parse_frame(sent[4])[2]
+    assert assembler.gaps == 1 and assembler.missing_frames == 2
+
+
+def test_rejects_malformed_frames():
+    assembler = FrameAssembler()
+    with pytest.raises(ValueError):
+        assembler.push(b'\x01\x00')
+    with pytest.raises(ValueError):
+        assembler.push(b'\x02' + bytes(11) + bytes(4))
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+from types import SimpleNamespace
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from google.api_core import exceptions
+
+from app.archive import AudioArchiveWriter
+from app.batch_transcription import BatchTranscriber, parse_request, InvalidMessage
+from app.clients import ClientPool
+from testing.fakes import FakePubSub, FakeSpeechClient, MemoryFirestore, MemoryStorageClient
+
+SAMPLE_RATE = 16000
+TOPIC = 'start-transcription'
+SUBSCRIPTION = 'start-transcription-sub'
+RESULTS = 'transcription-results'
+
+
+def spoken(first, count, pause_every=6):
+    """값 first, first+1, ...로 채운 0.5초 단어들. pause_every개마다 1초씩 쉽니다."""
+    pcm = b''
+    for k in range(count):
+        pcm += (first + k).to_bytes(2, 'little', signed=True) * (SAMPLE_RATE // 2)
+        if (k + 1) % pause_every == 0:
+            pcm += b'\x00\x00' * SAMPLE_RATE
+    return pcm
+
+
+def archive(storage, tmp_path, meeting_id, sid, pcm):
+    writer = AudioArchiveWriter(meeting_id, sid, bucket=storage.bucket('audio'), spool_dir=str(tmp_path),
+                                archive_format='raw', segment_seconds=10)
+    writer.write(pcm)
+    writer.finalize()
+
+
+def setup(tmp_path, meetings, words, latency=0.0, concurrency=None, dead_letter=True, **options):
+    db = MemoryFirestore()
+    storage = MemoryStorageClient()
+    speech = FakeSpeechClient(words_per_result=4, latency=latency)
+    pubsub = FakePubSub()
+    pubsub.create_subscription(SUBSCRIPTION, TOPIC, dead_letter=dead_letter)
+    for i, meeting_id in enumerate(meetings):
+        db.collection('meetings').document(meeting_id).set({'id': meeting_id, 'language': 'en-US'})
+        archive(storage, tmp_path, meeting_id, 'sid-a', spoken(1000 * (i + 1), words))
+    transcriber = BatchTranscriber(db, storage.bucket('audio'), ClientPool('speech', lambda: speech, max_leases=100),
+                                   publish=lambda data, **attrs: pubsub.publish(RESULTS, data, **attrs),
+                                   concurrency=concurrency, retry_backoff=0, **options)
+    return db, speech, pubsub, transcriber
+
+
+def results(pubsub):
+    return [json.loads(data) for data, _ in pubsub.published.get(RESULTS, [])]
+
+
+def test_overlapping_segments_are_merged_once_and_rewrites_are_idempotent(tmp_path):
+    db, speech, pubsub, transcriber = setup(tmp_path, ['m-merge'], words=30, segment_seconds=4, overlap=1.25)
+    pubsub.subscribe(SUBSCRIPTION, transcriber.handle_message)
+    message = json.dumps({'meeting_id': 'm-merge', 'request_id': 'r1'}).encode()
+    pubsub.publish(TOPIC, message)
+    assert pubsub.wait_idle(SUBSCRIPTION)
+
+    lines = sorted(db.documents('batch_transcripts'), key=lambda d: d['start'])
+    words = ' '.join(line['text'] for line in lines).split()
+    assert words == [f"w{1000 + k}" for k in range(30)]
+    # 1초 쉼마다 줄이 나뉘고, 줄의 시각은 녹음 기준입니다.
+    assert [line['text'].split()[0] for line in lines] == ['w1000', 'w1006', 'w1012', 'w1018', 'w1024']
+    assert [line['start'] for line in lines] == [0.0, 4.0, 8.0, 12.0, 16.0]
+    assert speech.recognize_calls > 5
+
+    # 실시간 대화록과 섞이지 않고, 같은 요청이 다시 전달되어도 두 번 쌓이지 않습니다.
+    assert db.documents('transcripts') == []
+    pubsub.publish(TOPIC, message)
+    assert pubsub.wait_idle(SUBSCRIPTION)
+    assert len(db.documents('batch_transcripts')) == len(lines)
+    assert [r['event'] for r in results(pubsub)] == ['transcription_completed'] * 2
+    assert results(pubsub)[0]['lines'] == 5 and results(pubsub)[0]['request_id'] == 'r1'
+
+
+def test_invalid_messages_are_acked_and_transient_failures_are_redelivered(tmp_path):
+    db, speech, pubsub, transcriber = setup(tmp_path, ['m-flaky'], words=8)
+    failures = [3]
+    recognize = speech.recognize
+
+    def flaky(**kwargs):
+        if failures[0]:
+            failures[0] -= 1
+            raise exceptions.ServiceUnavailable('try again')
+        return recognize(**kwargs)
+
+    speech.recognize = flaky
+    pubsub.subscribe(SUBSCRIPTION, transcriber.handle_message, flow_control=SimpleNamespace(max_messages=1))
+    for data in (b'not json', b'{"sid": "x"}', b'{"meeting_id": "m-missing"}', b'{"meeting_id": "m-flaky"}'):
+        pubsub.publish(TOPIC, data)
+    assert pubsub.wait_idle(SUBSCRIPTION)
+
+    # 구간 재시도(2번)까지 실패한 첫 전달은 nack되고, 다시 전달받아 성공합니다.
+    assert transcriber.stats()['invalid'] == 3
+    assert transcriber.stats()['nacked'] == 1 and transcriber.stats()['acked'] == 1
+    assert pubsub.nacked == 1 and pubsub.acked == 4
+    assert [r['event'] for r in results(pubsub)] == ['transcription_failed', 'transcription_completed']
+    assert ' '.join(d['text'] for d in db.documents('batch_transcripts')).split() == [f"w{1000 + k}" for k in range(8)]
+
+    try:
+        parse_request(b'{"meeting_id": "m", "version": 2}')
+        assert False
+    except InvalidMessage:
+        pass
+
+
+def test_permanent_failures_are_acked_without_a_dead_letter_policy(tmp_path):
+    # 데드 레터 정책이 없으면 delivery_attempt가 없으므로 시도 횟수로는 포기할 수 없습니다.
+    db, speech, pubsub, transcriber = setup(tmp_path, ['m-bad'], words=4, dead_letter=False)
+
+    def invalid(**kwargs):
+        raise exceptions.InvalidArgument('sample rate does not match')
+
+    speech.recognize = invalid
+    pubsub.subscribe(SUBSCRIPTION, transcriber.handle_message)
+    pubsub.publish(TOPIC, b'{"meeting_id": "m-bad", "request_id": "r-bad"}')
+    assert pubsub.wait_idle(SUBSCRIPTION)
+
+    assert pubsub.nacked == 0 and pubsub.acked == 1
+    assert transcriber.stats()['failed'] == 1
+    [result] = results(pubsub)
+    assert result['event'] == 'transcription_failed' and result['request_id'] == 'r-bad'
+    assert 'sample rate' in result['error']
+
+
+def run_batch(tmp_path, concurrency, max_messages):
+    meetings = [f"m-load-{concurrency}-{i}" for i in range(6)]
+    db, speech, pubsub, transcriber = setup(tmp_path, meetings, words=100, latency=0.03,
+                                            concurrency=concurrency, segment_seconds=10, overlap=1)
+    started = time.monotonic()
+    pubsub.subscribe(SUBSCRIPTION, transcriber.handle_message,
+                     flow_control=SimpleNamespace(max_messages=max_messages))
+    for meeting_id in meetings:
+        pubsub.publish(TOPIC, json.dumps({'meeting_id': meeting_id}).encode())
+    assert pubsub.wait_idle(SUBSCRIPTION, timeout=30)
+    elapsed = time.monotonic() - started
+    assert transcriber.stats()['acked'] == len(meetings)
+    assert pubsub.max_outstanding <= max_messages
+    assert len(db.documents('batch_transcripts')) == len(meetings) * 17
+    transcriber.close()
+    return elapsed, speech.recognize_calls
+
+
+def test_segments_are_recognized_in_parallel_under_flow_control(tmp_path):
+    serial, calls = run_batch(tmp_path, concurrency=1, max_messages=1)
+    parallel, parallel_calls = run_batch(tmp_path, concurrency=8, max_messages=2)
+    assert calls == parallel_calls
+    assert parallel < serial / 3
@@ -0,0 +1,76 @@
+"""녹음 보관 형식별 저장 용량과 CPU 비용을 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.archive_codec_bench [--minutes 5] [--sample-rate 16000]
+
+기존 raw PCM 경로와 FLAC / WAV 구간 인코딩을 같은 합성 음성 신호로 비교하여
+오디오 1분당 저장 바이트와 CPU 시간(초)을 출력합니다.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.archive import AudioArchiveWriter, LocalBucket  # noqa: E402
+from app.audio_codec import soundfile  # noqa: E402
+
+
+def synthetic_speech(seconds, sample_rate, seed=0):
+    """발화와 침묵이 번갈아 나오는 음성 비슷한 16비트 PCM을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # 1~3초 길이의 발화 구간만 남기고 나머지는 작은 배경 잡음으로 채웁니다.
+    envelope = np.zeros_like(t)
+    pos = 0.0
+    while pos < seconds:
+        length = rng.uniform(1, 3)
+        if rng.random() < 0.6:
+            envelope[(t >= pos) & (t < pos + length)] = rng.uniform(0.3, 1.0)
+        pos += length
+    signal = voiced * envelope * 6000 + rng.normal(0, 60, t.size)
+    return np.clip(signal, -32768, 32767).astype('<i2').tobytes()
+
+
+def run(fmt, pcm, sample_rate, workdir, chunk_bytes):
+    bucket = LocalBucket(os.path.join(workdir, fmt))
+    writer = AudioArchiveWriter('bench', fmt, bucket=bucket, spool_dir=workdir,
+                                sample_rate=sample_rate, archive_format=fmt)
+    start = time.process_time()
+    for i in range(0, len(pcm), chunk_bytes):
+        writer.write(pcm[i:i + chunk_bytes])
+    writer.finalize()
+    cpu = time.process_time() - start
+    stored = os.path.getsize(bucket.blob(writer.blob_name).path)
+    return stored, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=5)
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    args = parser.parse_args()
+
+    pcm = synthetic_speech(args.minutes * 60, args.sample_rate)
+    chunk_bytes = args.sample_rate // 10 * 2  # 100ms 청크
+    formats = ['raw', 'wav'] + (['flac'] if soundfile is not None else [])
+
+    print(f"audio: {args.minutes:g} min @ {args.sample_rate} Hz ({len(pcm)} bytes PCM)")
+    print(f"{'format':<8}{'bytes/min':>14}{'ratio':>9}{'cpu s/min':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = None
+        for fmt in formats:
+            stored, cpu = run(fmt, pcm, args.sample_rate, workdir, chunk_bytes)
+            baseline = baseline or stored
+            print(f"{fmt:<8}{stored / args.minutes:>14,.0f}{stored / baseline:>9.3f}{cpu / args.minutes:>12.4f}")
+
+
+if __name__ == '__main__':
+    main()
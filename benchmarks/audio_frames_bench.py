@@ -0,0 +1,87 @@
+"""audio_stream 이벤트를 렌더 퀀텀마다 보낼 때와 100ms 프레임으로 모아 보낼 때를 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.audio_frames_bench [--seconds 60]
+
+서버 핸들러가 하는 일(세션 조회, 프레임 조립, SpeechWorker.add_audio_chunk, 아카이브 기록)을
+그대로 실행하고, 세션 하나가 초당 보내는 이벤트 수와 오디오 1초당 CPU 시간을 출력합니다.
+예전 클라이언트는 128샘플(48kHz) 렌더 퀀텀마다 16kHz로 줄인 약 43샘플을 보냈고, 예전 핸들러는
+조각을 그대로 워커와 아카이브에 넘겼습니다. Socket.IO 패킷 해석 비용은 포함하지 않으므로
+실제 차이는 이벤트 수에 비례해 더 커집니다.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.archive import AudioArchiveWriter, LocalBucket  # noqa: E402
+from app.audio_frames import FrameAssembler, build_frame  # noqa: E402
+from testing.fakes import FakeSpeechClient  # noqa: E402
+from app.speech_worker import SpeechWorker  # noqa: E402
+from benchmarks.archive_codec_bench import synthetic_speech  # noqa: E402
+
+SAMPLE_RATE = 16000
+QUANTUM_BYTES = 128 // 3 * 2  # 48kHz 렌더 퀀텀 128샘플을 16kHz로 줄인 크기
+FRAME_MS = 100
+
+
+class _NullSocketIO:
+    def emit(self, event, data, to=None):
+        pass
+
+
+def legacy_events(pcm):
+    return [pcm[i:i + QUANTUM_BYTES] for i in range(0, len(pcm), QUANTUM_BYTES)]
+
+
+def framed_events(pcm):
+    frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    return [build_frame(seq, seq * FRAME_MS, pcm[i:i + frame_bytes])
+            for seq, i in enumerate(range(0, len(pcm), frame_bytes))]
+
+
+def run(events, framed, tmp):
+    """main.handle_audio_stream과 같은 경로로 이벤트를 처리하고 CPU 시간을 잽니다.
+
+    framed가 None이면 조립기 없이 조각을 바로 넘기는 예전 핸들러를 흉내 냅니다.
+    """
+    sid = 'bench'
+    workers = {sid: SpeechWorker(_NullSocketIO(), sid, 'en-US', client=FakeSpeechClient())}
+    audio_buffers = {sid: AudioArchiveWriter('bench', sid, bucket=LocalBucket(tmp), spool_dir=tmp, archive_format='raw')}
+    assemblers = {sid: FrameAssembler(framed=framed)} if framed is not None else {}
+
+    start = time.process_time()
+    for data in events:
+        assembler = assemblers.get(sid)
+        for chunk in (assembler.feed(data) if assembler is not None else (data,)):
+            workers[sid].add_audio_chunk(chunk)
+            audio_buffers[sid].write(chunk)
+    cpu = time.process_time() - start
+
+    workers[sid].close()
+    audio_buffers[sid].discard()
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60, help='세션 하나가 보내는 오디오 길이')
+    args = parser.parse_args()
+
+    pcm = synthetic_speech(args.seconds, SAMPLE_RATE)
+    seconds = len(pcm) / (SAMPLE_RATE * 2)
+    print(f"{'protocol':<22}{'events/s':>10}{'cpu ms/s audio':>16}{'sessions/core':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, events, framed in (
+            ('per render quantum', legacy_events(pcm), None),
+            (f'{FRAME_MS}ms frames', framed_events(pcm), True),
+        ):
+            cpu = run(events, framed, tmp)
+            print(f"{name:<22}{len(events) / seconds:>10.1f}{cpu / seconds * 1000:>16.3f}{seconds / cpu:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""미팅 룸/기록 페이지의 첫 바이트까지 시간(TTFB)을 전체 로딩과 커서 페이지네이션으로 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.history_page_bench [--transcripts 100000] [--meetings 2000] [--doc-latency 0.0001]
+
+시드를 고정한 인메모리 Firestore에 대화록 100k줄을 넣고(한 미팅에 heavy-share 비율이 몰림),
+예전처럼 모든 문서를 읽어 그리는 라우트와 지금의 라우트(최근 한 페이지 + 프로젝션)를
+Flask 테스트 클라이언트로 호출합니다. --doc-latency는 결과 문서 하나를 받아 오는 데
+드는 시간(초)으로, 실제 Firestore에서 결과가 클수록 느려지는 것을 흉내 냅니다.
+인메모리 구현은 필터와 정렬을 전체 스캔으로 하므로 실제 인덱스 쿼리보다 차이가 작게 나옵니다.
+"""
+
+import os
+import time
+import random
+import argparse
+import datetime
+import importlib
+import statistics
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from flask import Blueprint, render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from testing.fakes import MemoryFirestore  # noqa: E402
+
+main_module = importlib.import_module('app.main')
+
+
+def seed(db, transcripts, meetings, heavy_share, seed=0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    ids = [f"meeting-{i:05d}" for i in range(meetings)]
+    for i, meeting_id in enumerate(ids):
+        db.collection('meetings').document(meeting_id).set({
+            'id': meeting_id, 'title': f"Meeting {i}", 'language': 'en-US',
+            'created_at': start + datetime.timedelta(hours=i),
+        })
+    heavy = ids[-1]
+    for i in range(transcripts):
+        meeting_id = heavy if rng.random() < heavy_share else rng.choice(ids)
+        db.collection('transcripts').document(f"t{i:07d}").set({
+            'meeting_id': meeting_id,
+            'speaker': rng.choice(('Customer', 'AI')),
+            'text': ' '.join(rng.choice(('price', 'delivery', 'contract', 'schedule', 'support')) for _ in range(12)),
+            'timestamp': start + datetime.timedelta(seconds=i),
+            'latency_ms': rng.uniform(200, 900),
+        })
+    return heavy
+
+
+def legacy_blueprint():
+    """페이지네이션 전의 라우트: 모든 문서를 읽어 한 번에 그립니다."""
+    legacy = Blueprint('legacy', __name__)
+
+    @legacy.route('/legacy/meeting/<string:meeting_id>')
+    def meeting_room(meeting_id):
+        db = main_module.db
+        meeting = db.collection('meetings').document(meeting_id).get().to_dict()
+        styles = [doc.to_dict() for doc in db.collection('answer_styles').stream()]
+        stream = db.collection('transcripts').where('meeting_id', '==', meeting_id).order_by('timestamp').stream()
+        transcripts = [doc.to_dict() for doc in stream]
+        return render_template('meeting.html', meeting=meeting, styles=styles, transcripts=transcripts,
+                               older_cursor=None, meeting_id=meeting_id)
+
+    @legacy.route('/legacy/history')
+    def history():
+        stream = main_module.db.collection('meetings').order_by('created_at', direction='DESCENDING').stream()
+        return render_template('history.html', meetings=[doc.to_dict() for doc in stream], next_cursor=None)
+
+    return legacy
+
+
+def ttfb(client, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, (path, response.status_code)
+    return statistics.median(samples), len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transcripts', type=int, default=100000)
+    parser.add_argument('--meetings', type=int, default=2000)
+    parser.add_argument('--heavy-share', type=float, default=0.2, help='가장 긴 미팅에 몰리는 대화록 비율')
+    parser.add_argument('--doc-latency', type=float, default=0.0001)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db = MemoryFirestore(document_latency=args.doc_latency)
+    heavy = seed(db, args.transcripts, args.meetings, args.heavy_share)
+    main_module.db = db
+    app = create_app()
+    app.register_blueprint(legacy_blueprint())
+    client = app.test_client()
+
+    print(f"{'page':<28}{'full load ms':>14}{'paginated ms':>14}{'full KB':>10}{'page KB':>10}")
+    for name, legacy_path, path in (
+        (f'meeting room ({heavy})', f'/legacy/meeting/{heavy}', f'/meeting/{heavy}'),
+        ('history', '/legacy/history', '/history'),
+    ):
+        old, old_size = ttfb(client, legacy_path, args.repeat)
+        new, new_size = ttfb(client, path, args.repeat)
+        print(f"{name:<28}{old * 1000:>14.1f}{new * 1000:>14.1f}{old_size / 1024:>10.0f}{new_size / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
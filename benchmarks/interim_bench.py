@@ -0,0 +1,103 @@
+"""중간 결과 묶기(throttle)와 꼬리만 보내기(delta)로 줄어드는 이벤트 수와 바이트를 재는 벤치마크
+
+사용법:
+    python -m benchmarks.interim_bench [--minutes 10] [--rate 10] [--interval 0.25] [--language ko]
+
+인식기가 초당 --rate번 중간 결과를 내는 세션을 가상 시계로 흉내 냅니다. 문장은 단어가
+조금씩 자라며, 가끔 바로 앞 단어를 고쳐 씁니다. 전체 문장을 매번 보내는 방식(기존)과
+InterimEmitter의 간격 제한만, delta만, 둘 다 켠 경우의 이벤트 수와 바이트를 비교하고,
+클라이언트가 다시 맞춘 문장이 원래 문장과 같은지도 확인합니다.
+"""
+
+import os
+import random
+import argparse
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from testing.fakes import ManualClock  # noqa: E402
+from app.interim import InterimEmitter, apply_delta, wire_size  # noqa: E402
+
+WORDS = {
+    'en': 'we should ship the release after the load test finishes and review the latency numbers together'.split(),
+    'ko': '다음 주 회의 전까지 부하 테스트 결과를 정리해서 지연 시간 수치를 같이 검토합시다'.split(),
+}
+
+
+def utterances(seconds, rate, language, seed):
+    """(시각, 문장, 최종 여부) 목록. 단어는 앞 절반, 전체 순서로 두 번의 중간 결과에 걸쳐 나타납니다."""
+    rng = random.Random(seed)
+    vocabulary = WORDS[language]
+    t = 0.0
+    step = 1 / rate
+    while t < seconds:
+        words = []
+        for _ in range(rng.randint(6, 18)):
+            word = rng.choice(vocabulary)
+            cut = max(1, len(word) // 2)
+            for partial in (word[:cut], word):
+                t += step
+                yield t, ' '.join(words + [partial]), False
+            if words and rng.random() < 0.15:
+                # 앞 단어를 고쳐 씁니다.
+                words[-1] = rng.choice(vocabulary)
+                t += step
+                yield t, ' '.join(words + [word]), False
+            words.append(word)
+        t += step
+        yield t, ' '.join(words), True
+        t += rng.uniform(0.5, 2.0)
+
+
+def run(events, interval, delta):
+    clock = ManualClock()
+    client = {'text': '', 'events': 0, 'bytes': 0, 'mismatch': 0}
+    latest = {'text': ''}
+
+    def emit(event, payload):
+        client['events'] += 1
+        client['bytes'] += wire_size(event, payload)
+        if event == 'interim_transcript':
+            client['text'] = apply_delta(client['text'], payload)
+            # 간격 제한으로 늦게 보낸 결과도 그 시점의 최신 문장과 같아야 합니다.
+            client['mismatch'] += client['text'] != latest['text']
+        else:
+            client['text'] = ''
+
+    emitter = InterimEmitter(emit, min_interval=interval, delta=delta, clock=clock, timer=clock.timer)
+    for at, text, final in events:
+        clock.advance(at)
+        if final:
+            latest['text'] = ''
+            emitter.final({'transcript': text, 'start': 0.0, 'end': at, 'trace_id': 'bench-trace-0001'})
+        else:
+            latest['text'] = text
+            emitter.interim(text, trace_id='bench-trace-0001')
+    clock.advance(clock.now + interval * 2)
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=10)
+    parser.add_argument('--rate', type=float, default=10, help='인식기가 초당 내는 중간 결과 수')
+    parser.add_argument('--interval', type=float, default=0.25, help='중간 결과 최소 간격(초)')
+    parser.add_argument('--language', choices=sorted(WORDS), default='en')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    events = list(utterances(args.minutes * 60, args.rate, args.language, args.seed))
+    baseline = run(events, 0, False)
+    print(f"[{args.minutes:g} min, {args.rate:g} interims/s, {args.language}] "
+          f"{sum(not final for _, _, final in events)} interims, {sum(final for _, _, final in events)} finals")
+    print(f"{'mode':<18}{'events':>8}{'KB':>10}{'events -%':>11}{'bytes -%':>10}{'mismatch':>10}")
+    for name, interval, delta in (('full (before)', 0, False), ('throttle', args.interval, False),
+                                  ('delta', 0, True), ('throttle + delta', args.interval, True)):
+        result = run(events, interval, delta)
+        print(f"{name:<18}{result['events']:>8}{result['bytes'] / 1024:>10.1f}"
+              f"{1 - result['events'] / baseline['events']:>11.1%}{1 - result['bytes'] / baseline['bytes']:>10.1%}"
+              f"{result['mismatch']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+"""가짜 STT/LLM/Firestore/GCS 위에서 앱 전체에 동시 세션 부하를 걸어 한계를 찾는 부하 테스트
+
+사용법:
+    python -m benchmarks.load_bench [--clients 5,10,20,40] [--duration 15] [--max-lag-ms 100]
+                                    [--stt-latency 0.05] [--llm-first-token 0.4] [--db-latency 0.02] ...
+
+--clients의 단계마다 benchmarks.load_server를 새 프로세스로 띄우고(실제 앱 + gevent, 클라우드
+서비스만 가짜), 그만큼의 합성 클라이언트가 웹소켓으로 접속해 start_session을 보내고
+16kHz PCM을 실시간 속도(100ms마다 한 프레임)로 audio_stream에 흘려보냅니다. 오디오는
+"단어" 4개(각 0.5초, 클라이언트마다 다른 값)와 1초 침묵이 반복되며, final_transcript를
+받으면 브라우저처럼 서버로 돌려보내 AI 제안을 받습니다.
+
+단계마다 다음을 출력합니다.
+    - 처리량: 초당 받은 이벤트 수, 초당 확정된 오디오(초)
+    - 단계별 p50/p99 지연: 단어 오디오를 보낸 뒤 중간/최종 결과까지(클라이언트 측),
+      최종 결과를 돌려보낸 뒤 AI 첫 조각/완료까지(클라이언트 측),
+      Firestore 쓰기와 GCS 업로드(서버 /metrics 히스토그램에서 추정)
+    - 세션당 메모리: 세션이 모두 열려 있을 때 RSS - 시작 직후 RSS를 세션 수로 나눈 값
+    - 이벤트 루프 지연 p99: 이 값이 --max-lag-ms를 넘는 첫 단계를 포화 지점으로 봅니다.
+
+가짜 인식기의 계산은 서버 프로세스에서 돌기 때문에 실제보다 서버 CPU를 조금 더 씁니다.
+클라이언트 쪽 전송이 밀리면(부하 생성기가 병목) 경고를 출력합니다.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import urllib.request
+from collections import deque
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+import simple_websocket  # noqa: E402
+
+from testing.fakes import FakeCompletionServer  # noqa: E402
+from app.interim import apply_delta  # noqa: E402
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.1
+FRAME_SAMPLES = int(SAMPLE_RATE * FRAME_SECONDS)
+WORD_FRAMES = 5  # 0.5초
+WORDS_PER_SENTENCE = 4
+SILENCE_FRAMES = 10  # 1초
+CYCLE_FRAMES = WORD_FRAMES * WORDS_PER_SENTENCE + SILENCE_FRAMES
+STYLE_ID = 'load-style'
+LLM_CHUNKS = ('Sure', ',', ' the', ' price', ' is', ' fixed', ' for', ' a', ' year', '.')
+
+STAGES = (
+    ('interim', 'word → interim'),
+    ('final', 'word → final'),
+    ('ai_first', 'final → AI 1st'),
+    ('ai_done', 'final → AI done'),
+    ('firestore_write_seconds', 'firestore write'),
+    ('gcs_upload_seconds', 'gcs upload'),
+)
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def histogram_quantiles(text, name, quantiles=(0.5, 0.99)):
+    """Prometheus 텍스트에서 name 히스토그램의 분위수를 구간 안 선형 보간으로 추정합니다."""
+    buckets = {}
+    for line in text.splitlines():
+        if line.startswith(f"{name}_bucket{{"):
+            labels, value = line.rsplit(' ', 1)
+            le = labels.split('le="', 1)[1].split('"', 1)[0]
+            bound = float('inf') if le == '+Inf' else float(le)
+            buckets[bound] = buckets.get(bound, 0) + int(float(value))
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if not total:
+        return [None] * len(quantiles)
+    results = []
+    for q in quantiles:
+        rank = q * total
+        lower, below = 0.0, 0
+        for bound in bounds:
+            if buckets[bound] >= rank:
+                if bound == float('inf'):
+                    results.append(lower)
+                else:
+                    inside = buckets[bound] - below
+                    results.append(lower + (bound - lower) * ((rank - below) / inside if inside else 1))
+                break
+            lower, below = bound, buckets[bound]
+    return results
+
+
+class LoadClient:
+    """Socket.IO(Engine.IO v4) 프로토콜로 말하는 최소한의 웹소켓 클라이언트 하나"""
+
+    def __init__(self, url, index, results):
+        self.index = index
+        self.meeting_id = f"load-meeting-{index:04d}"
+        self.results = results
+        self.ws = simple_websocket.Client(f"{url}/socket.io/?EIO=4&transport=websocket")
+        self._send_lock = threading.Lock()
+        self.frame = 0
+        self.word_sent_at = {}  # 단어 번호 -> 그 단어가 끝난 뒤 첫 프레임을 보낸 시각
+        self.interim_text = ''
+        self.finalized_words = 0
+        self.pending_finals = deque()
+        self.suggestion_started = {}
+        self.events = 0
+        self.connected = threading.Event()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+        self._send('40')
+
+    def _send(self, data):
+        with self._send_lock:
+            self.ws.send(data)
+
+    def emit(self, event, data=None, binary=None):
+        if binary is not None:
+            # 바이너리 첨부가 하나인 이벤트: 자리 표시자를 담은 텍스트 뒤에 바이너리 프레임을 보냅니다.
+            with self._send_lock:
+                self.ws.send('451-' + json.dumps([event, {'_placeholder': True, 'num': 0}]))
+                self.ws.send(binary)
+            return
+        self._send('42' + json.dumps([event] if data is None else [event, data]))
+
+    def _read(self):
+        while not self.closed:
+            try:
+                message = self.ws.receive()
+            except Exception:
+                return
+            if message is None:
+                return
+            if message == '2':
+                self._send('3')
+            elif message.startswith('40'):
+                self.connected.set()
+            elif message.startswith('42'):
+                event, *args = json.loads(message[2:])
+                self.events += 1
+                self._on_event(event, args[0] if args else None)
+
+    def _on_event(self, event, data):
+        now = time.monotonic()
+        if event == 'interim_transcript':
+            self.interim_text = apply_delta(self.interim_text, data)
+            word = self.finalized_words + len(self.interim_text.split()) - 1
+            self._record('interim', now, self.word_sent_at.get(word))
+        elif event == 'final_transcript':
+            self.interim_text = ''
+            count = len(data['transcript'].split())
+            self._record('final', now, self.word_sent_at.pop(self.finalized_words + count - 1, None))
+            self.finalized_words += count
+            self.results['final_audio'] += count * WORD_FRAMES * FRAME_SECONDS
+            self.pending_finals.append(now)
+            self.emit('final_transcript', {'transcript': data['transcript'], 'meeting_id': self.meeting_id,
+                                           'answer_style_id': STYLE_ID, 'trace_id': data.get('trace_id')})
+        elif event in ('ai_response_delta', 'ai_response'):
+            key = data.get('id', id(data))
+            if key not in self.suggestion_started:
+                # 합쳐진 질문들 중 가장 먼저 보낸 것부터 잽니다.
+                started = self.pending_finals[0] if self.pending_finals else None
+                self.pending_finals.clear()
+                self.suggestion_started[key] = started
+                self._record('ai_first', now, started)
+            if event == 'ai_response':
+                self._record('ai_done', now, self.suggestion_started.pop(key))
+        elif event == 'ai_response_done':
+            self._record('ai_done', now, self.suggestion_started.pop(data['id'], None))
+
+    def _record(self, stage, now, started):
+        if started is not None:
+            self.results[stage].append(now - started)
+
+    def start(self):
+        self.emit('start_session', {'meeting_id': self.meeting_id})
+
+    def send_frame(self):
+        position = self.frame % CYCLE_FRAMES
+        sentence = self.frame // CYCLE_FRAMES
+        if position < WORD_FRAMES * WORDS_PER_SENTENCE:
+            word = sentence * WORDS_PER_SENTENCE + position // WORD_FRAMES
+            # 클라이언트마다, 단어마다 값을 달리해 인식 결과(와 AI 캐시 키)가 겹치지 않게 합니다.
+            value = 1000 + (self.index * 7919 + word * 37) % 30000
+        else:
+            value = 0
+        if position and position % WORD_FRAMES == 0 and position <= WORD_FRAMES * WORDS_PER_SENTENCE:
+            # 이 프레임이 들어가야 가짜 인식기가 앞 단어의 끝을 알 수 있습니다.
+            self.word_sent_at[sentence * WORDS_PER_SENTENCE + position // WORD_FRAMES - 1] = time.monotonic()
+        self.emit('audio_stream', binary=value.to_bytes(2, 'little', signed=True) * FRAME_SAMPLES)
+        self.frame += 1
+
+    def close(self):
+        try:
+            self.emit('stop_session')
+            time.sleep(0.05)
+        finally:
+            self.closed = True
+            self.ws.close()
+
+
+def start_server(port, args, openai_base_url):
+    command = [sys.executable, '-m', 'benchmarks.load_server', '--port', str(port),
+               '--meetings', str(max(args.clients) + 1),
+               '--stt-latency', str(args.stt_latency), '--stt-jitter', str(args.stt_jitter),
+               '--db-latency', str(args.db_latency), '--db-jitter', str(args.db_jitter),
+               '--gcs-latency', str(args.gcs_latency), '--gcs-jitter', str(args.gcs_jitter),
+               '--openai-base-url', openai_base_url]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"load server exited with {process.returncode}")
+        try:
+            get_json(f"http://127.0.0.1:{port}/bench/stats", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('load server did not start')
+
+
+def run_clients(url, count, duration, index_offset=0):
+    """count개의 클라이언트로 duration초 동안 실시간 오디오를 보냅니다. (결과, 중간 RSS 측정 함수)"""
+    results = {'interim': [], 'final': [], 'ai_first': [], 'ai_done': [], 'final_audio': 0.0}
+    load = [LoadClient(url, index_offset + i, results) for i in range(count)]
+    for client in load:
+        client.connected.wait(10)
+        client.start()
+    time.sleep(0.2)
+
+    started = time.monotonic()
+    frames = int(duration / FRAME_SECONDS)
+    late = 0
+    for n in range(frames):
+        for client in load:
+            client.send_frame()
+        delay = started + (n + 1) * FRAME_SECONDS - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            late += 1
+    elapsed = time.monotonic() - started
+    time.sleep(1.0)  # 마지막 결과와 AI 응답을 기다립니다.
+    events = sum(c.events for c in load)
+    return load, results, elapsed, events, late / max(1, frames)
+
+
+def run_step(count, args, llm):
+    port = free_port()
+    server = start_server(port, args, llm.base_url)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        # 처음 쓰일 때 만들어지는 것들(클라이언트 풀, 늦게 import되는 모듈)을 세션 하나로 먼저 만들어 두고
+        # 기준 RSS를 잽니다. 최종 결과와 AI 응답까지 한 번 돌도록 문장 하나 길이만큼 보냅니다.
+        warm, _, _, _, _ = run_clients(f"ws://127.0.0.1:{port}", 1, CYCLE_FRAMES * FRAME_SECONDS,
+                                       index_offset=count)
+        for client in warm:
+            client.close()
+        time.sleep(0.5)
+        idle = get_json(f"{base}/bench/stats")
+
+        peak = {}
+        timer = threading.Timer(args.duration * 0.8, lambda: peak.update(get_json(f"{base}/bench/stats")))
+        timer.start()
+        load, results, elapsed, events, late = run_clients(f"ws://127.0.0.1:{port}", count, args.duration)
+        timer.join()
+        lag = get_json(f"{base}/bench/stats")['loop_lag']
+        for client in load:
+            client.close()
+        time.sleep(args.gcs_latency + args.gcs_jitter + 1.0)  # 업로드와 배치 커밋이 끝나기를 기다립니다.
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            metrics_text = response.read().decode('utf-8')
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    row = {'clients': count, 'events_per_s': events / elapsed, 'final_audio_per_s': results['final_audio'] / elapsed,
+           'late': late, 'lag_p99_ms': max(lag['p99_ms'] or 0, (peak.get('loop_lag') or {}).get('p99_ms') or 0)}
+    for stage, _ in STAGES[:4]:
+        row[stage] = (percentile(results[stage], 0.5), percentile(results[stage], 0.99))
+    for stage, _ in STAGES[4:]:
+        row[stage] = tuple(histogram_quantiles(metrics_text, stage))
+    row['mb_per_session'] = (peak['rss_bytes'] - idle['rss_bytes']) / count / 2 ** 20 if peak else None
+    return row
+
+
+def fmt(pair):
+    if pair[0] is None:
+        return f"{'-':>13}"
+    return f"{pair[0] * 1000:>6.0f}/{pair[1] * 1000:<6.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=lambda s: [int(x) for x in s.split(',')], default=[5, 10, 20, 40])
+    parser.add_argument('--duration', type=float, default=15, help='단계마다 오디오를 보내는 시간(초)')
+    parser.add_argument('--max-lag-ms', type=float, default=100, help='포화로 보는 이벤트 루프 지연 p99')
+    parser.add_argument('--stt-latency', type=float, default=0.05)
+    parser.add_argument('--stt-jitter', type=float, default=0.05)
+    parser.add_argument('--llm-first-token', type=float, default=0.4)
+    parser.add_argument('--llm-chunk-delay', type=float, default=0.03)
+    parser.add_argument('--llm-jitter', type=float, default=0.2)
+    parser.add_argument('--db-latency', type=float, default=0.02)
+    parser.add_argument('--db-jitter', type=float, default=0.02)
+    parser.add_argument('--gcs-latency', type=float, default=0.2)
+    parser.add_argument('--gcs-jitter', type=float, default=0.1)
+    args = parser.parse_args()
+
+    header = f"{'clients':>7}{'events/s':>10}{'audio s/s':>10}"
+    header += ''.join(f"{label:>16}" for _, label in STAGES)
+    header += f"{'lag p99 ms':>12}{'MB/session':>12}"
+    print('latency columns: p50/p99 ms')
+    print(header)
+    saturated = None
+    with FakeCompletionServer(LLM_CHUNKS, first_token_delay=args.llm_first_token, chunk_delay=args.llm_chunk_delay,
+                              jitter=args.llm_jitter) as llm:
+        for count in args.clients:
+            row = run_step(count, args, llm)
+            line = f"{row['clients']:>7}{row['events_per_s']:>10.1f}{row['final_audio_per_s']:>10.1f}"
+            line += ''.join(f"{fmt(row[stage]):>16}" for stage, _ in STAGES)
+            memory = f"{row['mb_per_session']:.2f}" if row['mb_per_session'] is not None else '-'
+            line += f"{row['lag_p99_ms']:>12.1f}{memory:>12}"
+            print(line, flush=True)
+            if row['late'] > 0.05:
+                print(f"  warning: load generator sent {row['late']:.0%} of frames late; results understate capacity")
+            if saturated is None and row['lag_p99_ms'] > args.max_lag_ms:
+                saturated = count
+
+    if saturated is None:
+        print(f"event loop kept up (lag p99 <= {args.max_lag_ms:.0f} ms) up to {args.clients[-1]} clients")
+    else:
+        print(f"event loop fell behind (lag p99 > {args.max_lag_ms:.0f} ms) at {saturated} clients")
+
+
+if __name__ == '__main__':
+    main()
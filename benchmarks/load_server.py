@@ -0,0 +1,158 @@
+"""부하 테스트용 서버: 실제 앱을 gevent로 띄우되 클라우드 서비스는 인메모리 가짜로 바꿉니다.
+
+사용법 (보통은 benchmarks.load_bench가 단계마다 새로 띄웁니다):
+    python -m benchmarks.load_server --port 5055 [--meetings 50] [--stt-latency 0.05] ...
+
+운영 환경의 gunicorn 명령(Dockerfile의 CMD)으로 띄우려면 앱 대신 create_fake_app을 넘깁니다:
+    gunicorn -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker \
+        "benchmarks.load_server:create_fake_app('--meetings', '4')"
+
+운영 환경(gevent 워커)과 같이 프로세스 하나가 gevent 이벤트 루프 하나로 모든 세션을
+처리합니다. Speech-to-Text, Firestore, Cloud Storage는 지정한 지연 시간과 흔들림을 가진
+가짜 구현으로, OpenAI는 --openai-base-url의 가짜 서버로 대신합니다. 측정을 위해 두 경로를
+더합니다.
+    GET /bench/stats  이벤트 루프 지연(마지막 호출 이후), RSS, 활성 세션 수
+    GET /metrics      앱의 지연 시간 히스토그램
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import select  # noqa: E402
+
+# gevent는 select.epoll을 감추는데, 이 환경의 httpx가 불러오는 trio는 import할 때 그 속성을 찾습니다.
+# (trio의 이벤트 루프는 쓰지 않으므로 원래 것을 되돌려 둬도 gevent 동작에는 영향이 없습니다.)
+if not hasattr(select, 'epoll'):
+    try:
+        select.epoll = monkey.get_original('select', 'epoll')
+    except AttributeError:
+        pass  # epoll이 없는 플랫폼 (macOS)
+
+import os  # noqa: E402
+import time  # noqa: E402
+import logging  # noqa: E402
+import argparse  # noqa: E402
+import resource  # noqa: E402
+import importlib  # noqa: E402
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+import gevent  # noqa: E402
+from flask import Blueprint, jsonify  # noqa: E402
+
+from app import create_app, socketio  # noqa: E402
+from app.clients import clients  # noqa: E402
+from testing.fakes import MemoryFirestore, MemoryStorageClient, FakeSpeechClient  # noqa: E402
+
+main_module = importlib.import_module('app.main')
+
+LAG_INTERVAL = 0.05
+STYLE_ID = 'load-style'
+
+
+def meeting_id(i):
+    return f"load-meeting-{i:04d}"
+
+
+def rss_bytes():
+    """현재 상주 메모리(RSS). /proc이 없으면 최대 RSS로 대신합니다."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class LoopLagMonitor:
+    """LAG_INTERVAL마다 깨어나 예정보다 얼마나 늦게 깨어났는지 기록합니다.
+
+    이벤트 루프가 다른 작업에 막혀 있으면 그만큼 늦게 깨어나므로, 이 값이 커지면
+    오디오 프레임과 이벤트 전송도 같이 밀립니다.
+    """
+
+    def __init__(self):
+        self.samples = []
+
+    def run(self):
+        while True:
+            started = time.perf_counter()
+            gevent.sleep(LAG_INTERVAL)
+            self.samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+    def take(self):
+        samples, self.samples = sorted(self.samples), []
+        if not samples:
+            return {'samples': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+
+        def ms(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+        return {'samples': len(samples), 'p50_ms': ms(0.5), 'p99_ms': ms(0.99), 'max_ms': ms(1.0)}
+
+
+def install_fakes(args):
+    db = MemoryFirestore(latency=args.db_latency, jitter=args.db_jitter, seed=1)
+    db.collection('answer_styles').document(STYLE_ID).set({'id': STYLE_ID, 'name': 'Load', 'prompt': 'Be brief.'})
+    for i in range(args.meetings):
+        db.collection('meetings').document(meeting_id(i)).set(
+            {'id': meeting_id(i), 'title': f"Load {i}", 'language': 'en-US'})
+    main_module.db = db
+    main_module.transcript_writes.db = db
+    main_module.handoffs.db = db
+
+    clients.register('speech', lambda: FakeSpeechClient(word_seconds=0.5, words_per_result=args.words_per_result,
+                                                        latency=args.stt_latency, jitter=args.stt_jitter),
+                     max_leases=100, max_clients=64)
+    clients.register('storage', lambda: MemoryStorageClient(latency=args.gcs_latency, jitter=args.gcs_jitter,
+                                                            keep_data=False))
+    if args.openai_base_url:
+        os.environ['OPENAI_BASE_URL'] = args.openai_base_url
+        os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--meetings', type=int, default=50)
+    parser.add_argument('--words-per-result', type=int, default=4)
+    parser.add_argument('--stt-latency', type=float, default=0.05)
+    parser.add_argument('--stt-jitter', type=float, default=0.05)
+    parser.add_argument('--db-latency', type=float, default=0.02)
+    parser.add_argument('--db-jitter', type=float, default=0.02)
+    parser.add_argument('--gcs-latency', type=float, default=0.2)
+    parser.add_argument('--gcs-jitter', type=float, default=0.1)
+    parser.add_argument('--openai-base-url')
+    return parser
+
+
+def create_fake_app(*argv):
+    """가짜 클라우드 서비스로 바꾼 앱. gunicorn이 워커마다 불러 쓰는 앱 팩토리입니다."""
+    install_fakes(build_parser().parse_args(argv))
+    return create_app()
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.port is None:
+        parser.error('--port is required')
+
+    logging.basicConfig(level=logging.WARNING)
+    install_fakes(args)
+
+    monitor = LoopLagMonitor()
+    bench = Blueprint('bench', __name__)
+
+    @bench.route('/bench/stats')
+    def stats():
+        return jsonify(loop_lag=monitor.take(), rss_bytes=rss_bytes(), sessions=len(main_module.workers))
+
+    app = create_app()
+    app.register_blueprint(bench)
+    gevent.spawn(monitor.run)
+    socketio.run(app, host='127.0.0.1', port=args.port, log_output=False)
+
+
+if __name__ == '__main__':
+    main()
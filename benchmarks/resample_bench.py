@@ -0,0 +1,52 @@
+"""서버 쪽 스트리밍 리샘플러의 처리량을 재는 벤치마크
+
+사용법:
+    python -m benchmarks.resample_bench [--seconds 60] [--chunk-ms 100]
+
+클라이언트가 보낼 수 있는 샘플 레이트/형식마다 chunk-ms 단위 조각으로 나눠 넣고,
+CPU 1초에 처리하는 오디오 초(audio-s/cpu-s)를 출력합니다. 이 값이 곧 코어 하나가
+감당할 수 있는 동시 세션 수의 상한입니다.
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.resample import StreamingResampler, negotiate_sample_rate  # noqa: E402
+
+
+def make_input(rate, seconds, sample_format, seed=0):
+    rng = np.random.default_rng(seed)
+    wave = np.clip(rng.normal(0, 0.2, int(rate * seconds)), -1, 1)
+    if sample_format == 'float32':
+        return wave.astype('<f4').tobytes()
+    return (wave * 32767).astype('<i2').tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--chunk-ms', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'input':<18}{'output':>8}{'taps':>6}{'audio-s/cpu-s':>15}")
+    for rate in (8000, 16000, 44100, 48000):
+        for sample_format in ('int16', 'float32'):
+            data = make_input(rate, args.seconds, sample_format)
+            resampler = StreamingResampler(rate, negotiate_sample_rate(rate), sample_format)
+            chunk = rate * args.chunk_ms // 1000 * resampler.dtype.itemsize
+            start = time.process_time()
+            for i in range(0, len(data), chunk):
+                resampler.process(data[i:i + chunk])
+            cpu = time.process_time() - start
+            taps = '-' if resampler.passthrough else resampler.taps
+            print(f"{rate:>6}Hz {sample_format:<8}{resampler.output_rate:>8}{taps:>6}"
+                  f"{args.seconds / max(cpu, 1e-9):>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""대화록 전문 검색 색인의 구축 시간과 질의 지연 시간을 재는 벤치마크
+
+사용법:
+    python -m benchmarks.search_bench [--lines 200000] [--meetings 2000] [--queries 500]
+
+한국어와 영어 문장을 섞은 합성 대화록(시드 고정)을 색인한 뒤, 한 단어/여러 단어/
+미팅 필터/기간 필터 질의의 p50, p99 지연 시간을 출력합니다. 단어는 실제 대화처럼
+지프 분포(자주 쓰는 단어가 훨씬 많이 나옴)로 뽑고, 질의어도 같은 분포로 뽑습니다.
+--memory를 주면 색인이 차지하는 메모리도 잽니다. (tracemalloc 때문에 구축이 느려짐)
+"""
+
+import os
+import time
+import random
+import itertools
+import argparse
+import datetime
+import tracemalloc
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.search import SearchIndex  # noqa: E402
+
+PARTICLES = ('', '를', '을', '은', '는', '이', '가', '에서', '으로', '도')
+_SYLLABLES_KO = '회의계약갱신일정배송견적가격담당자보고서다음주간검토고객요청확인문제해결예산승인발표'
+_SYLLABLES_EN = ('con', 'tra', 'de', 'li', 'ver', 'sche', 'dule', 'pri', 'ce', 'bud', 'get', 'port', 'in', 'vo',
+                 'ship', 'ment', 'pro', 'po', 'sal', 're', 'view', 'team', 'dis', 'count')
+
+
+def vocabulary(rng, size):
+    korean = {''.join(rng.choice(_SYLLABLES_KO) for _ in range(rng.randint(2, 3))) for _ in range(size)}
+    english = {''.join(rng.choice(_SYLLABLES_EN) for _ in range(rng.randint(2, 4))) for _ in range(size)}
+    return sorted(korean), sorted(english)
+
+
+class Zipf:
+    def __init__(self, words, rng, s=1.1):
+        self.words = list(words)
+        rng.shuffle(self.words)
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(len(self.words))))
+        self.rng = rng
+
+    def sample(self, k=1):
+        return self.rng.choices(self.words, cum_weights=self.cum_weights, k=k)
+
+
+def sentence(rng, korean, english):
+    if rng.random() < 0.5:
+        return ' '.join(w + rng.choice(PARTICLES) for w in korean.sample(rng.randint(4, 14)))
+    return ' '.join(w + rng.choice(('', 's')) for w in english.sample(rng.randint(4, 18)))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--meetings', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--vocabulary', type=int, default=3000, help='언어별 단어 수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    korean, english = (Zipf(words, rng) for words in vocabulary(rng, args.vocabulary))
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    index = SearchIndex()
+    lines = [{
+        'meeting_id': f"m{rng.randrange(args.meetings)}",
+        'speaker': 'Customer',
+        'text': sentence(rng, korean, english),
+        'timestamp': start + datetime.timedelta(minutes=i),
+    } for i in range(args.lines)]
+    if args.memory:
+        tracemalloc.start()
+    began = time.perf_counter()
+    for i, line in enumerate(lines):
+        index.add(f"t{i}", line)
+    build = time.perf_counter() - began
+    stats = index.stats()
+    memory = ''
+    if args.memory:
+        memory = f", {tracemalloc.get_traced_memory()[0] / 2 ** 20:.0f} MiB"
+        tracemalloc.stop()
+    print(f"indexed {stats['documents']} lines, {stats['terms']} terms in {build:.2f}s{memory}")
+
+    mid = start + datetime.timedelta(minutes=args.lines // 2)
+    kinds = {
+        'one word (en)': lambda: dict(query=english.sample()[0]),
+        'one word (ko)': lambda: dict(query=korean.sample()[0] + rng.choice(PARTICLES)),
+        'three words': lambda: dict(query=' '.join(english.sample(2) + korean.sample(1))),
+        'meeting filter': lambda: dict(query=english.sample()[0], meeting_id=f"m{rng.randrange(args.meetings)}"),
+        'date filter': lambda: dict(query=korean.sample()[0], start=mid, end=mid + datetime.timedelta(days=7)),
+    }
+    print(f"{'query':<18}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, make in kinds.items():
+        samples = []
+        for _ in range(args.queries):
+            params = make()
+            began = time.perf_counter()
+            index.search(**params)
+            samples.append(time.perf_counter() - began)
+        print(f"{name:<18}{percentile(samples, 0.5) * 1000:>10.2f}{percentile(samples, 0.99) * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""세션마다 인식 클라이언트를 새로 만들 때와 공유 채널 풀에서 빌릴 때의 세션 시작 지연을 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.session_start_bench [--sessions 50] [--create-ms 300] [--concurrency 10]
+
+speech.SpeechClient()를 새로 만들 때 드는 비용(gRPC 채널 생성, TLS 연결, 인증 정보 로드)은
+--create-ms만큼 걸리는 가짜 인식기 생성으로 흉내 냅니다. 각 세션은 SpeechWorker를 만들고
+곧바로 오디오를 넣으며, start_session부터 첫 인식 요청을 보내기까지의 시간을 잽니다.
+"""
+
+import os
+import time
+import argparse
+import threading
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.clients import ClientPool  # noqa: E402
+from testing.fakes import FakeSpeechClient  # noqa: E402
+from app.speech_worker import SpeechWorker  # noqa: E402
+
+CHUNK = b'\x10\x00' * 1600  # 16kHz 100ms
+
+
+class _NullSocketIO:
+    def emit(self, event, data, to=None):
+        pass
+
+
+def slow_client(create_ms):
+    time.sleep(create_ms / 1000)
+    return FakeSpeechClient()
+
+
+class _PerSessionPool:
+    """예전 동작: 세션마다 클라이언트를 새로 만듭니다."""
+
+    def __init__(self, create_ms):
+        self.create_ms = create_ms
+
+    def acquire(self):
+        return ClientPool('speech', lambda: slow_client(self.create_ms)).acquire()
+
+    def release(self, lease, failed=False):
+        pass
+
+
+def run_session(sid, pool, results):
+    worker = SpeechWorker(_NullSocketIO(), sid, 'en-US', pool=pool, vad=False)
+    thread = threading.Thread(target=worker.process)
+    thread.start()
+    worker.add_audio_chunk(CHUNK)
+    worker.close()
+    thread.join()
+    results.append(worker.first_request_seconds)
+
+
+def run(pool, sessions, concurrency):
+    results = []
+    for start in range(0, sessions, concurrency):
+        threads = [threading.Thread(target=run_session, args=(f"s{i}", pool, results))
+                   for i in range(start, min(sessions, start + concurrency))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    results.sort()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--create-ms', type=float, default=300, help='클라이언트 하나를 만드는 데 걸리는 시간')
+    args = parser.parse_args()
+
+    pooled = ClientPool('speech', lambda: slow_client(args.create_ms), max_leases=100, max_clients=4)
+    print(f"{'clients':<12}{'p50 ms':>10}{'p99 ms':>10}{'created':>10}")
+    for label, pool in (('per-session', _PerSessionPool(args.create_ms)), ('pooled', pooled)):
+        results = run(pool, args.sessions, args.concurrency)
+        p50 = results[len(results) // 2] * 1000
+        p99 = results[min(len(results) - 1, int(len(results) * 0.99))] * 1000
+        created = args.sessions if pool is not pooled else pooled.stats()['created']
+        print(f"{label:<12}{p50:>10.1f}{p99:>10.1f}{created:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""콜드 스타트 비용: 앱 import 시간 분해(python -X importtime)와 첫 응답까지의 시간을 재는 벤치마크
+
+사용법:
+    python -m benchmarks.startup_bench [--runs 5] [--top 15] [--warm firestore,speech]
+
+1) 새 프로세스에서 `import run`(gunicorn이 불러오는 것과 같은 앱 생성)을 -X importtime으로
+   실행해, 최상위 패키지별 import 시간과 무거운 SDK가 import 단계에서 불러와졌는지 보여 줍니다.
+2) benchmarks.load_server(클라우드 서비스는 인메모리 가짜)를 띄워 프로세스 시작부터
+   첫 /meeting/... 응답까지의 시간을 잽니다. --warm을 주면 먼저 /ready?warm=...을 부른 뒤
+   첫 미팅 페이지를 요청합니다.
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+# import 단계에서 불러오지 않아야 하는 무거운 SDK (첫 사용 때 불러옵니다)
+HEAVY_MODULES = ('google.cloud.firestore', 'google.cloud.speech', 'google.cloud.storage', 'google.api_core',
+                 'grpc', 'openai', 'tiktoken')
+
+
+def importtime(statement='import run'):
+    """새 프로세스에서 statement를 실행하고 {모듈: (자체 µs, 누적 µs)}를 반환합니다."""
+    env = dict(os.environ)
+    env.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env,
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+def by_package(modules):
+    totals = defaultdict(int)
+    for name, (own, _) in modules.items():
+        top = name.split('.')[0]
+        if top == 'google' and name.count('.') >= 2:
+            top = '.'.join(name.split('.')[:3])
+        totals[top] += own
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def heavy_imported(modules):
+    return sorted({heavy for heavy in HEAVY_MODULES for name in modules
+                   if name == heavy or name.startswith(heavy + '.')})
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def get(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status
+
+
+def time_to_first_response(warm=None, timeout=30):
+    """load_server를 띄우고 (시작 → 첫 미팅 페이지 응답, 그중 /ready 워밍 시간)을 초 단위로 반환합니다."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    server = subprocess.Popen([sys.executable, '-m', 'benchmarks.load_server', '--port', str(port), '--meetings', '1',
+                               '--db-latency', '0', '--db-jitter', '0', '--gcs-latency', '0', '--gcs-jitter', '0'],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        warmed = 0.0
+        while True:
+            if time.monotonic() - started > timeout:
+                raise TimeoutError('server did not answer')
+            try:
+                if warm:
+                    before = time.monotonic()
+                    get(f"{base}/ready?warm={warm}", timeout=timeout)
+                    warmed = time.monotonic() - before
+                before = time.monotonic()
+                get(f"{base}/meeting/load-meeting-0000", timeout=timeout)
+                return time.monotonic() - started, warmed, time.monotonic() - before
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--warm', help='첫 요청 전에 /ready로 만들어 둘 클라이언트 (예: firestore,speech)')
+    args = parser.parse_args()
+
+    modules = importtime()
+    total = sum(own for own, _ in modules.values())
+    print(f"import run: {total / 1000:.0f} ms in {len(modules)} modules")
+    for package, own in by_package(modules)[:args.top]:
+        print(f"  {package:<32}{own / 1000:>8.1f} ms")
+    heavy = heavy_imported(modules)
+    print(f"heavy SDKs imported at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    samples = sorted(time_to_first_response(args.warm) for _ in range(args.runs))
+    first, warmed, request = samples[len(samples) // 2]
+    print(f"time to first /meeting response (median of {args.runs}): {first * 1000:.0f} ms "
+          f"(first request {request * 1000:.0f} ms" + (f", /ready warm {warmed * 1000:.0f} ms)" if args.warm else ")"))
+
+
+if __name__ == '__main__':
+    main()
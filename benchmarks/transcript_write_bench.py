@@ -0,0 +1,99 @@
+"""대화록 저장 방식별 핸들러 지연 시간과 쓰기 처리량을 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.transcript_write_bench [--sessions 20] [--utterances 50] [--latency 0.02]
+
+인메모리 Firestore(왕복 지연 시간 설정 가능)를 대상으로, 발화마다 .set()을 두 번
+호출하던 기존 방식과 WriteBehindQueue의 배치 커밋 방식을 비교합니다.
+"""
+
+import os
+import time
+import argparse
+import threading
+import datetime
+import statistics
+
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from testing.fakes import MemoryFirestore  # noqa: E402
+from app.write_behind import WriteBehindQueue  # noqa: E402
+
+
+def _line(meeting_id, speaker, text):
+    return {
+        'meeting_id': meeting_id,
+        'speaker': speaker,
+        'text': text,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc),
+    }
+
+
+def direct_handler(db):
+    def handle(meeting_id, text):
+        for speaker in ('Customer', 'AI'):
+            ref = db.collection('transcripts').document()
+            ref.set(dict(_line(meeting_id, speaker, text), id=ref.id))
+    return handle
+
+
+def write_behind_handler(queue):
+    def handle(meeting_id, text):
+        for speaker in ('Customer', 'AI'):
+            queue.enqueue('transcripts', _line(meeting_id, speaker, text))
+    return handle
+
+
+def drive(handle, sessions, utterances):
+    """세션마다 스레드 하나가 발화를 연달아 처리하며 핸들러 지연 시간을 잽니다."""
+    latencies = []
+    lock = threading.Lock()
+
+    def session(n):
+        local = []
+        for i in range(utterances):
+            start = time.perf_counter()
+            handle(f"meeting-{n}", f"utterance {i}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def report(name, latencies, elapsed, db):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<14}{statistics.median(latencies) * 1000:>10.2f}{p99 * 1000:>10.2f}"
+          f"{db.writes / elapsed:>14,.0f}{db.commits:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--utterances', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help='Firestore 왕복 지연 시간(초)')
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'p50 ms':>10}{'p99 ms':>10}{'writes/sec':>14}{'commits':>10}")
+
+    db = MemoryFirestore(latency=args.latency)
+    start = time.perf_counter()
+    latencies = drive(direct_handler(db), args.sessions, args.utterances)
+    report('direct set', latencies, time.perf_counter() - start, db)
+
+    db = MemoryFirestore(latency=args.latency)
+    queue = WriteBehindQueue(db)
+    start = time.perf_counter()
+    latencies = drive(write_behind_handler(queue), args.sessions, args.utterances)
+    queue.close()
+    report('write-behind', latencies, time.perf_counter() - start, db)
+
+
+if __name__ == '__main__':
+    main()
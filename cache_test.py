@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import importlib
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+import redis
+
+from app import create_app
+from app import cache
+from app.cache import TTLCache, get_style, get_meeting, list_styles, invalidate_styles
+from app.cluster import Cluster
+from testing.fakes import FakeRedisServer, MemoryFirestore
+
+main_module = importlib.import_module('app.main')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    ttl_cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2, ttl=5)
+
+    clock.now = 4.9
+    assert ttl_cache.get('a') == 1 and ttl_cache.get('b') == 2
+    clock.now = 5.0
+    assert ttl_cache.get('b') is None and 'b' not in ttl_cache
+    clock.now = 60.0
+    assert ttl_cache.get('a', 'gone') == 'gone'
+    assert ttl_cache.stats() == {'size': 0, 'hits': 2, 'misses': 2, 'evictions': 0, 'hit_rate': 0.5}
+
+
+def test_least_recently_used_entry_is_evicted():
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    assert ttl_cache.get('a') == 1  # 'b'가 가장 오래 쓰지 않은 항목이 됩니다.
+    ttl_cache.set('c', 3)
+
+    assert 'b' not in ttl_cache and ttl_cache.get('a') == 1 and ttl_cache.get('c') == 3
+    assert ttl_cache.stats()['evictions'] == 1
+
+    # None은 캐시하지 않으므로 없는 문서는 매번 다시 읽습니다.
+    loads = []
+    assert ttl_cache.get_or_load('missing', lambda: loads.append(1)) is None
+    assert ttl_cache.get_or_load('missing', lambda: loads.append(1)) is None
+    assert len(loads) == 2
+
+
+def test_styles_are_reread_after_create_update_and_delete(monkeypatch):
+    db = MemoryFirestore()
+    monkeypatch.setattr(main_module, 'db', db)
+    cache.clear_caches()
+    http = create_app().test_client()
+    db.collection('answer_styles').document('s1').set({'id': 's1', 'name': 'Brief', 'prompt': 'Be brief.'})
+    assert [style['id'] for style in list_styles(db)] == ['s1']
+
+    created = http.post('/api/style/create', json={'name': 'Formal', 'prompt': 'Be formal.'}).get_json()
+    assert sorted(style['id'] for style in list_styles(db)) == sorted(['s1', created['id']])
+
+    assert get_style(db, 's1')['prompt'] == 'Be brief.'
+    db.collection('answer_styles').document('s1').update({'prompt': 'Be very brief.'})
+    invalidate_styles('s1')
+    assert get_style(db, 's1')['prompt'] == 'Be very brief.'
+    assert {style['prompt'] for style in list_styles(db)} == {'Be very brief.', 'Be formal.'}
+
+    db.collection('answer_styles').document('s1').delete()
+    invalidate_styles('s1')
+    assert get_style(db, 's1') is None
+    assert [style['id'] for style in list_styles(db)] == [created['id']]
+
+
+def test_cached_documents_are_returned_as_copies():
+    db = MemoryFirestore()
+    cache.clear_caches()
+    db.collection('answer_styles').document('s1').set({'id': 's1', 'prompt': 'Be brief.'})
+    db.collection('meetings').document('m1').set({'id': 'm1', 'language': 'ko-KR'})
+    reads = db.reads
+
+    get_style(db, 's1')['prompt'] = 'changed'
+    get_meeting(db, 'm1')['language'] = 'changed'
+    list_styles(db)[0]['prompt'] = 'changed'
+
+    assert get_style(db, 's1')['prompt'] == 'Be brief.'
+    assert get_meeting(db, 'm1')['language'] == 'ko-KR'
+    assert list_styles(db)[0]['prompt'] == 'Be brief.'
+    # 두 번째 읽기부터는 캐시에서 나옵니다.
+    assert db.reads == reads + 3
+
+
+def test_invalidations_are_broadcast_to_other_processes():
+    db = MemoryFirestore()
+    with FakeRedisServer() as server:
+        cluster = Cluster(server.url, process_id='worker-a').start()
+        try:
+            channel = f"{cluster.prefix}:cache-invalidation"
+            # 구독을 시작하면서 캐시를 비우므로 그 뒤에 채웁니다.
+            assert wait_for(lambda: len(server._channels.get(channel.encode(), ())) == 1)
+            db.collection('answer_styles').document('s1').set({'id': 's1', 'prompt': 'Be brief.'})
+            assert wait_for(lambda: get_style(db, 's1') and 's1' in cache.style_cache)
+
+            # 다른 프로세스가 스타일을 바꾸면 이 프로세스의 캐시도 비웁니다.
+            other = redis.Redis.from_url(server.url)
+            other.publish(channel, json.dumps({'process': 'worker-b', 'cache': 'styles', 'key': 's1'}))
+            assert wait_for(lambda: 's1' not in cache.style_cache)
+
+            # 이 프로세스의 무효화는 다른 프로세스에 알립니다.
+            listener = other.pubsub(ignore_subscribe_messages=True)
+            listener.subscribe(channel)
+            assert wait_for(lambda: len(server._channels.get(channel.encode(), ())) == 2)
+            invalidate_styles('s2')
+            message = None
+            deadline = time.monotonic() + 5
+            while message is None and time.monotonic() < deadline:
+                message = listener.get_message(timeout=0.1)
+            assert json.loads(message['data']) == {'process': 'worker-a', 'cache': 'styles', 'key': 's2'}
+        finally:
+            cluster.shutdown()
+    # 멈춘 뒤에는 알리지 않습니다.
+    assert cache._invalidation_listeners == []
@@ -0,0 +1,130 @@
+import os
+import threading
+
+import pytest
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.clients import ClientPool, ClientRegistry, PoolExhausted
+from testing.fakes import FakeSpeechClient
+from app.speech_worker import SpeechWorker
+
+
+class Client:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        client = Client(len(self.made))
+        self.made.append(client)
+        return client
+
+
+class Silent:
+    def emit(self, event, data, to=None):
+        pass
+
+
+def test_clients_are_created_lazily_reused_and_capped_per_channel():
+    factory = Factory()
+    pool = ClientPool('speech', factory, max_leases=2, max_clients=2, acquire_timeout=0.05)
+    assert factory.made == []
+
+    leases = [pool.acquire() for _ in range(4)]
+    assert [lease.client.number for lease in leases] == [0, 0, 1, 1]
+    with pytest.raises(PoolExhausted):
+        pool.acquire()
+
+    # 반납되면 기다리던 호출이 그 자리를 받습니다.
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    pool.release(leases[2])
+    waiter.join(5)
+    assert got[0].client.number == 1
+    assert len(factory.made) == 2
+    assert pool.stats()['in_use'] == 4 and pool.stats()['waits'] >= 1
+
+
+def test_failing_or_old_clients_are_retired_and_replaced():
+    now = [0.0]
+    factory = Factory()
+    pool = ClientPool('speech', factory, max_failures=2, max_age=100, clock=lambda: now[0])
+
+    for _ in range(2):
+        pool.release(pool.acquire(), failed=True)
+    assert factory.made[0].closed
+    replacement = pool.acquire()
+    assert replacement.client.number == 1
+    pool.release(replacement)
+
+    # 오래된 클라이언트는 빌려 간 곳이 반납한 뒤에 닫힙니다.
+    lease = pool.acquire()
+    now[0] = 101
+    assert pool.acquire().client.number == 2
+    assert not factory.made[1].closed
+    pool.release(lease)
+    assert factory.made[1].closed
+    assert pool.stats()['retired'] == 2
+
+
+def test_old_shared_clients_are_replaced_but_never_closed_under_their_users():
+    now = [0.0]
+    factory = Factory()
+    pool = ClientPool('storage', factory, max_age=3600, clock=lambda: now[0])
+    uploading = pool.get()
+
+    # 한 시간이 지나면 새 클라이언트를 내주지만, get()으로 받아 간 곳이 아직 쓰는 클라이언트는 닫지 않습니다.
+    now[0] = 3601
+    assert pool.get() is not uploading
+    assert not uploading.closed
+    assert pool.stats()['clients'] == 1 and pool.stats()['retired'] == 1
+
+
+def test_forked_child_builds_its_own_clients():
+    registry = ClientRegistry()
+    registry.register('storage', Factory())
+    os.register_at_fork(after_in_child=registry.reset)
+    parent = registry.get('storage')
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        child = registry.get('storage')
+        os.write(write_fd, b'new' if child is not parent else b'same')
+        os._exit(0)
+    os.close(write_fd)
+    assert os.read(read_fd, 10) == b'new'
+    os.waitpid(pid, 0)
+    assert registry.get('storage') is parent
+
+
+def test_speech_sessions_share_one_channel():
+    made = []
+
+    def factory():
+        made.append(FakeSpeechClient())
+        return made[-1]
+
+    pool = ClientPool('speech', factory, max_leases=10)
+    for sid in ('a', 'b', 'c'):
+        worker = SpeechWorker(Silent(), sid, 'en-US', pool=pool, vad=False)
+        thread = threading.Thread(target=worker.process)
+        thread.start()
+        worker.add_audio_chunk(b'\x10\x00' * 1600)
+        worker.close()
+        thread.join(5)
+        assert worker.stats()['first_request_ms'] is not None
+
+    assert len(made) == 1 and made[0].streams_opened == 3
+    assert pool.stats()['in_use'] == 0
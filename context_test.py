@@ -0,0 +1,61 @@
+import os
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.context import ContextStore, MeetingContext, count_message_tokens, count_tokens
+from app.utils import build_messages
+
+
+def test_prompt_size_stays_bounded_and_summary_is_incremental():
+    context = MeetingContext('m1', budget=400, summary_tokens=100, fold_tokens=60)
+    calls = []
+
+    def summarize(summary, turns, max_tokens):
+        calls.append((summary, turns))
+        return (summary + ' ' + ' / '.join(text[:20] for _, text in turns)).strip()
+
+    sizes = []
+    for i in range(300):
+        text = f"turn {i}: " + ('가격과 배송 일정을 다시 확인해 주세요 ' if i % 2 else 'please confirm the delivery date ') * (1 + i % 5)
+        if context.add_turn('Customer' if i % 2 else 'AI', text):
+            context.fold(summarize)
+        history = context.build()
+        assert count_tokens(history) <= context.budget
+        sizes.append(count_message_tokens(build_messages('latest line', 'Be brief.', 'ko-KR', history)))
+
+    # 미팅이 길어져도 프롬프트 크기는 상한 아래에서 일정합니다.
+    assert max(sizes[50:]) <= max(sizes[:50]) + 5
+    assert context.folds == len(calls) > 5
+    # 요약은 매번 이전 요약 + 새로 밀려난 발화로만 갱신됩니다.
+    for (_, turns), (next_summary, _) in zip(calls, calls[1:]):
+        assert sum(count_tokens(text) for _, text in turns) < 200
+        assert next_summary
+    assert 'turn 299' in context.build()
+
+
+def test_falls_back_to_extractive_summary_when_summarizer_fails():
+    context = MeetingContext('m1', budget=200, summary_tokens=50, fold_tokens=10)
+
+    def broken(summary, turns, max_tokens):
+        raise RuntimeError('no model')
+
+    for i in range(40):
+        context.add_turn('Customer', f"sentence number {i} about the contract renewal")
+    assert context.fold(broken)
+    assert context.summary and count_tokens(context.summary) <= 50
+    assert context.build().startswith('Summary of earlier conversation:')
+
+
+def test_store_seeds_new_meetings_once():
+    store = ContextStore(ttl=60)
+    seeded = []
+
+    def seed():
+        seeded.append(1)
+        return [('Customer', 'hello'), ('AI', 'hi there')]
+
+    first = store.get('m1', seed)
+    assert store.get('m1', seed) is first
+    assert seeded == [1]
+    assert 'Customer: hello' in first.build()
@@ -0,0 +1,40 @@
+import os
+import signal
+import socket
+import urllib.request
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from testing.deploy import WebSocketClient, start_container
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_container_command_accepts_websocket_only_clients():
+    port = free_port()
+    server = start_container(port, dict(os.environ, WEB_CONCURRENCY='1'))
+    try:
+        # main.js와 같이 polling 없이 바로 websocket으로 접속합니다.
+        client = WebSocketClient()
+        client.connect(f"http://127.0.0.1:{port}")
+        assert client.connected and client.sid
+        assert client.open_packet['upgrades'] == []
+        client.disconnect()
+
+        # exec로 gunicorn이 셸 대신 신호를 직접 받아, 워커까지 정리하고 끝나야 합니다.
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2)
+        except OSError:
+            pass
+        else:
+            raise AssertionError('gunicorn is still serving after SIGTERM')
+    finally:
+        server.kill()
+        server.wait()
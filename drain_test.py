@@ -0,0 +1,162 @@
+import os
+import time
+import signal
+import socket
+import datetime
+import threading
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.audio_frames import build_frame
+from app.drain import HandoffStore, HANDOFF_COLLECTION
+from testing.deploy import WebSocketClient, start_container
+from testing.fakes import FakeRedisServer, MemoryFirestore
+
+SAMPLE_RATE = 16000
+FRAME_MS = 100
+WORD_FRAMES = 5  # 단어 하나 = 0.5초 (benchmarks.load_server의 가짜 인식기 단어 길이)
+WORDS = 24
+FRAME_INTERVAL = 0.04  # 실제 시간보다 조금 빠르게 보냅니다.
+# 운영과 같은 gunicorn 명령(Dockerfile의 CMD)에 앱만 가짜 클라우드 서비스를 쓰는 것으로 바꿉니다.
+FAKE_APP = ("benchmarks.load_server:create_fake_app('--meetings', '4', '--stt-latency', '0', '--stt-jitter', '0', "
+            "'--db-latency', '0', '--db-jitter', '0', '--gcs-latency', '0', '--gcs-jitter', '0')")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env):
+    return start_container(port, dict(env, WEB_CONCURRENCY='1'), app_spec=FAKE_APP)
+
+
+def frames(index):
+    """k번째 단어를 값 1000*(index+1)+k로 채운 100ms 프레임들"""
+    samples = SAMPLE_RATE * FRAME_MS // 1000
+    for k in range(1, WORDS + 1):
+        value = 1000 * (index + 1) + k
+        for _ in range(WORD_FRAMES):
+            yield value.to_bytes(2, 'little', signed=True) * samples
+
+
+class ResumingClient:
+    """main.js처럼 session_handoff를 받으면 다른 서버에 다시 연결해 세션을 이어 가는 클라이언트"""
+
+    def __init__(self, index, urls):
+        self.index = index
+        self.urls = list(urls)
+        self.meeting_id = f"load-meeting-{index:04d}"
+        self.frames = [build_frame(seq, seq * FRAME_MS, pcm) for seq, pcm in enumerate(frames(index))]
+        self.finals = []
+        self.handoffs = []
+        self.acks = []
+        self.sio = None
+
+    def connect(self, resume_token=None):
+        sio = WebSocketClient()
+        sio.on('final_transcript', self.finals.append)
+        sio.on('session_handoff', self.handoffs.append)
+        sio.connect(self.urls.pop(0))
+        self.sio = sio
+        self.acks.append(sio.call('start_session', {
+            'meeting_id': self.meeting_id, 'framing': 1, 'sample_rate': SAMPLE_RATE, 'sample_format': 'int16',
+            'resume_token': resume_token}, timeout=10))
+
+    def words(self):
+        return ' '.join(f['transcript'] for f in self.finals).split()
+
+    def run(self):
+        self.connect()
+        seq = handled = 0
+        while seq < len(self.frames):
+            if len(self.handoffs) > handled:
+                handoff = self.handoffs[handled]
+                handled += 1
+                self.sio.disconnect()
+                self.connect(handoff['resume_token'])
+                # 보낸 프레임 중 이전 서버가 받지 못한 것부터 다시 보냅니다.
+                seq = handoff['next_seq'] if handoff['next_seq'] is not None else 0
+            self.sio.emit('audio_stream', self.frames[seq])
+            seq += 1
+            time.sleep(FRAME_INTERVAL)
+        # 세션을 멈추면 남은 오디오의 최종 결과가 나옵니다.
+        self.sio.emit('stop_session')
+        deadline = time.monotonic() + 10
+        while len(self.words()) < WORDS and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.sio.disconnect()
+
+
+def test_firestore_handoff_is_taken_once_and_expires():
+    db = MemoryFirestore(latency=0.01)
+    store = HandoffStore(db)
+    state = {'trace_id': 't1', 'meeting_id': 'm1', 'tail': [[1.5, b'\x01\x02']]}
+    token = store.save(state)
+    # TTL 정책은 Timestamp 필드에만 걸 수 있습니다.
+    [doc] = db.documents(HANDOFF_COLLECTION)
+    assert isinstance(doc['expires_at'], datetime.datetime)
+
+    # 여러 인스턴스가 같은 토큰으로 동시에 이어받아도 한 곳만 상태를 받습니다.
+    taken = []
+    threads = [threading.Thread(target=lambda: taken.append(store.take(token))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [t for t in taken if t is not None] == [dict(state, tail=[(1.5, b'\x01\x02')])]
+    assert store.taken == 1 and db.documents(HANDOFF_COLLECTION) == []
+
+    # 만료된 토큰은 지우기만 하고 상태를 돌려주지 않습니다.
+    token = store.save(state)
+    expired = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    db.collection(HANDOFF_COLLECTION).document(token).update({'expires_at': expired})
+    assert store.take(token) is None
+    assert db.documents(HANDOFF_COLLECTION) == []
+
+
+def test_sigterm_hands_live_sessions_to_another_instance(tmp_path):
+    with FakeRedisServer() as redis:
+        env = dict(os.environ, SOCKETIO_MESSAGE_QUEUE=redis.url,
+                   AUDIO_ARCHIVE_DIR=str(tmp_path), DRAIN_DEADLINE_SECONDS='5')
+        ports = [free_port(), free_port()]
+        servers = [start_server(port, env) for port in ports]
+        try:
+            clients = [ResumingClient(i, [f"http://127.0.0.1:{port}" for port in ports]) for i in range(3)]
+            threads = [threading.Thread(target=client.run, daemon=True) for client in clients]
+            for thread in threads:
+                thread.start()
+            # 세션마다 최종 결과가 몇 개 나온 뒤, 단어 중간에서 첫 서버를 종료합니다.
+            deadline = time.monotonic() + 10
+            while min(len(client.finals) for client in clients) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.13)
+            # exec로 셸을 대신한 gunicorn 마스터가 받아 워커에 전하면, 워커의 Drain이 gunicorn의
+            # 종료 처리보다 먼저 세션을 넘기고 녹음을 올립니다.
+            servers[0].send_signal(signal.SIGTERM)
+            assert servers[0].wait(timeout=20) == 0
+            # 종료 전에 넘긴 세션의 녹음을 업로드합니다.
+            recordings = [path for path in tmp_path.rglob('*') if path.is_file()]
+            assert len(recordings) >= len(clients)
+
+            for thread in threads:
+                thread.join(30)
+                assert not thread.is_alive()
+        finally:
+            for server in servers:
+                server.kill()
+                server.wait()
+
+    for client in clients:
+        assert len(client.handoffs) == 1 and client.handoffs[0]['resume_token']
+        first, resumed = client.acks
+        assert not first['resumed'] and resumed == {'trace_id': first['trace_id'], 'resumed': True}
+        # 같은 추적 ID와 세션 시각으로 이어지고, 단어가 빠지거나 겹치지 않아야 합니다.
+        assert client.words() == [f"w{1000 * (client.index + 1) + k}" for k in range(1, WORDS + 1)]
+        assert {f['trace_id'] for f in client.finals} == {first['trace_id']}
+        assert client.finals[0]['start'] == 0
+        for previous, current in zip(client.finals, client.finals[1:]):
+            assert current['start'] == previous['end']
+        assert client.finals[-1]['end'] == WORDS * WORD_FRAMES * FRAME_MS / 1000
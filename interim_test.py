@@ -0,0 +1,59 @@
+import os
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from testing.fakes import ManualClock
+from app.interim import InterimEmitter, apply_delta
+
+
+def make_emitter(**options):
+    clock = ManualClock()
+    sent = []
+    emitter = InterimEmitter(lambda event, payload: sent.append((event, payload)), clock=clock,
+                             timer=clock.timer, **options)
+    return clock, sent, emitter
+
+
+def test_interims_are_coalesced_latest_wins_and_flushed_on_the_trailing_edge():
+    clock, sent, emitter = make_emitter(min_interval=0.25, delta=False)
+    emitter.interim('we')
+    for at, text in ((0.05, 'we sh'), (0.1, 'we should'), (0.15, 'we should sh')):
+        clock.advance(at)
+        emitter.interim(text)
+    assert [payload['transcript'] for _, payload in sent] == ['we']
+
+    clock.advance(0.25)
+    assert [payload['transcript'] for _, payload in sent] == ['we', 'we should sh']
+    assert emitter.stats()['received'] == 4 and emitter.stats()['emitted'] == 2
+
+
+def test_final_is_emitted_immediately_and_drops_the_pending_interim():
+    clock, sent, emitter = make_emitter(min_interval=0.25)
+    emitter.interim('hello')
+    clock.advance(0.1)
+    emitter.interim('hello wor')
+    emitter.final({'transcript': 'hello world', 'trace_id': 't'})
+    clock.advance(1.0)
+    assert [event for event, _ in sent] == ['interim_transcript', 'final_transcript']
+    assert sent[1][1]['transcript'] == 'hello world'
+
+    # 다음 발화는 빈 문장에서 다시 시작합니다.
+    emitter.interim('next')
+    assert sent[-1][1] == {'keep': 0, 'tail': 'next'}
+
+
+def test_deltas_rebuild_the_transcript_in_utf16_units():
+    clock, sent, emitter = make_emitter(min_interval=0)
+    texts = ['회의', '회의 일정을', '회의 일정은 🙂 다음', '회의 일정은 🙂 다음 주']
+    client = ''
+    for text in texts:
+        emitter.interim(text, trace_id='t')
+        payload = sent[-1][1]
+        client = apply_delta(client, payload)
+        assert client == text and payload['trace_id'] == 't'
+    # 이모지는 UTF-16에서 두 단위이므로 keep도 브라우저의 문자열 길이를 따릅니다.
+    assert sent[-1][1]['keep'] == len('회의 일정은 🙂 다음') + 1
+    assert sent[-1][1]['tail'] == ' 주'
+    stats = emitter.stats()
+    assert stats['emitted_bytes'] < stats['full_bytes']
@@ -0,0 +1,70 @@
+import os
+import threading
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import create_app
+from app import speech_worker
+from testing.fakes import FakeSpeechClient
+from app.metrics import MetricsRegistry
+from app.speech_worker import SpeechWorker
+
+
+class RecordingSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data))
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram('upload_seconds', 'Upload time', labels=('source',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, source='gcs')
+    registry.counter('uploads', 'Uploads').inc(2)
+    registry.gauge('queue_depth', 'Queued items', fn=lambda: 7)
+    # 같은 이름으로 다시 등록하면 같은 지표를 돌려줍니다.
+    assert registry.histogram('upload_seconds', 'Upload time', labels=('source',)) is latency
+
+    text = registry.render()
+    assert '# TYPE upload_seconds histogram' in text
+    assert 'upload_seconds_bucket{source="gcs",le="0.1"} 1' in text
+    assert 'upload_seconds_bucket{source="gcs",le="1"} 3' in text
+    assert 'upload_seconds_bucket{source="gcs",le="+Inf"} 4' in text
+    assert 'upload_seconds_sum{source="gcs"} 4.25' in text
+    assert 'upload_seconds_count{source="gcs"} 4' in text
+    assert 'uploads_total 2' in text
+    assert 'queue_depth 7' in text
+
+
+def test_worker_events_carry_the_trace_id_and_latencies_are_observed():
+    before_interim = speech_worker.AUDIO_TO_INTERIM.count()
+    before_final = speech_worker.AUDIO_TO_FINAL.count()
+    socketio = RecordingSocketIO()
+    client = FakeSpeechClient(word_seconds=0.5, words_per_result=2)
+    worker = SpeechWorker(socketio, 'sid-1', 'en-US', client=client, vad=False, trace_id='trace-1')
+    thread = threading.Thread(target=worker.process)
+    thread.start()
+    for k in range(1, 5):
+        worker.add_audio_chunk((500 * k).to_bytes(2, 'little', signed=True) * 8000)
+    worker.close()
+    thread.join(10)
+
+    assert socketio.events
+    assert all(data['trace_id'] == 'trace-1' for _, data in socketio.events)
+    assert speech_worker.AUDIO_TO_FINAL.count() > before_final
+    assert speech_worker.AUDIO_TO_INTERIM.count() > before_interim
+    assert worker.stats()['pending_bytes'] == 0
+
+
+def test_metrics_endpoint():
+    response = create_app().test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    for name in ('speech_audio_to_final_seconds', 'ai_final_to_first_token_seconds', 'firestore_write_seconds',
+                 'gcs_upload_seconds', 'speech_workers_active', 'speech_pending_audio_bytes'):
+        assert f'# TYPE {name} ' in text
@@ -0,0 +1,84 @@
+import os
+import datetime
+import importlib
+
+import pytest
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import create_app
+from testing.fakes import MemoryFirestore
+from app.pagination import fetch_page
+
+main_module = importlib.import_module('app.main')
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def seed_transcripts(db, meeting_id, count):
+    for i in range(count):
+        db.collection('transcripts').document(f"{meeting_id}-{i:04d}").set({
+            'meeting_id': meeting_id,
+            'speaker': 'AI' if i % 2 else 'Customer',
+            'text': f"line {i}",
+            # 두 줄씩 같은 시각이라 문서 ID로 동률을 가려야 합니다.
+            'timestamp': START + datetime.timedelta(seconds=i // 2),
+            'latency_ms': 12.5,
+        })
+
+
+def test_cursor_pages_cover_every_document_once():
+    db = MemoryFirestore()
+    seed_transcripts(db, 'm1', 25)
+    query = db.collection('transcripts').where('meeting_id', '==', 'm1')
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = fetch_page(query, 'timestamp', 'DESCENDING', limit=4, fields=['text'], cursor=cursor)
+        seen += [item['text'] for item in items]
+        if cursor is None:
+            break
+    assert seen == [f"line {i}" for i in reversed(range(25))]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = MemoryFirestore()
+    monkeypatch.setattr(main_module, 'db', db)
+    app = create_app()
+    return db, app.test_client()
+
+
+def test_meeting_transcripts_load_recent_window_then_older(client):
+    db, http = client
+    seed_transcripts(db, 'm1', 120)
+    seed_transcripts(db, 'm2', 3)
+
+    first = http.get('/api/meeting/m1/transcripts?limit=50').get_json()
+    assert [line['text'] for line in first['transcripts']] == [f"line {i}" for i in range(70, 120)]
+    # 목록에 필요한 필드만 가져옵니다.
+    assert set(first['transcripts'][0]) == {'id', 'speaker', 'text', 'timestamp'}
+
+    second = http.get(f"/api/meeting/m1/transcripts?limit=50&before={first['older_cursor']}").get_json()
+    third = http.get(f"/api/meeting/m1/transcripts?limit=50&before={second['older_cursor']}").get_json()
+    assert [line['text'] for line in second['transcripts']] == [f"line {i}" for i in range(20, 70)]
+    assert len(third['transcripts']) == 20 and third['older_cursor'] is None
+
+    assert http.get('/api/meeting/m1/transcripts?before=not-a-cursor').status_code == 400
+
+
+def test_history_pages_meetings_newest_first(client):
+    db, http = client
+    for i in range(7):
+        db.collection('meetings').document(f"m{i}").set({
+            'id': f"m{i}", 'title': f"Meeting {i}", 'language': 'en-US',
+            'created_at': START + datetime.timedelta(days=i),
+        })
+
+    page = http.get('/api/meetings?limit=5').get_json()
+    assert [m['id'] for m in page['meetings']] == ['m6', 'm5', 'm4', 'm3', 'm2']
+    rest = http.get(f"/api/meetings?limit=5&cursor={page['next_cursor']}").get_json()
+    assert [m['id'] for m in rest['meetings']] == ['m1', 'm0'] and rest['next_cursor'] is None
+
+    html = http.get('/history').get_data(as_text=True)
+    assert 'Meeting 6' in html
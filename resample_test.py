@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.resample import StreamingResampler, negotiate_sample_rate
+
+
+def tone(freq, rate, seconds=1.0, sample_format='int16'):
+    t = np.arange(int(rate * seconds)) / rate
+    wave = 0.5 * np.sin(2 * np.pi * freq * t)
+    if sample_format == 'float32':
+        return wave.astype('<f4').tobytes()
+    return (wave * 32767).astype('<i2').tobytes()
+
+
+def amplitude(pcm, skip=500):
+    y = np.frombuffer(pcm, dtype='<i2')[skip:] / 32768
+    return np.sqrt(np.mean(y * y) * 2)
+
+
+@pytest.mark.parametrize('rate', [8000, 16000, 44100, 48000])
+@pytest.mark.parametrize('sample_format', ['int16', 'float32'])
+def test_resamples_in_chunks_like_one_block(rate, sample_format):
+    target = negotiate_sample_rate(rate)
+    data = tone(1000, rate, sample_format=sample_format)
+
+    whole = StreamingResampler(rate, target, sample_format).process(data)
+    resampler = StreamingResampler(rate, target, sample_format)
+    # 샘플 경계에 맞지 않게 잘라도 결과가 같아야 합니다.
+    chunked = b''.join(resampler.process(data[i:i + 777]) for i in range(0, len(data), 777))
+
+    assert chunked == whole
+    assert len(whole) // 2 == pytest.approx(target, abs=2)
+    assert amplitude(whole) == pytest.approx(0.5, abs=0.01)
+
+
+def test_filters_out_frequencies_above_the_new_nyquist():
+    # 48kHz -> 16kHz에서 10kHz는 8kHz 위라 걸러져야 합니다. (단순 샘플 추출이면 6kHz로 접혀 남음)
+    out = StreamingResampler(48000, 16000).process(tone(10000, 48000))
+    assert amplitude(out) < 0.005
+
+
+def test_negotiates_recognizer_rate():
+    assert negotiate_sample_rate(48000) == 16000
+    assert negotiate_sample_rate(44100) == 16000
+    assert negotiate_sample_rate(8000) == 8000
+    with pytest.raises(ValueError):
+        negotiate_sample_rate(96000)
@@ -0,0 +1,61 @@
+import os
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.scheduler import SuggestionScheduler
+
+
+class ManualSpawn:
+    """spawn된 작업을 바로 실행하지 않고 모아 두었다가 테스트에서 직접 실행합니다."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def __call__(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run_next(self):
+        fn, args = self.tasks.pop(0)
+        fn(*args)
+
+
+def test_pending_transcripts_are_merged_and_concurrency_is_bounded():
+    spawn = ManualSpawn()
+    handled = []
+    scheduler = SuggestionScheduler(lambda job: handled.append((job.sid, job.transcript)), max_concurrency=1, spawn=spawn)
+
+    scheduler.submit('a', 'hello', language='en')
+    scheduler.submit('b', 'first')
+    scheduler.submit('b', 'second')
+    assert len(spawn.tasks) == 1
+    assert scheduler.stats()['queue_depth'] == 2
+
+    spawn.run_next()
+    spawn.run_next()
+    assert handled == [('a', 'hello'), ('b', 'first second')]
+    stats = scheduler.stats()
+    assert stats['merged'] == 1 and stats['completed'] == 2 and stats['queue_depth'] == 0
+
+
+def test_stale_running_job_is_dropped_and_folded_into_next_request():
+    spawn = ManualSpawn()
+    handled = []
+
+    def runner(job):
+        if job.is_stale():
+            job.drop()
+            return
+        job.mark_emitted()
+        handled.append(job.transcript)
+
+    scheduler = SuggestionScheduler(runner, max_concurrency=4, spawn=spawn)
+    scheduler.submit('a', 'what is')
+    # 첫 요청이 시작된 뒤, 출력하기 전에 새 대화록이 들어옵니다.
+    scheduler.submit('a', 'the price?')
+    assert len(spawn.tasks) == 1
+
+    spawn.run_next()
+    spawn.run_next()
+    assert handled == ['what is the price?']
+    assert scheduler.stats()['dropped'] == 1
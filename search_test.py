@@ -0,0 +1,99 @@
+import os
+import datetime
+import importlib
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import create_app
+from testing.fakes import MemoryFirestore
+from app.search import SearchIndex, highlight, tokenize
+
+main_module = importlib.import_module('app.main')
+DAY = datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc)
+
+LINES = [
+    ('t1', 'm1', 0, '다음 주 회의를 금요일로 옮길까요?'),
+    ('t2', 'm1', 0, 'The contract renewal is due next month.'),
+    ('t3', 'm2', 1, '계약 갱신 조건을 회의에서 다시 논의합시다.'),
+    ('t4', 'm2', 2, 'Can we review the contracts and the contract terms today?'),
+    ('t5', 'm3', 3, 'Lunch order for the team.'),
+]
+
+
+def build_index():
+    index = SearchIndex()
+    for doc_id, meeting_id, day, text in LINES:
+        index.add(doc_id, {'meeting_id': meeting_id, 'speaker': 'Customer', 'text': text,
+                           'timestamp': DAY + datetime.timedelta(days=day)})
+    return index
+
+
+def test_tokenizes_korean_with_particles_and_english_plurals():
+    assert set(tokenize('회의')) <= set(tokenize('회의를'))
+    assert tokenize('The Contracts') == ['contract']
+
+
+def test_ranks_and_filters_results():
+    index = build_index()
+    ids = [r['id'] for r in index.search('contract')]
+    # 'contract'가 여러 번 나오는 줄이 먼저 나옵니다.
+    assert ids == ['t4', 't2']
+    assert {r['id'] for r in index.search('회의')} == {'t1', 't3'}
+
+    assert [r['id'] for r in index.search('회의', meeting_id='m2')] == ['t3']
+    assert [r['id'] for r in index.search('contract', start=DAY + datetime.timedelta(days=1))] == ['t4']
+    assert index.search('contract', end=DAY + datetime.timedelta(days=1))[0]['id'] == 't2'
+    assert index.search('없는단어') == []
+
+
+def test_highlights_matches_and_escapes_html():
+    snippet = highlight('<b>Contract</b> terms for the contract', 'contract')
+    assert snippet == '&lt;b&gt;<mark>Contract</mark>&lt;/b&gt; terms for the <mark>contract</mark>'
+
+
+def test_search_api_uses_loaded_and_incremental_lines(monkeypatch):
+    db = MemoryFirestore()
+    db.collection('transcripts').document('old').set({
+        'meeting_id': 'm1', 'speaker': 'AI', 'text': 'Delivery is scheduled for Monday.', 'timestamp': DAY})
+    index = SearchIndex()
+    index.load(db, page_size=1)
+    index.add('new', {'meeting_id': 'm2', 'speaker': 'Customer', 'text': 'Delivery delayed again', 'timestamp': DAY})
+    monkeypatch.setattr(main_module, 'search_index', index)
+
+    http = create_app().test_client()
+    body = http.get('/api/search?q=delivery&to=2024-03-01').get_json()
+    assert {r['id'] for r in body['results']} == {'old', 'new'}
+    assert '<mark>Delivery</mark>' in body['results'][0]['snippet']
+    assert body['partial'] is False
+    assert http.get('/api/search?q=delivery&from=soon').status_code == 400
+
+
+def test_index_keeps_the_most_recent_lines_up_to_its_limit():
+    db = MemoryFirestore()
+    for day in range(6):
+        db.collection('transcripts').document(f"d{day}").set({
+            'meeting_id': 'm1', 'speaker': 'Customer', 'text': f"budget review {day}",
+            'timestamp': DAY + datetime.timedelta(days=day)})
+    index = SearchIndex(max_documents=4)
+    index.load(db, page_size=2)
+    # 최근 줄부터 읽고 한도에 닿으면 더 오래된 줄은 읽지 않습니다.
+    assert {r['id'] for r in index.search('budget')} == {'d2', 'd3', 'd4', 'd5'}
+    assert index.stats()['truncated']
+
+    index.add('live', {'meeting_id': 'm2', 'speaker': 'AI', 'text': 'budget approved',
+                       'timestamp': DAY + datetime.timedelta(days=7)})
+    assert len(index) == 4
+    assert {r['id'] for r in index.search('budget')} == {'d3', 'd4', 'd5', 'live'}
+    # 빠진 줄의 단어는 색인에서도 지워집니다.
+    assert index.search('2') == [] and index.stats()['terms'] == len({'budget', 'review', '3', '4', '5', 'approved'})
+
+
+def test_search_api_marks_results_partial_when_clustered(monkeypatch):
+    index = build_index()
+    index.loaded = True
+    monkeypatch.setattr(main_module, 'search_index', index)
+    http = create_app().test_client()
+    assert http.get('/api/search?q=contract').get_json()['partial'] is False
+    monkeypatch.setattr(main_module.cluster, 'url', 'redis://localhost:6379/0')
+    assert http.get('/api/search?q=contract').get_json()['partial'] is True
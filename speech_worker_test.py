@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import speech_worker
+from app.drain import encode_state, decode_state
+from testing.fakes import FakeSpeechClient
+from app.speech_worker import SpeechWorker
+
+SAMPLE_RATE = 16000
+WORD_SECONDS = 0.5
+
+
+class RecordingSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data))
+
+
+def spoken_words(count):
+    """k번째 단어를 값 500k로 채운 0.5초 구간들로 이루어진 PCM을 만듭니다."""
+    word_samples = int(WORD_SECONDS * SAMPLE_RATE)
+    return b''.join((500 * k).to_bytes(2, 'little', signed=True) * word_samples for k in range(1, count + 1))
+
+
+def run_worker(client, pcm, rotate_after=None, chunk_bytes=3200):
+    socketio = RecordingSocketIO()
+    worker = SpeechWorker(socketio, 'sid-1', 'en-US', sample_rate=SAMPLE_RATE, client=client, rotate_after=rotate_after)
+    thread = threading.Thread(target=worker.process)
+    thread.start()
+    for i in range(0, len(pcm), chunk_bytes):
+        worker.add_audio_chunk(pcm[i:i + chunk_bytes])
+    worker.close()
+    thread.join(10)
+    assert not thread.is_alive()
+    return worker, [data for event, data in socketio.events if event == 'final_transcript']
+
+
+def assert_continuous(finals, count):
+    words = ' '.join(f['transcript'] for f in finals).split()
+    assert words == [f"w{500 * k}" for k in range(1, count + 1)]
+    assert finals[0]['start'] == 0
+    for previous, current in zip(finals, finals[1:]):
+        assert current['start'] == previous['end']
+        assert current['end'] > current['start']
+    assert finals[-1]['end'] == count * WORD_SECONDS
+
+
+def test_stream_is_rotated_before_the_provider_limit(monkeypatch):
+    client = FakeSpeechClient(word_seconds=WORD_SECONDS, words_per_result=3, cutoff_seconds=5)
+    worker, finals = run_worker(client, spoken_words(40), rotate_after=4.2)
+
+    assert_continuous(finals, 40)
+    assert worker.streams_opened > 4
+
+
+def test_forced_cutoff_reconnects_and_replays_the_unfinalized_tail(monkeypatch):
+    monkeypatch.setattr(speech_worker, 'STREAM_RECONNECT_BACKOFF', 0)
+    client = FakeSpeechClient(word_seconds=WORD_SECONDS, words_per_result=3, cutoff_seconds=4)
+    # 교체 주기를 길게 두어 매번 제공자 쪽에서 스트림이 끊기게 합니다.
+    worker, finals = run_worker(client, spoken_words(40), rotate_after=600)
+
+    assert_continuous(finals, 40)
+    assert worker.streams_opened > 4
+
+
+def test_vad_keeps_silence_away_from_the_recognizer():
+    silence = b'\x00\x00' * int(8 * SAMPLE_RATE)
+    words = spoken_words(12)
+    half = len(words) // 2
+    pcm = words[:half] + silence + words[half:] + silence
+    client = FakeSpeechClient(word_seconds=WORD_SECONDS, words_per_result=3)
+    worker, finals = run_worker(client, pcm, rotate_after=600)
+
+    recognized = ' '.join(f['transcript'] for f in finals).split()
+    assert recognized == [f"w{500 * k}" for k in range(1, 13)]
+    # 결과 위치는 걸러 낸 침묵을 포함한 세션 시간 기준이어야 합니다.
+    assert finals[-1]['end'] == 6 * WORD_SECONDS + 8 + 6 * WORD_SECONDS
+    assert client.audio_bytes_received < len(pcm) * 0.5
+    assert worker.stats()['gated_ratio'] > 0.5
+
+
+def test_detached_session_resumes_on_a_new_worker_without_gaps_or_duplicates():
+    client = FakeSpeechClient(word_seconds=WORD_SECONDS, words_per_result=3)
+    pcm = spoken_words(40)
+    first_io = RecordingSocketIO()
+    first = SpeechWorker(first_io, 'sid-1', 'en-US', sample_rate=SAMPLE_RATE, client=client, rotate_after=600, vad=False)
+    thread = threading.Thread(target=first.process)
+    thread.start()
+    # 17단어를 보내고, 최종 결과가 몇 개 나온 뒤(마지막 두 단어는 아직 확정 전) 세션을 넘깁니다.
+    sent = 17 * int(WORD_SECONDS * SAMPLE_RATE) * 2
+    for i in range(0, sent, 3200):
+        first.add_audio_chunk(pcm[i:i + 3200])
+    deadline = time.monotonic() + 5
+    while len([e for e, _ in first_io.events if e == 'final_transcript']) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    state = decode_state(encode_state(first.detach()))
+    thread.join(5)
+    assert not thread.is_alive()
+    assert state['position'] == sent and state['offset'] == 15 * WORD_SECONDS * SAMPLE_RATE * 2
+
+    second_io = RecordingSocketIO()
+    second = SpeechWorker(second_io, 'sid-2', 'en-US', sample_rate=SAMPLE_RATE, client=client, rotate_after=600,
+                          vad=False, trace_id=state['trace_id'], resume=state)
+    thread = threading.Thread(target=second.process)
+    thread.start()
+    for i in range(sent, len(pcm), 3200):
+        second.add_audio_chunk(pcm[i:i + 3200])
+    second.close()
+    thread.join(10)
+
+    finals = [data for io in (first_io, second_io) for event, data in io.events if event == 'final_transcript']
+    assert_continuous(finals, 40)
+    assert {f['trace_id'] for f in finals} == {first.trace_id}
+
+
+def test_unrecognized_noise_before_silence_does_not_reopen_streams():
+    client = FakeSpeechClient(word_seconds=WORD_SECONDS, words_per_result=3)
+    worker = SpeechWorker(RecordingSocketIO(), 'sid-1', 'en-US', sample_rate=SAMPLE_RATE, client=client,
+                          rotate_after=600)
+    socketio = worker.socketio
+    thread = threading.Thread(target=worker.process, daemon=True)
+    thread.start()
+    # 단어로 인식되지 않는 짧은 소리 뒤에 긴 침묵이 이어집니다.
+    noise = (3000).to_bytes(2, 'little', signed=True) * int(0.2 * SAMPLE_RATE)
+    silence = b'\x00\x00' * int(10 * SAMPLE_RATE)
+    for pcm in (noise, silence):
+        for i in range(0, len(pcm), 3200):
+            worker.add_audio_chunk(pcm[i:i + 3200])
+    time.sleep(1.5)
+    # 침묵으로 닫은 스트림의 확정되지 않은 꼬리를 보내려고 스트림을 다시 열지 않습니다.
+    assert worker.streams_opened == 1
+
+    words = spoken_words(3)
+    for i in range(0, len(words), 3200):
+        worker.add_audio_chunk(words[i:i + 3200])
+    worker.close()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert worker.streams_opened == 2
+    finals = [data for event, data in socketio.events if event == 'final_transcript']
+    assert [f['transcript'] for f in finals] == ['w500 w1000 w1500']
+    assert finals[0]['end'] == 10.2 + 3 * WORD_SECONDS
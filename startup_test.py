@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import create_app
+from app import main as main_module
+from app.clients import ClientRegistry
+from testing.fakes import MemoryFirestore, FakeSpeechClient
+
+# 앱을 만들 때(import run) 불러오면 안 되는 무거운 SDK. 처음 쓸 때 불러옵니다.
+DEFERRED_MODULES = ('google.cloud.firestore', 'google.cloud.speech', 'google.cloud.storage', 'google.api_core',
+                    'grpc', 'openai', 'tiktoken')
+
+
+def test_creating_the_app_does_not_import_cloud_sdks():
+    # 새 프로세스에서 gunicorn처럼 앱을 만들고, 그때까지 불러온 모듈을 확인합니다.
+    code = "import sys, run; print('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    loaded = set(result.stdout.split())
+    assert 'app.main' in loaded
+    early = sorted(name for name in loaded if name.startswith(DEFERRED_MODULES))
+    assert early == []
+    # -X importtime 출력에도 남지 않아야 합니다. (import를 시도했다가 실패한 경우 포함)
+    timed = [line.rsplit('|', 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')]
+    assert not [name for name in timed if name.startswith(DEFERRED_MODULES)]
+
+
+def test_ready_warms_the_requested_clients_only(monkeypatch):
+    registry = ClientRegistry()
+    registry.register('firestore', MemoryFirestore)
+    registry.register('speech', FakeSpeechClient)
+    registry.register('storage', lambda: (_ for _ in ()).throw(RuntimeError('no credentials')))
+    monkeypatch.setattr(main_module, 'clients', registry)
+    client = create_app().test_client()
+
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['clients'] == {'firestore': False, 'speech': False, 'storage': False, 'openai': False}
+
+    response = client.get('/ready?warm=firestore,speech')
+    body = response.get_json()
+    assert response.status_code == 200 and body['ready']
+    assert set(body['warmed_ms']) == {'firestore', 'speech'}
+    assert body['clients']['firestore'] and body['clients']['speech'] and not body['clients']['storage']
+
+    response = client.get('/ready?warm=storage')
+    assert response.status_code == 503
+    assert 'no credentials' in response.get_json()['errors']['storage']
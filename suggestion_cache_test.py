@@ -0,0 +1,82 @@
+import os
+import importlib
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app.suggestion_cache import SuggestionCache, normalize
+
+main_module = importlib.import_module('app.main')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hit_ignores_case_punctuation_and_spaces():
+    cache = SuggestionCache(maxsize=10, ttl=60, similarity=0)
+    cache.put("What's the price?", 'm1', 'Be brief.', 'en-US', 'It is $10.', 1.5)
+
+    assert normalize("  WHATS the   price ") == normalize("What's the price?")
+    hit = cache.get("whats the price", 'm1', 'Be brief.', 'en-US')
+    assert hit.text == 'It is $10.' and hit.similarity == 1.0
+    # 스타일이나 언어가 다르면 다른 항목입니다.
+    assert cache.get("What's the price?", 'm1', 'Be formal.', 'en-US') is None
+    assert cache.get("What's the price?", 'm1', 'Be brief.', 'ko-KR') is None
+
+    stats = cache.stats()
+    assert stats['exact_hits'] == 1 and stats['lookups'] == 3
+    assert stats['hit_rate'] == round(1 / 3, 4)
+    assert stats['latency_saved_s'] == 1.5
+
+
+def test_entries_expire_and_are_evicted():
+    clock = FakeClock()
+    cache = SuggestionCache(maxsize=2, ttl=60, similarity=0, clock=clock)
+    cache.put('question one', 'm1', 's', 'en-US', 'one', 1.0)
+    clock.now = 61
+    assert cache.get('question one', 'm1', 's', 'en-US') is None
+
+    cache.put('question a', 'm1', 's', 'en-US', 'a', 1.0)
+    cache.put('question b', 'm1', 's', 'en-US', 'b', 1.0)
+    cache.put('question c', 'm1', 's', 'en-US', 'c', 1.0)
+    assert cache.get('question a', 'm1', 's', 'en-US') is None
+    assert cache.get('question c', 'm1', 's', 'en-US').text == 'c'
+
+
+def test_near_duplicates_only_when_threshold_is_set():
+    question = 'Could you tell me when the contract renewal is due this year'
+    paraphrase = 'could you tell me when the contract renewal is due for this year'
+    unrelated = 'How many engineers will be assigned to the onboarding project'
+
+    exact_only = SuggestionCache(maxsize=10, ttl=60, similarity=0)
+    exact_only.put(question, 'm1', 's', 'en-US', 'In March.', 2.0)
+    assert exact_only.get(paraphrase, 'm1', 's', 'en-US') is None
+
+    cache = SuggestionCache(maxsize=10, ttl=60, similarity=0.7)
+    cache.put(question, 'm1', 's', 'en-US', 'In March.', 2.0)
+    hit = cache.get(paraphrase, 'm1', 's', 'en-US')
+    assert hit is not None and hit.text == 'In March.'
+    assert 0.7 <= hit.similarity < 1.0
+    assert cache.get(unrelated, 'm1', 's', 'en-US') is None
+    assert cache.get(paraphrase, 'm1', 'other style', 'en-US') is None
+    assert cache.stats()['near_hits'] == 1
+
+
+def test_answers_are_not_shared_between_meetings(monkeypatch):
+    # 응답은 미팅의 맥락으로 만들어지므로, 같은 질문이라도 다른 미팅에는 보내지 않습니다.
+    question = 'When is the renewal due?'
+    for similarity in (0, 0.7):
+        cache = SuggestionCache(maxsize=10, ttl=60, similarity=similarity)
+        cache.put(question, 'meeting-a', 's', 'en-US', 'In March.', 2.0)
+        assert cache.get(question, 'meeting-b', 's', 'en-US') is None
+        assert cache.get('when is the renewal due', 'meeting-a', 's', 'en-US').text == 'In March.'
+
+    cache = SuggestionCache(maxsize=10, ttl=60, similarity=0)
+    cache.put(question, 'meeting-a', 's', 'en-US', 'In March.', 2.0)
+    monkeypatch.setattr(main_module, 'suggestion_cache', cache)
+    assert not main_module.send_cached_suggestion('sid-b', question, 'meeting-b', 's', 'en-US')
@@ -0,0 +1,36 @@
+import os
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+import openai
+
+from testing.fakes import FakeCompletionServer
+from app.suggestions import stream_suggestion_to_client
+
+
+class RecordingSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data, to))
+
+
+def test_suggestion_is_streamed_as_deltas_then_done():
+    socketio = RecordingSocketIO()
+    with FakeCompletionServer(['가격은', ' 월', ' 10만원', '입니다.'], first_token_delay=0.05, chunk_delay=0.02) as server:
+        client = openai.OpenAI(api_key='test', base_url=server.base_url)
+        result = stream_suggestion_to_client(socketio, 'sid-1', '가격이 얼마예요?', 'Be concise.', 'ko-KR', client=client)
+
+    deltas = [data['delta'] for event, data, _ in socketio.events if event == 'ai_response_delta']
+    assert deltas == ['가격은', ' 월', ' 10만원', '입니다.']
+    event, done, to = socketio.events[-1]
+    assert event == 'ai_response_done' and to == 'sid-1'
+    assert done['text'] == result['text'] == '가격은 월 10만원입니다.'
+    assert all(data['id'] == done['id'] for _, data, _ in socketio.events)
+
+    # 첫 토큰은 전체 응답보다 먼저 도착해야 합니다.
+    assert 0.05 <= result['ttft'] < result['latency']
+    assert server.requests[0]['stream'] is True
+    assert server.requests[0]['messages'][0] == {'role': 'system', 'content': 'Be concise.'}
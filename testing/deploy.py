@@ -0,0 +1,155 @@
+# testing/deploy.py
+
+"""배포 환경 그대로 서버를 띄우고 브라우저처럼 접속하는 테스트 도구입니다.
+
+start_container()는 Dockerfile의 CMD를 같은 셸(/bin/sh -c)로 실행하므로 gunicorn 워커 종류와
+exec(신호 전달)까지 운영과 같습니다. WebSocketClient는 main.js처럼 websocket 전송만 쓰는
+최소한의 Socket.IO 클라이언트입니다. (python-socketio의 클라이언트는 websocket에
+websocket-client 패키지가 필요해, 서버 의존성에 이미 있는 simple-websocket으로 대신합니다.)
+"""
+
+import os
+import json
+import time
+import shlex
+import threading
+import subprocess
+import urllib.request
+
+import simple_websocket
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SPEC = 'app:create_app()'
+
+
+def container_command(app_spec=None):
+    """Dockerfile의 CMD (셸 형식). app_spec을 주면 gunicorn에 넘기는 앱만 바꿉니다."""
+    with open(os.path.join(ROOT, 'Dockerfile')) as f:
+        [command] = [line[len('CMD '):].strip() for line in f if line.startswith('CMD ')]
+    if app_spec is not None:
+        if f'"{APP_SPEC}"' not in command:
+            raise ValueError(f"app spec not found in CMD: {command}")
+        command = command.replace(f'"{APP_SPEC}"', shlex.quote(app_spec))
+    return command
+
+
+def start_container(port, env, app_spec=None, timeout=30):
+    """Cloud Run처럼 PORT를 지정해 CMD를 실행하고 /ready가 응답할 때까지 기다립니다."""
+    process = subprocess.Popen(['/bin/sh', '-c', container_command(app_spec)],
+                               env=dict(env, PORT=str(port)), cwd=ROOT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"container command exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise TimeoutError(f"server on port {port} did not start")
+
+
+class WebSocketClient:
+    """websocket 전송만 쓰는 Socket.IO 클라이언트 (기본 네임스페이스, Engine.IO 4)
+
+    socketio.Client와 같은 on/connect/emit/call/disconnect를 제공합니다. emit의 인자가
+    bytes면 바이너리 첨부로 보냅니다.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.open_packet = None
+        self.sid = None
+        self._ws = None
+        self._acks = {}
+        self._next_ack = 0
+        self._connected = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._ws is not None and self._ws.connected and self._connected.is_set()
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def connect(self, url, timeout=10):
+        ws_url = url.replace('http://', 'ws://', 1).rstrip('/') + '/socket.io/?EIO=4&transport=websocket'
+        self._ws = simple_websocket.Client.connect(ws_url)
+        # simple-websocket은 101 응답과 같이 도착한 open 패킷을 다음 수신 때에야 꺼내므로,
+        # open 패킷을 기다리지 않고 바로 Socket.IO 연결을 요청합니다.
+        self._ws.send('40')
+        packet = self._ws.receive(timeout)
+        if not isinstance(packet, str) or not packet.startswith('0'):
+            raise ConnectionError(f"unexpected Engine.IO open packet: {packet!r}")
+        self.open_packet = json.loads(packet[1:])
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        if not self._connected.wait(timeout):
+            raise ConnectionError('Socket.IO connect timed out')
+
+    def emit(self, event, data=None, ack=None):
+        args = [event] if data is None else [event, data]
+        prefix = '' if ack is None else str(ack)
+        with self._lock:
+            if isinstance(data, (bytes, bytearray)):
+                args[1] = {'_placeholder': True, 'num': 0}
+                self._ws.send(f"451-{prefix}{json.dumps(args)}")
+                self._ws.send(bytes(data))
+            else:
+                self._ws.send(f"42{prefix}{json.dumps(args)}")
+
+    def call(self, event, data=None, timeout=10):
+        with self._lock:
+            ack, self._next_ack = self._next_ack, self._next_ack + 1
+        done = threading.Event()
+        self._acks[ack] = (done, [])
+        self.emit(event, data, ack=ack)
+        if not done.wait(timeout):
+            raise TimeoutError(f"no acknowledgement for {event}")
+        result = self._acks.pop(ack)[1]
+        return result[0] if len(result) == 1 else tuple(result) or None
+
+    def disconnect(self):
+        if self._ws is None:
+            return
+        try:
+            if self._ws.connected:
+                self._ws.send('41')
+                self._ws.close()
+        except simple_websocket.ConnectionClosed:
+            pass
+        self._connected.clear()
+
+    def _read_loop(self):
+        try:
+            while True:
+                packet = self._ws.receive()
+                if packet is None:
+                    break
+                if isinstance(packet, str):
+                    self._handle(packet)
+        except simple_websocket.ConnectionClosed:
+            pass
+        self._connected.clear()
+
+    def _handle(self, packet):
+        if packet == '2':  # Engine.IO ping
+            with self._lock:
+                self._ws.send('3')
+        elif packet.startswith('40'):
+            self.sid = json.loads(packet[2:] or '{}').get('sid')
+            self._connected.set()
+        elif packet.startswith('42'):
+            body = packet[2:]
+            event, *args = json.loads(body[body.index('['):])
+            handler = self.handlers.get(event)
+            if handler is not None:
+                handler(*args)
+        elif packet.startswith('43'):
+            body = packet[2:]
+            bracket = body.index('[')
+            done, result = self._acks.get(int(body[:bracket]), (None, None))
+            if done is not None:
+                result.extend(json.loads(body[bracket:]))
+                done.set()
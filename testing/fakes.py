@@ -0,0 +1,1027 @@
+# testing/fakes.py
+
+"""테스트와 오프라인 벤치마크에서 클라우드 서비스를 대신하는 인메모리 구현입니다.
+
+실제 SDK와 같은 호출 형태만 흉내 내며, 지연 시간(latency)과 흔들림(jitter)을
+설정해 네트워크 왕복 비용을 재현할 수 있습니다.
+"""
+
+import json
+import time
+import heapq
+import uuid
+import random
+import datetime
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Latency:
+    """호출마다 지정된 지연 시간을 흉내 냅니다."""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def wait(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ManualClock:
+    """직접 앞으로 돌리는 가상 시계와, 그 시계로 실행되는 threading.Timer 대용
+
+    time.monotonic 대신 clock으로, threading.Timer 대신 clock.timer로 넘기면
+    advance()로 시계를 돌릴 때 그 사이에 걸린 타이머가 순서대로 실행됩니다.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self._timers = []
+        self._seq = 0
+
+    def __call__(self):
+        return self.now
+
+    def timer(self, delay, fn):
+        return _ManualTimer(self, self.now + delay, fn)
+
+    def advance(self, to):
+        while self._timers and self._timers[0][0] <= to:
+            at, _, timer = heapq.heappop(self._timers)
+            self.now = at
+            timer.run()
+        self.now = to
+
+
+class _ManualTimer:
+    def __init__(self, clock, at, fn):
+        self._clock = clock
+        self._at = at
+        self._fn = fn
+        self.daemon = False
+        self.cancelled = False
+
+    def start(self):
+        self._clock._seq += 1
+        heapq.heappush(self._clock._timers, (self._at, self._clock._seq, self))
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        if not self.cancelled:
+            self._fn()
+
+
+# --- Firestore ---
+
+_OPS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+    'in': lambda a, b: a in b,
+    'array_contains': lambda a, b: b in (a or []),
+}
+
+
+class MemorySnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class MemoryDocumentRef:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self._collection.name}/{self.id}"
+
+    def get(self, transaction=None):
+        store = self._collection._store
+        store._latency.wait()
+        with store._lock:
+            store.reads += 1
+            data = self._collection._docs.get(self.id)
+            return MemorySnapshot(self, dict(data) if data is not None else None)
+
+    def set(self, data, merge=False):
+        store = self._collection._store
+        store._latency.wait()
+        with store._lock:
+            store.writes += 1
+            self._apply_set(data, merge)
+
+    def update(self, data):
+        self.set(data, merge=True)
+
+    def delete(self):
+        store = self._collection._store
+        store._latency.wait()
+        with store._lock:
+            store.writes += 1
+            self._collection._docs.pop(self.id, None)
+
+    def _apply_set(self, data, merge=False):
+        docs = self._collection._docs
+        if merge and self.id in docs:
+            docs[self.id].update(data)
+        else:
+            docs[self.id] = dict(data)
+
+
+def _field_value(doc_id, data, field):
+    # '__name__'은 Firestore처럼 문서 ID로 정렬/커서를 지정할 때 씁니다.
+    if field == '__name__':
+        return doc_id
+    return data.get(field)
+
+
+class MemoryQuery:
+    def __init__(self, collection, filters=(), orders=(), limit=None, fields=None, cursor=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **kwargs):
+        params = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                      fields=self._fields, cursor=self._cursor)
+        params.update(kwargs)
+        return MemoryQuery(self._collection, **params)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def start_after(self, values):
+        if isinstance(values, MemorySnapshot):
+            values = dict(values.to_dict(), __name__=values.id)
+        if isinstance(values, dict):
+            values = [values.get(field) for field, _ in self._orders]
+        values = [getattr(value, 'id', value) if isinstance(value, MemoryDocumentRef) else value for value in values]
+        return self._copy(cursor=values)
+
+    def _matches(self, data):
+        return all(_OPS[op](data.get(field), value) for field, op, value in self._filters)
+
+    def stream(self):
+        store = self._collection._store
+        store._latency.wait()
+        with store._lock:
+            items = [(doc_id, dict(data)) for doc_id, data in self._collection._docs.items() if self._matches(data)]
+        # 여러 정렬 조건은 마지막 조건부터 안정 정렬하여 적용합니다.
+        for field, direction in reversed(self._orders):
+            items.sort(key=lambda item: _field_value(item[0], item[1], field), reverse=str(direction).upper().startswith('DESC'))
+        if self._cursor is not None:
+            items = [item for item in items if self._after_cursor(*item)]
+        if self._limit is not None:
+            items = items[:self._limit]
+        with store._lock:
+            store.reads += max(1, len(items))
+        if store.document_latency:
+            time.sleep(store.document_latency * len(items))
+        for doc_id, data in items:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            yield MemorySnapshot(MemoryDocumentRef(self._collection, doc_id), data)
+
+    def _after_cursor(self, doc_id, data):
+        for (field, direction), cursor_value in zip(self._orders, self._cursor):
+            value = _field_value(doc_id, data, field)
+            if value == cursor_value:
+                continue
+            if str(direction).upper().startswith('DESC'):
+                return value < cursor_value
+            return value > cursor_value
+        return False
+
+    def get(self):
+        return list(self.stream())
+
+
+class MemoryCollection(MemoryQuery):
+    def __init__(self, store, name):
+        self._store = store
+        self.name = name
+        self._docs = store._collections.setdefault(name, {})
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return MemoryDocumentRef(self, doc_id or uuid.uuid4().hex[:20])
+
+
+class MemoryWriteBatch:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(('set', reference, data, merge))
+
+    def update(self, reference, data):
+        self._ops.append(('set', reference, data, True))
+
+    def delete(self, reference):
+        self._ops.append(('delete', reference, None, False))
+
+    def __len__(self):
+        return len(self._ops)
+
+    def commit(self):
+        store = self._store
+        store._latency.wait()
+        if store.fail_next_commits:
+            store.fail_next_commits -= 1
+            raise RuntimeError('simulated commit failure')
+        with store._lock:
+            for op, reference, data, merge in self._ops:
+                if op == 'set':
+                    reference._apply_set(data, merge)
+                else:
+                    reference._collection._docs.pop(reference.id, None)
+            store.writes += len(self._ops)
+            store.commits += 1
+        return []
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """firestore.transactional이 실행할 수 있는 트랜잭션
+
+    시작부터 커밋(또는 롤백)까지 저장소 락을 쥐고 있어, 다른 스레드의 읽기와 쓰기는 그동안
+    기다립니다. (실제 Firestore의 충돌 감지와 재시도 대신 직렬화로 같은 결과를 냅니다.)
+    """
+
+    def __init__(self, store):
+        super().__init__(store)
+        self._read_only = False
+        self._max_attempts = 5
+        self._id = None
+
+    def _clean_up(self):
+        self._ops = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._store._lock.acquire()
+        self._id = uuid.uuid4().hex.encode()
+
+    def _commit(self):
+        try:
+            with self._store._lock:
+                for op, reference, data, merge in self._ops:
+                    if op == 'set':
+                        reference._apply_set(data, merge)
+                    else:
+                        reference._collection._docs.pop(reference.id, None)
+                self._store.writes += len(self._ops)
+                self._store.commits += 1
+        finally:
+            self._release()
+        return []
+
+    def _rollback(self):
+        if self._id is not None:
+            self._release()
+
+    def _release(self):
+        self._clean_up()
+        self._store._lock.release()
+
+
+class MemoryFirestore:
+    """firestore.Client의 인메모리 대체 구현"""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=None, document_latency=0.0):
+        self._collections = {}
+        # 쿼리 결과 문서 하나당 추가되는 시간(초). 결과가 클수록 느려지는 것을 흉내 냅니다.
+        self.document_latency = document_latency
+        self._lock = threading.RLock()
+        self._latency = _Latency(latency, jitter, seed)
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        # 0보다 크면 다음 커밋들을 일부러 실패시킵니다. (재시도 테스트용)
+        self.fail_next_commits = 0
+
+    def collection(self, name):
+        return MemoryCollection(self, name)
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def transaction(self):
+        return MemoryTransaction(self)
+
+    def documents(self, name):
+        """저장된 문서를 검사용으로 그대로 반환합니다."""
+        with self._lock:
+            return [dict(data) for data in self._collections.get(name, {}).values()]
+
+
+# --- OpenAI Chat Completions ---
+
+class FakeCompletionServer:
+    """OpenAI Chat Completions API처럼 응답하는 로컬 HTTP 서버
+
+    stream=True 요청에는 chunks를 하나씩 SSE로 보내며, 조각 사이에 chunk_delay만큼
+    쉽니다. first_token_delay는 첫 조각 전의 대기 시간이고, jitter를 주면 여기에
+    0~jitter초가 더해집니다.
+    사용법: ``with FakeCompletionServer(chunks) as server: OpenAI(base_url=server.base_url)``
+    """
+
+    def __init__(self, chunks=('Hello', ', ', 'world', '!'), first_token_delay=0.0, chunk_delay=0.0,
+                 jitter=0.0, seed=None):
+        self.chunks = list(chunks)
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        # 첫 조각 전에 더하는 무작위 지연(0~jitter초)
+        self._latency = _Latency(0.0, jitter, seed)
+        self.requests = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                fake.requests.append(body)
+                try:
+                    if body.get('stream'):
+                        self._stream(body)
+                    else:
+                        self._complete(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 응답 도중에 스트림을 닫았습니다. (오래된 제안 취소 등)
+                    self.close_connection = True
+
+            def _complete(self, body):
+                fake._latency.wait()
+                time.sleep(fake.first_token_delay + fake.chunk_delay * len(fake.chunks))
+                payload = json.dumps({
+                    'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': ''.join(fake.chunks)}}],
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                fake._latency.wait()
+                time.sleep(fake.first_token_delay)
+                for i, text in enumerate(fake.chunks):
+                    if i:
+                        time.sleep(fake.chunk_delay)
+                    self._event({'index': 0, 'delta': {'content': text}, 'finish_reason': None}, body)
+                self._event({'index': 0, 'delta': {}, 'finish_reason': 'stop'}, body)
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, choice, body):
+                chunk = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                         'model': body.get('model', 'fake'), 'choices': [choice]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- Cloud Storage ---
+
+class MemoryBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = None
+        self.content_type = None
+
+    @property
+    def public_url(self):
+        return f"https://storage.googleapis.com/{self.bucket.name}/{self.name}"
+
+    def upload_from_file(self, file_obj, content_type=None, size=None, rewind=False):
+        if rewind:
+            file_obj.seek(0)
+        self.upload_from_string(file_obj.read(), content_type=content_type)
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.content_type = content_type
+        self.bucket.client._store(self.bucket.name, self.name, data)
+
+    def exists(self):
+        return self.name in self.bucket.client.objects.get(self.bucket.name, {})
+
+    def download_as_bytes(self, start=None, end=None):
+        self.bucket.client._latency.wait()
+        data = self.bucket.client.objects[self.bucket.name][self.name]
+        # GCS처럼 end는 마지막 바이트의 위치(포함)입니다.
+        return data[start or 0:None if end is None else end + 1]
+
+
+class MemoryBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def blob(self, name):
+        return MemoryBlob(self, name)
+
+    def list_blobs(self, prefix=''):
+        names = sorted(self.client.objects.get(self.name, {}))
+        return [MemoryBlob(self, name) for name in names if name.startswith(prefix)]
+
+
+class MemoryStorageClient:
+    """storage.Client의 인메모리 대체 구현
+
+    업로드와 다운로드 한 번마다 latency(+0~jitter)초가 걸립니다. keep_data=False이면 내용은 버리고
+    크기만 기록합니다. (오래 도는 부하 테스트에서 메모리를 차지하지 않도록)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=None, keep_data=True):
+        self._latency = _Latency(latency, jitter, seed)
+        self.keep_data = keep_data
+        self.objects = {}
+        self.uploads = 0
+        self.bytes_uploaded = 0
+        self._lock = threading.Lock()
+
+    def bucket(self, name):
+        return MemoryBucket(self, name)
+
+    def _store(self, bucket, name, data):
+        self._latency.wait()
+        with self._lock:
+            self.objects.setdefault(bucket, {})[name] = data if self.keep_data else b''
+            self.uploads += 1
+            self.bytes_uploaded += len(data)
+
+
+# --- Pub/Sub ---
+
+class FakeMessage:
+    """pubsub_v1.subscriber.message.Message처럼 ack()/nack()를 받는 메시지"""
+
+    def __init__(self, pubsub, subscription, message_id, data, attributes, delivery_attempt=1):
+        self._pubsub = pubsub
+        self._subscription = subscription
+        self.message_id = message_id
+        self.data = data
+        self.attributes = attributes
+        self.delivery_attempt = delivery_attempt
+
+    def ack(self):
+        self._pubsub._settle(self, acked=True)
+
+    def nack(self):
+        self._pubsub._settle(self, acked=False)
+
+
+class _PublishFuture:
+    def __init__(self, message_id):
+        self._message_id = message_id
+
+    def result(self, timeout=None):
+        return self._message_id
+
+
+class _StreamingPullFuture:
+    def __init__(self):
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def result(self, timeout=None):
+        self._cancelled.wait(timeout)
+
+
+class FakePubSub:
+    """PublisherClient와 SubscriberClient를 한 객체로 흉내 내는 인메모리 Pub/Sub
+
+    create_subscription(subscription, topic)으로 연결한 구독에 publish()한 메시지가 쌓이고,
+    subscribe()는 흐름 제어(flow_control.max_messages)만큼만 동시에 콜백으로 넘깁니다.
+    nack()된 메시지는 다시 전달됩니다. 실제 Pub/Sub처럼 delivery_attempt는 데드 레터 정책이 있는
+    구독(dead_letter=True)에서만 1부터 세고, 없으면 None입니다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._subscriptions = {}  # 구독 -> 대기 중인 메시지 목록
+        self._topics = {}  # 토픽 -> 구독 목록
+        self._dead_letter = {}  # 구독 -> 데드 레터 정책 여부
+        self.published = {}  # 토픽 -> [(data, attributes)]
+        self.acked = 0
+        self.nacked = 0
+        self.outstanding = 0
+        self.max_outstanding = 0
+        self._ids = 0
+
+    @staticmethod
+    def topic_path(project, topic):
+        return f"projects/{project}/topics/{topic}"
+
+    @staticmethod
+    def subscription_path(project, subscription):
+        return f"projects/{project}/subscriptions/{subscription}"
+
+    def create_subscription(self, subscription, topic, dead_letter=True):
+        with self._cond:
+            self._subscriptions.setdefault(subscription, [])
+            self._dead_letter[subscription] = dead_letter
+            self._topics.setdefault(topic, []).append(subscription)
+
+    def publish(self, topic, data, **attributes):
+        with self._cond:
+            self._ids += 1
+            message_id = str(self._ids)
+            self.published.setdefault(topic, []).append((data, attributes))
+            for subscription in self._topics.get(topic, []):
+                self._subscriptions[subscription].append(FakeMessage(
+                    self, subscription, message_id, data, attributes, 1 if self._dead_letter[subscription] else None))
+            self._cond.notify_all()
+        return _PublishFuture(message_id)
+
+    def subscribe(self, subscription, callback, flow_control=None):
+        limit = getattr(flow_control, 'max_messages', None) or 10
+        future = _StreamingPullFuture()
+
+        def deliver(message):
+            try:
+                callback(message)
+            except Exception:
+                message.nack()
+
+        def dispatch():
+            while not future.cancelled():
+                with self._cond:
+                    queue = self._subscriptions[subscription]
+                    if not queue or self.outstanding >= limit:
+                        self._cond.wait(0.05)
+                        continue
+                    message = queue.pop(0)
+                    self.outstanding += 1
+                    self.max_outstanding = max(self.max_outstanding, self.outstanding)
+                threading.Thread(target=deliver, args=(message,), daemon=True).start()
+
+        threading.Thread(target=dispatch, daemon=True).start()
+        return future
+
+    def _settle(self, message, acked):
+        with self._cond:
+            self.outstanding -= 1
+            if acked:
+                self.acked += 1
+            else:
+                self.nacked += 1
+                self._subscriptions[message._subscription].append(FakeMessage(
+                    self, message._subscription, message.message_id, message.data, message.attributes,
+                    message.delivery_attempt and message.delivery_attempt + 1))
+            self._cond.notify_all()
+
+    def wait_idle(self, subscription, timeout=10):
+        """구독에 대기 중이거나 처리 중인 메시지가 없어질 때까지 기다립니다."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._subscriptions[subscription] or self.outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+
+# --- Redis ---
+
+class _RespError(Exception):
+    pass
+
+
+class FakeRedisServer:
+    """Redis 프로토콜(RESP)로 통신하는 로컬 인메모리 서버
+
+    Socket.IO 메시지 큐, 캐시 무효화, 세션 넘기기가 쓰는 명령(HELLO, PING, SELECT, AUTH, CLIENT, GET,
+    GETDEL, SET [EX/PX/NX], DEL, EXISTS, EXPIRE, HSET, HGET, HDEL, HGETALL, PUBLISH, SUBSCRIBE, UNSUBSCRIBE)만
+    지원합니다. redis-py가 기본으로 쓰는 RESP3(HELLO 3)와 RESP2 모두로 응답합니다.
+    한 대의 장비에서 여러 워커 프로세스를 띄워 확장 모드를 시험할 때 실제 Redis 대신 씁니다.
+    사용법: ``with FakeRedisServer() as server: SOCKETIO_MESSAGE_QUEUE=server.url``
+    또는 ``python -m testing.fakes --port 6379`` (별도 프로세스로 실행)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.address = (host, port)
+        self.commands = 0
+        self._lock = threading.Lock()
+        self._strings = {}
+        self._hashes = {}
+        self._expires = {}
+        self._channels = {}  # channel -> set(연결)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    # 저장소
+
+    def _expire_key(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._delete(key)
+
+    def _delete(self, key):
+        self._expires.pop(key, None)
+        found = self._strings.pop(key, None) is not None
+        return (self._hashes.pop(key, None) is not None) or found
+
+    def _execute(self, conn, args):
+        name = args[0].decode().upper()
+        args = args[1:]
+        with self._lock:
+            self.commands += 1
+            for key in args[:1]:
+                self._expire_key(key)
+            if name == 'HELLO':
+                conn.protocol = int(args[0]) if args else 2
+                return {b'server': b'redis', b'version': b'7.0.0', b'proto': conn.protocol, b'mode': b'standalone'}
+            if name == 'PING':
+                return b'PONG' if not args else args[0]
+            if name in ('SELECT', 'AUTH', 'CLIENT'):
+                return b'OK'
+            if name == 'GET':
+                return self._strings.get(args[0])
+            if name == 'GETDEL':
+                value = self._strings.get(args[0])
+                self._delete(args[0])
+                return value
+            if name == 'SET':
+                return self._set(args)
+            if name == 'DEL':
+                return sum(self._delete(key) for key in args)
+            if name == 'EXISTS':
+                for key in args:
+                    self._expire_key(key)
+                return sum(1 for key in args if key in self._strings or key in self._hashes)
+            if name == 'EXPIRE':
+                if args[0] not in self._strings and args[0] not in self._hashes:
+                    return 0
+                self._expires[args[0]] = time.monotonic() + int(args[1])
+                return 1
+            if name == 'HSET':
+                fields = self._hashes.setdefault(args[0], {})
+                pairs = list(zip(args[1::2], args[2::2]))
+                added = sum(1 for field, _ in pairs if field not in fields)
+                fields.update(pairs)
+                return added
+            if name == 'HGET':
+                return self._hashes.get(args[0], {}).get(args[1])
+            if name == 'HDEL':
+                fields = self._hashes.get(args[0], {})
+                removed = sum(1 for field in args[1:] if fields.pop(field, None) is not None)
+                if not fields:
+                    self._hashes.pop(args[0], None)
+                return removed
+            if name == 'HGETALL':
+                return dict(self._hashes.get(args[0], {}))
+            if name == 'PUBLISH':
+                receivers = list(self._channels.get(args[0], ()))
+            elif name in ('SUBSCRIBE', 'UNSUBSCRIBE'):
+                receivers = None
+            else:
+                raise _RespError(f"ERR unknown command '{name}'")
+        # 구독자에게 보내는 쓰기는 락 밖에서 합니다.
+        if name == 'PUBLISH':
+            for receiver in receivers:
+                receiver.push([b'message', args[0], args[1]], message=True)
+            return len(receivers)
+        return self._subscribe(conn, name, args)
+
+    def _set(self, args):
+        key, value, options = args[0], args[1], [a.decode().upper() for a in args[2:]]
+        if 'NX' in options and key in self._strings:
+            return None
+        self._hashes.pop(key, None)
+        self._strings[key] = value
+        self._expires.pop(key, None)
+        for unit, scale in (('EX', 1.0), ('PX', 0.001)):
+            if unit in options:
+                self._expires[key] = time.monotonic() + int(options[options.index(unit) + 1]) * scale
+        return b'OK'
+
+    def _subscribe(self, conn, name, channels):
+        for channel in channels:
+            with self._lock:
+                if name == 'SUBSCRIBE':
+                    self._channels.setdefault(channel, set()).add(conn)
+                    conn.channels.add(channel)
+                else:
+                    self._channels.get(channel, set()).discard(conn)
+                    conn.channels.discard(channel)
+                count = len(conn.channels)
+            conn.push([name.lower().encode(), channel, count], message=True)
+        return _NO_REPLY
+
+    def _disconnect(self, conn):
+        with self._lock:
+            for channel in conn.channels:
+                self._channels.get(channel, set()).discard(conn)
+
+    # 서버
+
+    def start(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.channels = set()
+                self.protocol = 2
+                self._write_lock = threading.Lock()
+
+            def push(self, value, message=False):
+                """응답 하나를 씁니다. message면 RESP3에서 푸시(>)로 보내는 pub/sub 메시지입니다."""
+                data = _resp_encode(value, self.protocol, push=message)
+                with self._write_lock:
+                    try:
+                        self.wfile.write(data)
+                        self.wfile.flush()
+                    except OSError:
+                        pass
+
+            def handle(self):
+                try:
+                    while True:
+                        args = _resp_read_command(self.rfile)
+                        if args is None:
+                            return
+                        try:
+                            reply = fake._execute(self, args)
+                        except (_RespError, IndexError, ValueError) as e:
+                            reply = _RespError(str(e) if isinstance(e, _RespError) else f"ERR {e}")
+                        if reply is not _NO_REPLY:
+                            self.push(reply)
+                except OSError:
+                    pass
+                finally:
+                    fake._disconnect(self)
+
+        self._server = socketserver.ThreadingTCPServer(self.address, Handler, bind_and_activate=False)
+        self._server.allow_reuse_address = True
+        self._server.daemon_threads = True
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+_NO_REPLY = object()
+
+
+def _resp_encode(value, protocol=2, push=False):
+    if value is None:
+        return b'_\r\n' if protocol == 3 else b'$-1\r\n'
+    if isinstance(value, _RespError):
+        return b'-' + str(value).encode() + b'\r\n'
+    if isinstance(value, bool) or isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, dict):
+        items = [item for pair in value.items() for item in pair]
+        if protocol != 3:
+            return _resp_encode(items, protocol)
+        return b'%%%d\r\n' % len(value) + b''.join(_resp_encode(item, protocol) for item in items)
+    if isinstance(value, (list, tuple)):
+        kind = b'>' if push and protocol == 3 else b'*'
+        return kind + b'%d\r\n' % len(value) + b''.join(_resp_encode(item, protocol) for item in value)
+    if isinstance(value, str):
+        value = value.encode()
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _resp_read_command(rfile):
+    """클라이언트 명령(벌크 문자열 배열) 하나를 읽습니다. 연결이 닫히면 None."""
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # 인라인 명령 (redis-cli나 telnet으로 직접 입력한 경우)
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int(rfile.readline()[1:])
+        args.append(rfile.read(size + 2)[:-2])
+    return args
+
+
+# --- Speech-to-Text ---
+
+class FakeSpeechClient:
+    """speech.SpeechClient.streaming_recognize를 흉내 내는 가짜 인식기
+
+    16비트 PCM에서 같은 값 v가 이어지는 구간(길이 word_seconds 안팎)을 "w{v}"라는
+    단어 하나로 인식합니다. 값이 0인 구간은 침묵이고, 단어 길이의 80%보다 짧게
+    잘린 구간은 인식하지 못합니다. words_per_result개의 단어마다 최종 결과를,
+    그 사이에는 중간 결과를 냅니다. cutoff_seconds를 주면 스트림당 그만큼의 오디오를
+    받은 뒤 실제 API처럼 OutOfRange 오류로 스트림을 끊습니다.
+    recognize()는 같은 규칙으로 오디오 한 덩어리를 인식해 단어별 시각을 돌려줍니다.
+    """
+
+    def __init__(self, word_seconds=0.5, words_per_result=4, cutoff_seconds=None, latency=0.0, jitter=0.0, seed=None):
+        self.word_seconds = word_seconds
+        self.words_per_result = words_per_result
+        self.cutoff_seconds = cutoff_seconds
+        self._latency = _Latency(latency, jitter, seed)
+        self.streams_opened = 0
+        self.recognize_calls = 0
+        self.audio_bytes_received = 0
+        self._lock = threading.Lock()
+
+    def streaming_recognize(self, config, requests):
+        with self._lock:
+            self.streams_opened += 1
+        return self._respond(config, requests)
+
+    def recognize(self, config, audio):
+        import numpy as np
+        from google.cloud import speech
+        self._latency.wait()
+        content = audio.content
+        with self._lock:
+            self.recognize_calls += 1
+            self.audio_bytes_received += len(content)
+        sample_rate = config.sample_rate_hertz
+        samples = np.frombuffer(content[:len(content) - len(content) % 2], dtype='<i2')
+        if not samples.size:
+            return speech.RecognizeResponse()
+        bounds = np.flatnonzero(samples[1:] != samples[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [samples.size]))
+        min_word = int(self.word_seconds * sample_rate * 0.8)
+        words = [speech.WordInfo(word=f"w{int(samples[start])}",
+                                 start_time=datetime.timedelta(seconds=int(start) / sample_rate),
+                                 end_time=datetime.timedelta(seconds=int(end) / sample_rate))
+                 for start, end in zip(starts, ends) if samples[start] != 0 and end - start >= min_word]
+        results = []
+        for i in range(0, len(words), self.words_per_result):
+            group = words[i:i + self.words_per_result]
+            results.append(speech.SpeechRecognitionResult(
+                alternatives=[speech.SpeechRecognitionAlternative(
+                    transcript=' '.join(w.word for w in group), words=group)],
+                result_end_time=group[-1].end_time,
+            ))
+        return speech.RecognizeResponse(results=results)
+
+    @staticmethod
+    def _response(words, is_final, end_seconds):
+        from google.cloud import speech
+        return speech.StreamingRecognizeResponse(results=[speech.StreamingRecognitionResult(
+            alternatives=[speech.SpeechRecognitionAlternative(transcript=' '.join(words))],
+            is_final=is_final,
+            result_end_time=datetime.timedelta(seconds=end_seconds),
+        )])
+
+    def _respond(self, config, requests):
+        import numpy as np
+        from google.api_core import exceptions
+        sample_rate = config.config.sample_rate_hertz
+        min_word = int(self.word_seconds * sample_rate * 0.8)
+        words = []
+        position = 0
+        run_value, run_length = 0, 0
+
+        def close_run():
+            if run_value == 0 or run_length < min_word:
+                return
+            words.append(f"w{run_value}")
+            self._latency.wait()
+            end = position / sample_rate
+            if len(words) >= self.words_per_result:
+                yield self._response(words, True, end)
+                words.clear()
+            else:
+                yield self._response(words, False, end)
+
+        for request in requests:
+            audio = request.audio_content
+            with self._lock:
+                self.audio_bytes_received += len(audio)
+            samples = np.frombuffer(audio[:len(audio) - len(audio) % 2], dtype='<i2')
+            if not samples.size:
+                continue
+            if self.cutoff_seconds is not None and (position + samples.size) / sample_rate > self.cutoff_seconds + 1e-9:
+                raise exceptions.OutOfRange('Exceeded maximum allowed stream duration.')
+            bounds = np.flatnonzero(samples[1:] != samples[:-1]) + 1
+            for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [samples.size]))):
+                value = int(samples[start])
+                if value != run_value:
+                    yield from close_run()
+                    run_value, run_length = value, 0
+                run_length += int(end - start)
+                position += int(end - start)
+        yield from close_run()
+        if words:
+            yield self._response(words, True, position / sample_rate)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='로컬 Redis 대용 서버를 실행합니다.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    options = parser.parse_args()
+    with FakeRedisServer(options.host, options.port) as redis_server:
+        print(f"Fake Redis listening on {redis_server.url}", flush=True)
+        try:
+            redis_server._thread.join()
+        except KeyboardInterrupt:
+            pass
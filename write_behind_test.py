@@ -0,0 +1,81 @@
+import os
+import time
+
+import pytest
+
+# 테스트에서는 실제 Firestore에 접속하지 않도록 에뮬레이터 주소를 지정합니다.
+os.environ.setdefault('FIRESTORE_EMULATOR_HOST', 'localhost:8080')
+
+from app import write_behind
+from app.write_behind import WriteBehindQueue
+from testing.fakes import MemoryFirestore
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_writes_after_an_idle_period_are_committed_within_max_delay():
+    db = MemoryFirestore()
+    queue = WriteBehindQueue(db, batch_size=100, max_delay=0.05)
+    queue.enqueue('transcripts', {'text': 'first'})
+    assert wait_for(lambda: queue.stats['committed'] == 1)
+
+    # 큐가 빈 뒤에 들어온 쓰기도 배치가 가득 차기를 기다리지 않고 커밋됩니다.
+    time.sleep(0.1)
+    queue.enqueue('transcripts', {'text': 'second'})
+    assert wait_for(lambda: queue.stats['committed'] == 2, timeout=1)
+    assert sorted(d['text'] for d in db.documents('transcripts')) == ['first', 'second']
+    queue.close(1)
+
+
+def test_failed_commits_are_retried_with_exponential_backoff(monkeypatch):
+    delays = []
+    real_sleep = time.sleep
+    monkeypatch.setattr(write_behind.time, 'sleep', lambda seconds: (delays.append(seconds), real_sleep(0)))
+    db = MemoryFirestore()
+    db.fail_next_commits = 2
+    queue = WriteBehindQueue(db, batch_size=10, max_delay=0, max_retries=3, retry_backoff=0.01)
+    queue.enqueue('transcripts', {'text': 'kept'})
+    assert queue.flush(5)
+    assert delays[:2] == [0.01, 0.02]
+    assert queue.stats['retries'] == 2 and queue.stats['committed'] == 1 and queue.stats['failed'] == 0
+
+    # 재시도 횟수를 넘기면 그 묶음은 버리고 다음 쓰기는 계속 처리합니다.
+    db.fail_next_commits = 2
+    queue.max_retries = 1
+    queue.enqueue('transcripts', {'text': 'dropped'})
+    assert queue.flush(5)
+    queue.enqueue('transcripts', {'text': 'after'})
+    assert queue.close(5)
+    assert queue.stats['failed'] == 1
+    assert sorted(d['text'] for d in db.documents('transcripts')) == ['after', 'kept']
+
+
+def test_flush_commits_without_waiting_for_max_delay_and_honors_its_timeout():
+    db = MemoryFirestore(latency=0.3)
+    queue = WriteBehindQueue(db, batch_size=100, max_delay=60)
+    queue.enqueue('transcripts', {'text': 'slow'})
+    # 커밋이 끝나기 전에 시간이 다 되면 False를 반환합니다.
+    assert not queue.flush(0.05)
+    assert queue.flush(5)
+    assert queue.stats['committed'] == 1
+    # flush가 공유 설정인 max_delay를 바꾸지 않습니다.
+    assert queue.max_delay == 60
+    queue.close(1)
+
+
+def test_close_commits_pending_writes_and_rejects_new_ones():
+    db = MemoryFirestore()
+    queue = WriteBehindQueue(db, batch_size=3, max_delay=60)
+    for i in range(7):
+        queue.enqueue('transcripts', {'text': str(i)})
+    assert queue.close(5)
+    assert queue.stats['committed'] == 7 and queue.stats['batches'] == 3
+    with pytest.raises(RuntimeError):
+        queue.enqueue('transcripts', {'text': 'late'})